@@ -1,27 +1,47 @@
 import json
-from typing import List, Dict, Optional, Callable, Any
+from typing import List, Dict, Optional, Callable, Any, AsyncIterator
 from datetime import datetime
 import os
-import openai
 import asyncio
+import threading
 from dataclasses import dataclass
 from enum import Enum, auto
+from llm_client import LLMClient
+from memory_store import create_memory_store
+from memory_index import MemoryIndex, entry_text
+from tracing import span, start_span, traced
+from plan_executor import PlanError, PlanExecutor
 
 class SearchMode(Enum):
     SURFACE = auto()  # 仅明网搜索
     DEEP = auto()     # 仅深网搜索
     MIXED = auto()    # 混合搜索
 
+# 会阻塞事件循环的同步工具(内部同步调用语言模型)，在线程池中执行
+BLOCKING_TOOLS = ("plan_tasks", "reflect")
+
 @dataclass
 class AgentConfig:
     openai_api_key: str
     search_apis: Optional[Dict] = None
     deepweb_config: Optional[Dict] = None
+    cache_config: Optional[Dict] = None
+    pool_config: Optional[Dict] = None
+    fusion_config: Optional[Dict] = None
+    concurrency_config: Optional[Dict] = None
+    resilience_config: Optional[Dict] = None
+    latency_config: Optional[Dict] = None
     default_search_mode: SearchMode = SearchMode.MIXED
     max_surface_results: int = 10
     max_deepweb_results: int = 5
     enable_learning: bool = True
     max_memory_size: int = 1000
+    max_learning_records: int = 500
+    max_goals: int = 100
+    memory_config: Optional[Dict] = None
+    retrieval_top_k: int = 3
+    llm_config: Optional[Dict] = None
+    plan_config: Optional[Dict] = None
 
 class AutonomousAgent:
     def __init__(self, config: AgentConfig):
@@ -32,10 +52,25 @@ class AutonomousAgent:
             config: 智能体配置
         """
         self.config = config
-        openai.api_key = config.openai_api_key
-        self.memory = []
-        self.goals = []
-        self.learning_data = []
+        self.llm = LLMClient(api_key=config.openai_api_key, **(config.llm_config or {}))
+        # 记忆和学习记录的BM25索引，随追加和淘汰增量更新
+        self.memory_index = MemoryIndex()
+        self.learning_index = MemoryIndex()
+        # 各存储固定容量，超出时淘汰最旧条目(memory_config选择进程内或SQLite持久化)
+        self.memory = create_memory_store(
+            "memory", config.max_memory_size, config.memory_config,
+            on_evict=self.memory_index.remove_entry
+        )
+        self.goals = create_memory_store("goals", config.max_goals, config.memory_config)
+        self.learning_data = create_memory_store(
+            "learning", config.max_learning_records, config.memory_config,
+            on_evict=self.learning_index.remove_entry
+        )
+        # 持久化存储重启后已有数据，需要重建索引
+        self.memory_index.rebuild(self.memory)
+        self.learning_index.rebuild(self.learning_data)
+        # reflect、plan_tasks等会在线程池中执行，记忆/学习记录及其索引的读写都在此锁内进行
+        self._state_lock = threading.RLock()
         self.current_task = None
         self.search_engine = None
         self.tools = self._initialize_base_tools()
@@ -45,8 +80,18 @@ class AutonomousAgent:
         if self.config.search_apis:
             from search_tools import MetaSearchEngine
             self.search_engine = MetaSearchEngine(
-                self.search_apis,
-                deepweb_config=self.config.deepweb_config
+                self.config.search_apis,
+                deepweb_config=self.config.deepweb_config,
+                cache_config=self.config.cache_config,
+                pool_config=self.config.pool_config,
+                max_results={
+                    "surface": self.config.max_surface_results,
+                    "deepweb": self.config.max_deepweb_results
+                },
+                fusion_config=self.config.fusion_config,
+                concurrency_config=self.config.concurrency_config,
+                resilience_config=self.config.resilience_config,
+                latency_config=self.config.latency_config
             )
             await self.search_engine.initialize()
             self._initialize_search_tools()
@@ -55,6 +100,10 @@ class AutonomousAgent:
         """清理资源"""
         if self.search_engine:
             await self.search_engine.close()
+        self.llm.close()
+        for store in (self.memory, self.goals, self.learning_data):
+            if hasattr(store, "close"):
+                store.close()
 
     def _initialize_base_tools(self) -> Dict[str, Callable]:
         """初始化基础工具集"""
@@ -74,11 +123,6 @@ class AutonomousAgent:
             'surface_search': self._perform_surface_search
         })
 
-    def _trim_memory(self):
-        """修剪记忆以避免过大"""
-        if len(self.memory) > self.config.max_memory_size:
-            self.memory = self.memory[-self.config.max_memory_size:]
-
     async def _perform_meta_search(self, query: str, mode: str = None) -> Dict:
         """
         执行元搜索
@@ -91,6 +135,27 @@ class AutonomousAgent:
         mode = mode or self.config.default_search_mode.name.lower()
         return await self.search_engine.meta_search(query, mode)
 
+    async def _stream_meta_search(self, query: str, mode: str = None) -> AsyncIterator[Dict]:
+        """流式元搜索，逐个搜索源产出结果事件(紧凑格式，由前端渲染)"""
+        if not self.search_engine:
+            yield {"event": "error", "error": "Search engine not initialized"}
+            return
+
+        mode = mode or self.config.default_search_mode.name.lower()
+        async for event in self.search_engine.meta_search_stream(query, mode):
+            yield self.search_engine.compact_event(event)
+
+    async def _batch_meta_search(self, queries: List, mode: str = None,
+                                 concurrency: Optional[int] = None) -> AsyncIterator[Dict]:
+        """批量元搜索，每个查询完成后产出一条结果"""
+        if not self.search_engine:
+            yield {"error": "Search engine not initialized"}
+            return
+
+        mode = mode or self.config.default_search_mode.name.lower()
+        async for item in self.search_engine.meta_search_many(queries, mode, concurrency):
+            yield item
+
     async def _perform_deep_search(self, query: str) -> Dict:
         """专用深网搜索"""
         return await self._perform_meta_search(query, "deep")
@@ -99,16 +164,23 @@ class AutonomousAgent:
         """专用明网搜索"""
         return await self._perform_meta_search(query, "surface")
 
+    @traced("agent.format_results")
     async def _format_search_response(self, results: Dict) -> str:
         """格式化搜索结果响应"""
         if "error" in results:
             return results["error"]
         
-        if not any(results.values()):
+        if not (results.get("surface") or results.get("deepweb")):
             return "🔍 没有找到相关搜索结果"
         
         return self.search_engine.format_results(results)
 
+    def _compact_search_response(self, results: Dict) -> Dict:
+        """紧凑搜索响应: 只含结构化结果，由前端渲染"""
+        if "error" in results:
+            return {"error": results["error"]}
+        return {"results": self.search_engine.compact_results(results)}
+
     def _get_current_time(self) -> str:
         """获取当前时间"""
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -120,8 +192,7 @@ class AutonomousAgent:
             "timestamp": self._get_current_time(),
             "type": "note"
         }
-        self.memory.append(note)
-        self._trim_memory()
+        self._remember(note)
         return f"📝 已记录笔记: {content}"
 
     def _set_reminder(self, time: str, task: str) -> str:
@@ -132,10 +203,41 @@ class AutonomousAgent:
             "timestamp": self._get_current_time(),
             "type": "reminder"
         }
-        self.memory.append(reminder)
-        self._trim_memory()
+        self._remember(reminder)
         return f"⏰ 已设置提醒: 在 {time} 执行 {task}"
 
+    def _remember(self, entry: Dict):
+        """写入记忆并更新索引"""
+        with self._state_lock:
+            self.memory.append(entry)
+            self.memory_index.add_entry(entry)
+
+    def _record_learning(self, record: Dict):
+        """写入学习记录并更新索引"""
+        with self._state_lock:
+            self.learning_data.append(record)
+            self.learning_index.add_entry(record)
+
+    @traced("agent.recall")
+    def recall(self, query: str, k: Optional[int] = None) -> List[Dict]:
+        """从记忆和学习记录中检索与查询最相关的k条"""
+        k = self.config.retrieval_top_k if k is None else k
+        with self._state_lock:
+            hits = self.memory_index.top_k(query, k) + self.learning_index.top_k(query, k)
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        return [entry for _, entry in hits[:k]]
+
+    @staticmethod
+    def _format_recalled(entries: List[Dict], max_chars: int = 300) -> str:
+        """把检索到的条目压缩成提示词片段，每条截断到max_chars"""
+        lines = []
+        for entry in entries:
+            text = " ".join(entry_text(entry).split())
+            if len(text) > max_chars:
+                text = text[:max_chars] + "..."
+            lines.append(f"- [{entry.get('timestamp', '')}] {text}")
+        return "\n".join(lines)
+
     def set_goal(self, goal: str) -> str:
         """设置目标"""
         goal_entry = {
@@ -146,8 +248,9 @@ class AutonomousAgent:
         self.goals.append(goal_entry)
         return f"🎯 新目标已设定: {goal}"
 
+    @traced("agent.plan_tasks")
     def plan_tasks(self, objective: str) -> List[Dict]:
-        """制定任务计划"""
+        """制定任务计划，语言模型调用失败时抛出异常，回复不是有效的计划JSON时抛出PlanError"""
         prompt = f"""你是一个任务规划AI。请将以下目标分解为具体可执行步骤:
 
 目标: {objective}
@@ -171,15 +274,102 @@ class AutonomousAgent:
     ]
 }}"""
         
-        response = self._call_llm(prompt, max_tokens=600)
+        response = self._call_llm(prompt, raise_errors=True, max_tokens=600)
         try:
-            return json.loads(response).get("tasks", [])
+            plan = json.loads(response)
         except json.JSONDecodeError as e:
-            print(f"解析任务计划出错: {str(e)}")
-            return []
+            raise PlanError(f"invalid plan JSON: {str(e)}") from e
+        if not isinstance(plan, dict):
+            raise PlanError(f"plan must be a JSON object, got {type(plan).__name__}")
+        return plan.get("tasks", [])
+
+    @traced("agent.execute_plan")
+    async def execute_plan(self, objective: str, tasks: Optional[List[Dict]] = None) -> Dict:
+        """
+        制定并执行计划: 没有依赖关系的步骤并发执行，上游步骤的结果作为下游步骤的上下文
+
+        参数:
+            objective: 目标
+            tasks: 已有的计划(plan_tasks的返回值)，为空时先调用plan_tasks
+        返回:
+            PlanExecutor.run的结果(各步骤状态、输出和关键路径耗时)，另含objective
+        """
+        plan_config = self.config.plan_config or {}
+        executor = PlanExecutor(
+            self._run_plan_step,
+            max_concurrency=plan_config.get("max_concurrency", 4),
+            step_timeout=plan_config.get("step_timeout", 120)
+        )
+        try:
+            if tasks is None:
+                # plan_tasks为同步方法，放到线程中执行以免阻塞事件循环
+                tasks = await asyncio.to_thread(self.plan_tasks, objective)
+            report = await executor.run(tasks)
+            if not report["steps"]:
+                report["error"] = "plan has no steps"
+        except Exception as e:
+            # 规划时语言模型出错或计划无效，返回空报告并附上原因
+            print(f"任务计划无法执行: {str(e)}")
+            report = {**await executor.run([]), "error": str(e)}
+
+        if self.config.enable_learning:
+            self._record_learning({
+                "objective": objective,
+                "plan": [{"step": r["step"], "description": r["description"], "status": r["status"]}
+                         for r in report["steps"]],
+                "timing": report["timing"],
+                "timestamp": self._get_current_time()
+            })
+        return {"objective": objective, **report}
+
+    async def _run_plan_step(self, step: Dict, upstream: Dict[int, Any]) -> str:
+        """执行计划中的一个步骤，上游步骤的结果截断后附在任务描述后"""
+        max_chars = (self.config.plan_config or {}).get("max_context_chars", 1000)
+        lines = [str(step.get("description", ""))]
+        if step.get("expected_outcome"):
+            lines.append(f"预期结果: {step['expected_outcome']}")
+        if step.get("tools_needed"):
+            lines.append(f"建议工具: {', '.join(map(str, step['tools_needed']))}")
+        for dep, output in upstream.items():
+            text = str(output)
+            if len(text) > max_chars:
+                text = text[:max_chars] + "..."
+            lines.append(f"步骤{dep}的结果: {text}")
+        # 出错时抛出异常(而不是返回错误信息)，执行器据此把步骤记为失败并跳过下游步骤
+        return await self._execute_task("\n".join(lines), strict=True)
+
+    @staticmethod
+    def format_plan_report(report: Dict) -> str:
+        """把execute_plan的结果整理为文本"""
+        if not report["steps"]:
+            return f"❌ 未能生成任务计划: {report['error']}" if report.get("error") else "❌ 未能生成任务计划"
+        icons = {"completed": "✅", "failed": "❌", "timeout": "⏱️", "skipped": "⏭️"}
+        lines = [f"📋 目标: {report['objective']}"]
+        for record in report["steps"]:
+            lines.append(f"{icons[record['status']]} 步骤{record['step']}: {record['description']} "
+                         f"({record['elapsed']}s)")
+            lines.append(str(record.get("output", record.get("error", ""))))
+        timing = report["timing"]
+        path = " → ".join(f"步骤{s}" for s in timing["critical_path"])
+        lines.append(f"⏲️ 总耗时 {timing['total']}s，各步骤耗时之和 {timing['sum_of_steps']}s，"
+                     f"关键路径 {path} ({timing['critical_path_seconds']}s)")
+        return "\n".join(lines)
 
     async def execute_task(self, task: str) -> str:
-        """执行任务(支持深网搜索)"""
+        """执行任务(支持深网搜索)，出错时返回错误信息"""
+        try:
+            return await self._execute_task(task)
+        except Exception as e:
+            return f"❌ 任务执行出错: {str(e)}"
+
+    @traced("agent.execute_task")
+    async def _execute_task(self, task: str, strict: bool = False) -> Any:
+        """
+        执行任务，语言模型调用失败或返回的不是有效JSON时抛出异常
+
+        参数:
+            strict: 为True时任一工具调用出错也抛出异常(计划步骤使用)
+        """
         self.current_task = task
         
         # 判断是否需要深网搜索
@@ -187,10 +377,14 @@ class AutonomousAgent:
             "深网", "dark web", "tor", "i2p", "暗网", "onion", ".i2p"
         ])
         
+        # 只加入与任务最相关的几条历史记录
+        related = self.recall(task)
+        related_section = f"\n相关记忆:\n{self._format_recalled(related)}\n" if related else ""
+
         prompt = f"""你是一个AI执行者。请执行以下任务:
 
 任务: {task}
-
+{related_section}
 可用工具: {list(self.tools.keys())}
 {"注意: 此任务可能需要深网搜索" if use_deepweb else ""}
 
@@ -200,64 +394,130 @@ class AutonomousAgent:
 3. 选择最适合的工具和参数
 4. 执行操作并返回结果
 
-请用以下JSON格式返回你的执行计划:
+请用以下JSON格式返回你的执行计划(需要多个工具时在tool_calls中列出，它们会同时执行):
 {{
     "thought_process": "你的思考过程",
-    "tool_used": "使用的工具名称",
-    "arguments": {{
-        "query": "搜索查询(如适用)",
-        "mode": "搜索模式(surface/deep/mixed)",
-        "other_params": "其他参数"
-    }},
+    "tool_calls": [
+        {{
+            "tool": "使用的工具名称",
+            "arguments": {{
+                "query": "搜索查询(如适用)",
+                "mode": "搜索模式(surface/deep/mixed)"
+            }}
+        }}
+    ],
     "result": "执行结果"
 }}"""
         
-        response = self._call_llm(prompt, max_tokens=800)
         try:
+            response = await self._acall_llm(prompt, raise_errors=True, max_tokens=800)
             execution = json.loads(response)
             
-            # 处理工具调用
-            if execution.get("tool_used"):
-                tool_func = self.tools.get(execution["tool_used"])
-                if tool_func:
-                    args = execution.get("arguments", {})
-                    if asyncio.iscoroutinefunction(tool_func):
-                        raw_results = await tool_func(**args)
-                        execution["result"] = await self._format_search_response(raw_results)
-                    else:
-                        execution["result"] = tool_func(**args)
+            # 处理工具调用(兼容只有一个tool_used的旧格式)
+            calls = execution.get("tool_calls") or []
+            if not calls and execution.get("tool_used"):
+                calls = [{"tool": execution["tool_used"], "arguments": execution.get("arguments", {})}]
+            outcomes = await self._run_tool_calls(calls) if isinstance(calls, list) else []
+            if outcomes:
+                execution["tool_results"] = outcomes
+                execution["result"] = self._combine_tool_results(outcomes)
+                failed = [outcome for outcome in outcomes if "error" in outcome]
+                if strict and failed:
+                    raise RuntimeError("; ".join(f"{o['tool']}: {o['error']}" for o in failed))
             
             # 记录执行历史
             if self.config.enable_learning:
-                self.learning_data.append({
+                self._record_learning({
                     "task": task,
                     "execution": execution,
                     "timestamp": self._get_current_time(),
                     "used_deepweb": use_deepweb
                 })
-                self._trim_memory()
             
             return execution.get("result", "✅ 任务执行完成")
         except Exception as e:
-            error_msg = f"❌ 任务执行出错: {str(e)}"
             if self.config.enable_learning:
-                self.learning_data.append({
+                self._record_learning({
                     "task": task,
-                    "error": error_msg,
+                    "error": f"❌ 任务执行出错: {str(e)}",
                     "timestamp": self._get_current_time()
                 })
-            return error_msg
+            raise
+
+    async def _run_tool_calls(self, calls: List[Dict]) -> List[Dict]:
+        """
+        同时执行一组工具调用，按调用顺序返回 [{"tool", "arguments", "result"或"error"}]
+
+        异步工具(搜索)在事件循环上一起执行；会阻塞的同步工具(BLOCKING_TOOLS，内部调用语言模型)
+        放到线程池中执行，笔记、提醒等只写内存的同步工具直接在事件循环上执行。
+        单个调用出错只记录在自己的结果中，不影响其他调用。
+        """
+        async def _call(call: Dict) -> Dict:
+            # 格式不对的调用也返回一条出错结果，保证结果与tool_calls一一对应
+            if not isinstance(call, dict):
+                return {"tool": None, "arguments": call, "error": f"无效的工具调用: {call!r}"}
+            name = call.get("tool") or call.get("tool_used")
+            args = call.get("arguments") or {}
+            outcome = {"tool": name, "arguments": args}
+            tool_func = self.tools.get(name) if isinstance(name, str) else None
+            if not tool_func:
+                outcome["error"] = f"未知工具: {name}"
+                return outcome
+            with span("agent.tool", tool=name) as current:
+                try:
+                    if asyncio.iscoroutinefunction(tool_func):
+                        raw_results = await tool_func(**args)
+                        if "error" in raw_results:
+                            raise RuntimeError(raw_results["error"])
+                        outcome["result"] = await self._format_search_response(raw_results)
+                    elif name in BLOCKING_TOOLS:
+                        outcome["result"] = await asyncio.to_thread(tool_func, **args)
+                    else:
+                        outcome["result"] = tool_func(**args)
+                except Exception as e:
+                    outcome["error"] = f"{type(e).__name__}: {e}"
+                    current.set(error=outcome["error"])
+            return outcome
+
+        return list(await asyncio.gather(*(_call(call) for call in calls)))
 
+    @staticmethod
+    def _combine_tool_results(outcomes: List[Dict]) -> Any:
+        """合并工具调用结果: 单个调用直接返回其结果，多个调用按顺序分段"""
+        def text(outcome: Dict) -> Any:
+            if "error" in outcome:
+                return f"❌ 工具 {outcome['tool']} 执行出错: {outcome['error']}"
+            return outcome["result"]
+
+        if len(outcomes) == 1:
+            return text(outcomes[0])
+        return "\n".join(f"🔧 {outcome['tool']}\n{text(outcome)}" for outcome in outcomes)
+
+    @traced("agent.reflect")
     def reflect(self) -> str:
         """自我反思和学习"""
         if not self.learning_data:
             return "暂无足够的学习数据"
-            
+
+        with self._state_lock:
+            recent = self.learning_data.last(3)
+            # 与最近任务相关的更早记录，只取最相关的几条以控制提示词长度
+            related = self.learning_index.top_k(
+                " ".join(entry_text(record) for record in recent),
+                self.config.retrieval_top_k, exclude=recent
+            )
+        related_section = ""
+        if related:
+            related_section = f"""
+相关的更早记录:
+{self._format_recalled([entry for _, entry in related])}
+"""
+
         prompt = f"""你是一个AI学习者。请分析以下执行历史并提取经验:
 
 执行历史(最近3条):
-{json.dumps(self.learning_data[-3:], ensure_ascii=False, indent=2)}
-
+{json.dumps(recent, ensure_ascii=False, indent=2)}
+{related_section}
 要求:
 1. 识别成功的模式和策略
 2. 分析失败的原因和错误
@@ -280,8 +540,7 @@ class AutonomousAgent:
                 "content": insights,
                 "timestamp": self._get_current_time()
             }
-            self.memory.append(learning_record)
-            self._trim_memory()
+            self._remember(learning_record)
             
             # 格式化输出
             output = ["🧠 学习总结:"]
@@ -296,18 +555,97 @@ class AutonomousAgent:
         except json.JSONDecodeError:
             return response
 
-    def _call_llm(self, prompt: str, **kwargs) -> str:
-        """调用语言模型"""
+    def _call_llm(self, prompt: str, use_cache: bool = True, raise_errors: bool = False, **kwargs) -> str:
+        """
+        调用语言模型(同步)，use_cache=False时跳过响应缓存
+
+        出错时返回错误信息，raise_errors=True时抛出异常
+        """
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                **kwargs
-            )
-            return response.choices[0].message['content']
+            with span("llm.complete", mode="sync", prompt_chars=len(prompt)):
+                return self.llm.complete_sync(prompt, use_cache=use_cache, **kwargs)
+        except Exception as e:
+            if raise_errors:
+                raise
+            return f"⚠️ 语言模型调用出错: {str(e)}"
+
+    async def _acall_llm(self, prompt: str, use_cache: bool = True, raise_errors: bool = False, **kwargs) -> str:
+        """
+        调用语言模型(异步，不阻塞事件循环)，use_cache=False时跳过响应缓存
+
+        出错时返回错误信息，raise_errors=True时抛出异常
+        """
+        try:
+            with span("llm.complete", mode="async", prompt_chars=len(prompt)):
+                return await self.llm.complete(prompt, use_cache=use_cache, **kwargs)
         except Exception as e:
+            if raise_errors:
+                raise
             return f"⚠️ 语言模型调用出错: {str(e)}"
 
+    async def _stream_llm(self, prompt: str, use_cache: bool = True, **kwargs) -> AsyncIterator[str]:
+        """流式调用语言模型，逐个产出增量文本(出错时抛出异常，由调用方发送错误事件)"""
+        llm_span = start_span("llm.stream", prompt_chars=len(prompt))
+        chunks = 0
+        try:
+            async for token in self.llm.stream(
+                [{"role": "user", "content": prompt}], use_cache=use_cache, **kwargs
+            ):
+                chunks += 1
+                yield token
+        except Exception as e:
+            llm_span.end(e)
+            raise
+        finally:
+            llm_span.set(chunks=chunks)
+            llm_span.end()
+
+    def store_versions(self) -> Dict[str, int]:
+        """各记忆存储的版本号(每次追加或清空后递增)，供客户端判断是否需要重新拉取"""
+        return {
+            "memory": self.memory.version,
+            "goals": self.goals.version,
+            "learning": self.learning_data.version
+        }
+
+    def collect_metrics(self) -> List:
+        """导出记忆、缓存、语言模型和搜索源指标(供metrics.REGISTRY在/metrics导出时采集)"""
+        stores = {"memory": self.memory, "goals": self.goals, "learning": self.learning_data}
+        indexes = {"memory": self.memory_index.stats(), "learning": self.learning_index.stats()}
+        caches = []
+        if self.search_engine:
+            caches.append(("search", self.search_engine.cache.stats()))
+        if self.llm.cache is not None:
+            caches.append(("llm", self.llm.cache.stats()))
+        llm = self.llm.stats()
+
+        def per_cache(field: str) -> List:
+            return [({"cache": name, "backend": stats["backend"]}, stats[field]) for name, stats in caches]
+
+        families = [
+            ("agent_memory_entries", "gauge", "记忆存储中的条目数",
+             [({"store": name}, len(store)) for name, store in stores.items()]),
+            ("agent_memory_index_documents", "gauge", "BM25检索索引中的文档数",
+             [({"store": name}, stats["documents"]) for name, stats in indexes.items()]),
+            ("agent_memory_index_terms", "gauge", "BM25检索索引中的词项数",
+             [({"store": name}, stats["terms"]) for name, stats in indexes.items()]),
+            ("agent_cache_hits_total", "counter", "缓存命中次数", per_cache("hits")),
+            ("agent_cache_misses_total", "counter", "缓存未命中次数", per_cache("misses")),
+            ("agent_cache_hit_ratio", "gauge", "进程启动以来的缓存命中率", per_cache("hit_rate")),
+            ("agent_cache_evictions_total", "counter", "缓存淘汰条目数", per_cache("evictions")),
+            ("agent_cache_entries", "gauge", "缓存条目数", per_cache("entries")),
+            ("agent_cache_bytes", "gauge", "缓存占用字节数", per_cache("bytes")),
+            ("agent_llm_requests_total", "counter", "发往语言模型接口的请求数(不含缓存命中)",
+             [({"model": llm["model"]}, llm["requests"])]),
+            ("agent_llm_retries_total", "counter", "语言模型请求重试次数",
+             [({"model": llm["model"]}, llm["retries"])]),
+            ("agent_llm_failures_total", "counter", "重试后仍失败的语言模型请求数",
+             [({"model": llm["model"]}, llm["failures"])])
+        ]
+        if self.search_engine:
+            families.extend(self.search_engine.collect_metrics())
+        return families
+
     async def get_capabilities(self) -> Dict:
         """获取智能体能力信息"""
         capabilities = {
@@ -324,9 +662,15 @@ class AutonomousAgent:
             "memory_stats": {
                 "goals": len(self.goals),
                 "memory_entries": len(self.memory),
-                "learning_records": len(self.learning_data)
+                "learning_records": len(self.learning_data),
+                "memory_index": self.memory_index.stats(),
+                "learning_index": self.learning_index.stats()
             },
-            "tools_available": list(self.tools.keys())
+            "tools_available": list(self.tools.keys()),
+            "llm_stats": self.llm.stats(),
+            "cache_stats": self.search_engine.cache.stats() if self.search_engine else {},
+            "search_stats": self.search_engine.stats() if self.search_engine else {},
+            "engine_health": self.search_engine.resilience_stats() if self.search_engine else {}
         }
         
         if capabilities["deepweb_enabled"]:
@@ -340,15 +684,20 @@ class AutonomousAgent:
     async def clear_memory(self, memory_type: str = "all") -> str:
         """清除指定类型的记忆"""
         if memory_type == "all":
-            self.memory = []
-            self.learning_data = []
-            self.goals = []
+            with self._state_lock:
+                self.memory.clear()
+                self.memory_index.clear()
+                self.learning_data.clear()
+                self.learning_index.clear()
+            self.goals.clear()
             return "所有记忆已清空"
         elif memory_type == "goals":
-            self.goals = []
+            self.goals.clear()
             return "目标已清空"
         elif memory_type == "learning":
-            self.learning_data = []
+            with self._state_lock:
+                self.learning_data.clear()
+                self.learning_index.clear()
             return "学习记录已清空"
         else:
             return "无效的记忆类型"
\ No newline at end of file
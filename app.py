@@ -1,23 +1,32 @@
-from flask import Flask, render_template, request, jsonify
+from quart import Quart, render_template, request, jsonify, Response, g
 from agent_core import AutonomousAgent, AgentConfig, SearchMode
+from metrics import REGISTRY
+from json_codec import FastJSONProvider, dumps as dump_json
+from tracing import TRACER, activate
 import os
+import gzip
+import json
+import time
 import asyncio
+import hashlib
 from dotenv import load_dotenv
 from datetime import datetime
 
 load_dotenv()
 
-app = Flask(__name__)
+app = Quart(__name__)
+# jsonify使用orjson(未安装时为标准库)，输出不转义中文的紧凑JSON
+app.json = FastJSONProvider(app)
 
 # 搜索引擎配置
 SEARCH_APIS = {
     "google": {
         "api_key": os.getenv("GOOGLE_API_KEY"),
-        "endpoint": "https://serpapi.com/search"
+        "endpoint": os.getenv("GOOGLE_SEARCH_ENDPOINT", "https://serpapi.com/search")
     },
     "bing": {
         "api_key": os.getenv("BING_API_KEY"),
-        "endpoint": "https://api.bing.microsoft.com/v7.0/search"
+        "endpoint": os.getenv("BING_SEARCH_ENDPOINT", "https://api.bing.microsoft.com/v7.0/search")
     }
 }
 
@@ -29,56 +38,266 @@ DEEPWEB_CONFIG = {
     "warning": "深网内容需要Tor/I2P浏览器访问，请遵守法律法规"
 }
 
+# 搜索结果缓存配置
+CACHE_CONFIG = {
+    "backend": os.getenv("SEARCH_CACHE_BACKEND", "memory"),  # memory/sqlite
+    "path": os.getenv("SEARCH_CACHE_PATH", "data/search_cache.db"),
+    "max_entries": int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024")),
+    "max_bytes": int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    "ttl": {
+        "surface": int(os.getenv("SEARCH_CACHE_TTL_SURFACE", "900")),
+        "deep": int(os.getenv("SEARCH_CACHE_TTL_DEEP", "21600")),
+        "mixed": int(os.getenv("SEARCH_CACHE_TTL_MIXED", "900"))
+    }
+}
+
+# 连接池配置(直连/Tor/I2P各一个长连接池)
+POOL_CONFIG = {
+    "limit": int(os.getenv("POOL_LIMIT", "100")),
+    "limit_per_host": int(os.getenv("POOL_LIMIT_PER_HOST", "10")),
+    "keepalive_timeout": float(os.getenv("POOL_KEEPALIVE_TIMEOUT", "30")),
+    "ttl_dns_cache": int(os.getenv("POOL_DNS_CACHE_TTL", "300"))
+}
+
+# 语言模型配置(OPENAI_API_BASE可指向本地OpenAI兼容替身服务)
+LLM_CONFIG = {
+    "base_url": os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1"),
+    "model": os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
+    "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    "timeout": float(os.getenv("LLM_TIMEOUT", "60")),
+    "max_retries": int(os.getenv("LLM_MAX_RETRIES", "3")),
+    "cache_config": {
+        "enable": os.getenv("LLM_CACHE_ENABLE", "1") == "1",
+        "backend": os.getenv("LLM_CACHE_BACKEND", "memory"),  # memory/sqlite
+        "path": os.getenv("LLM_CACHE_PATH", "data/llm_cache.db"),
+        "max_entries": int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048")),
+        "ttl": int(os.getenv("LLM_CACHE_TTL", "86400"))
+    }
+}
+
+# 结果融合配置
+FUSION_CONFIG = {
+    "method": os.getenv("FUSION_METHOD", "rrf"),  # rrf/weighted
+    "rrf_k": int(os.getenv("FUSION_RRF_K", "60"))
+}
+
+# 并发限制配置
+CONCURRENCY_CONFIG = {
+    "batch": int(os.getenv("SEARCH_BATCH_CONCURRENCY", "8")),
+    "per_engine": int(os.getenv("SEARCH_ENGINE_CONCURRENCY", "8"))
+}
+BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "500"))
+
+# 限速与熔断配置(SEARCH_RATE_LIMITS为JSON，如 {"google": {"rate": 5, "burst": 10}})
+RESILIENCE_CONFIG = {
+    "rate_limits": json.loads(os.getenv("SEARCH_RATE_LIMITS", "{}")),
+    "max_wait": float(os.getenv("RATE_LIMIT_MAX_WAIT", "1.0")),
+    "breaker": {
+        "failure_threshold": int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+        "recovery_timeout": float(os.getenv("BREAKER_RECOVERY_TIMEOUT", "30")),
+        "half_open_max_calls": int(os.getenv("BREAKER_HALF_OPEN_CALLS", "1"))
+    }
+}
+
+# 自适应超时与对冲请求配置(HEDGE_ENGINES为逗号分隔的搜索源，留空则不对冲)
+LATENCY_CONFIG = {
+    "window": float(os.getenv("LATENCY_WINDOW", "300")),
+    "min_samples": int(os.getenv("LATENCY_MIN_SAMPLES", "20")),
+    "timeout_percentile": float(os.getenv("TIMEOUT_PERCENTILE", "0.99")),
+    "timeout_multiplier": float(os.getenv("TIMEOUT_MULTIPLIER", "1.5")),
+    "min_timeout": float(os.getenv("MIN_TIMEOUT", "2")),
+    "hedge_engines": [
+        engine.strip() for engine in os.getenv("HEDGE_ENGINES", "tor_ahmia,tor_torch,i2p").split(",")
+        if engine.strip()
+    ],
+    "hedge_percentile": float(os.getenv("HEDGE_PERCENTILE", "0.95")),
+    "hedge_max_ratio": float(os.getenv("HEDGE_MAX_RATIO", "0.1"))
+}
+
+# 计划执行配置: 无依赖的步骤并发执行，同时执行的步骤数和单步超时(秒)
+PLAN_CONFIG = {
+    "max_concurrency": int(os.getenv("PLAN_MAX_CONCURRENCY", "4")),
+    "step_timeout": float(os.getenv("PLAN_STEP_TIMEOUT", "120")),
+    "max_context_chars": int(os.getenv("PLAN_MAX_CONTEXT_CHARS", "1000"))  # 传给下游的上游结果长度
+}
+
+# 追踪配置: 按比例采样请求，采样的请求写入TRACE_EXPORT_DIR/<trace_id>.json
+TRACER.configure(
+    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0")),
+    export_dir=os.getenv("TRACE_EXPORT_DIR", "data/traces"),
+    export_format=os.getenv("TRACE_FORMAT", "chrome")  # chrome/otlp
+)
+
+# /search、/deepsearch的响应格式(请求体的format字段可覆盖):
+# compact: 只返回精简的结构化结果，由前端渲染
+# html: 另附服务端渲染的HTML和完整结果字段(旧格式)
+SEARCH_RESPONSE_FORMATS = ("compact", "html")
+SEARCH_RESPONSE_FORMAT = os.getenv("SEARCH_RESPONSE_FORMAT", "compact")
+
+# 响应压缩: 客户端接受gzip且响应体不小于min_size字节时压缩(SSE/NDJSON流式响应不压缩)
+COMPRESSION_CONFIG = {
+    "enable": os.getenv("COMPRESS_ENABLE", "1") == "1",
+    "min_size": int(os.getenv("COMPRESS_MIN_SIZE", "1024")),
+    "level": int(os.getenv("COMPRESS_LEVEL", "5"))
+}
+COMPRESS_MIMETYPES = ("application/json", "text/plain", "text/html")
+
+# /api/memory默认视图中各存储返回的最近条目数(None为全部)
+MEMORY_VIEW = {"goals": None, "memory": 20, "learning": 10}
+
+# 记忆存储配置
+MEMORY_CONFIG = {
+    "backend": os.getenv("MEMORY_BACKEND", "memory"),  # memory/sqlite
+    "path": os.getenv("MEMORY_PATH", "data/agent_memory.db")
+}
+
 # 初始化智能体
 agent_config = AgentConfig(
     openai_api_key=os.getenv("OPENAI_API_KEY"),
     search_apis=SEARCH_APIS,
     deepweb_config=DEEPWEB_CONFIG,
+    cache_config=CACHE_CONFIG,
+    pool_config=POOL_CONFIG,
     default_search_mode=SearchMode.MIXED,
-    max_surface_results=10,
-    max_deepweb_results=5,
+    fusion_config=FUSION_CONFIG,
+    concurrency_config=CONCURRENCY_CONFIG,
+    resilience_config=RESILIENCE_CONFIG,
+    latency_config=LATENCY_CONFIG,
+    max_surface_results=int(os.getenv("MAX_SURFACE_RESULTS", "10")),
+    max_deepweb_results=int(os.getenv("MAX_DEEPWEB_RESULTS", "5")),
     enable_learning=True,
-    max_memory_size=1000
+    max_memory_size=int(os.getenv("MEMORY_LIMIT", "1000")),
+    max_learning_records=int(os.getenv("LEARNING_LIMIT", "500")),
+    max_goals=int(os.getenv("GOALS_LIMIT", "100")),
+    memory_config=MEMORY_CONFIG,
+    llm_config=LLM_CONFIG,
+    plan_config=PLAN_CONFIG
 )
 
 agent = AutonomousAgent(agent_config)
+REGISTRY.add_collector(agent.collect_metrics)
 
-@app.before_request
-async def initialize_agent():
-    if not hasattr(app, 'agent_initialized'):
-        await agent.initialize()
-        app.agent_initialized = True
+# 请求与命令耗时(流式接口的HTTP耗时只到响应头发出，命令耗时到流结束)
+HTTP_LATENCY = REGISTRY.histogram(
+    "agent_http_request_duration_seconds", "HTTP请求耗时", ("route", "method", "status")
+)
+COMMAND_LATENCY = REGISTRY.histogram(
+    "agent_command_duration_seconds", "聊天命令耗时", ("command", "transport")
+)
+CHAT_COMMANDS = ("/search", "/deepsearch", "/goal", "/execute", "/plan", "/reflect", "/capabilities", "/clear")
+
+
+def _command_name(message: str) -> str:
+    """聊天消息对应的命令名(用作指标标签，未知命令归为unknown)"""
+    if not message.startswith("/"):
+        return "chat"
+    name = message.split(" ", 1)[0]
+    return name if name in CHAT_COMMANDS else "unknown"
 
-@app.teardown_appcontext
-async def cleanup(exception=None):
+# 每个worker进程只有一个长期运行的事件循环: 启动时打开连接池，退出时关闭，
+# 请求之间复用同一组会话
+@app.before_serving
+async def startup():
+    await agent.initialize()
+
+@app.after_serving
+async def shutdown():
     await agent.close()
 
+@app.before_request
+async def start_timer():
+    g.request_started = time.perf_counter()
+    # 每个API请求一个追踪(可用traceparent请求头接入上游追踪)，trace ID在X-Trace-Id响应头中返回
+    if request.path.startswith("/api/"):
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        g.trace = TRACER.start_trace(
+            f"{request.method} {route}", request.headers.get("traceparent"),
+            route=route, method=request.method
+        )
+
+@app.after_request
+async def record_latency(response):
+    elapsed = time.perf_counter() - g.request_started
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    HTTP_LATENCY.observe(elapsed, route, request.method, str(response.status_code))
+    command = getattr(g, "command", None)
+    if command:
+        COMMAND_LATENCY.observe(elapsed, command, "json")
+    trace = getattr(g, "trace", None)
+    if trace:
+        root, token = trace
+        root.set(status=response.status_code)
+        response.headers["X-Trace-Id"] = root.trace_id
+        # 流式响应的追踪在响应体产出完毕后结束
+        if not getattr(g, "trace_streaming", False):
+            TRACER.finish_trace(root, token)
+    return response
+
+@app.after_request
+async def compress_response(response):
+    """较大的JSON/文本响应按gzip压缩"""
+    if (not COMPRESSION_CONFIG["enable"] or response.mimetype not in COMPRESS_MIMETYPES
+            or response.status_code in (204, 304) or "Content-Encoding" in response.headers):
+        return response
+    response.vary.add("Accept-Encoding")
+    if not request.accept_encodings["gzip"]:
+        return response
+    data = await response.get_data()
+    if len(data) < COMPRESSION_CONFIG["min_size"]:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=COMPRESSION_CONFIG["level"], mtime=0))
+    response.headers["Content-Encoding"] = "gzip"
+    return response
+
+def _not_modified(etag: str):
+    """客户端持有的版本仍是最新时返回304，不再生成和序列化响应体"""
+    if request.if_none_match.contains_weak(etag):
+        return _with_etag(Response("", status=304), etag)
+    return None
+
+def _with_etag(response, etag: str):
+    """设置弱ETag，并要求客户端每次都带If-None-Match重新验证"""
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.teardown_request
+async def finish_trace(exc):
+    trace = getattr(g, "trace", None)
+    if trace and trace[0].end_ns is None and not getattr(g, "trace_streaming", False):
+        TRACER.finish_trace(trace[0], error=exc)
+
+@app.route("/metrics")
+async def metrics():
+    """Prometheus指标(每个worker进程单独统计)"""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/")
-def home():
-    return render_template("index.html")
+async def home():
+    return await render_template("index.html")
 
 @app.route("/api/chat", methods=["POST"])
 async def handle_chat():
-    data = request.json
+    data = await request.get_json()
     message = data.get("message", "").strip()
     
     if not message:
         return jsonify({"error": "Empty message"}), 400
+    g.command = _command_name(message)
+    g.trace[0].set(command=g.command)
     
     try:
         # 处理特殊命令
-        if message.startswith("/search "):
-            query = message[8:]
-            results = await agent._perform_meta_search(query, "surface")
-            return jsonify({
-                "response": await agent._format_search_response(results),
-                "type": "search_results",
-                "results": results
-            })
-        
-        elif message.startswith("/deepsearch "):
-            query = message[11:]
-            results = await agent._perform_deep_search(query)
+        if message.startswith("/search ") or message.startswith("/deepsearch "):
+            response_format = data.get("format") or SEARCH_RESPONSE_FORMAT
+            if response_format not in SEARCH_RESPONSE_FORMATS:
+                return jsonify({"error": f"format must be one of {SEARCH_RESPONSE_FORMATS}"}), 400
+            if message.startswith("/search "):
+                results = await agent._perform_meta_search(message[8:], "surface")
+            else:
+                results = await agent._perform_deep_search(message[12:])
+            if response_format == "compact":
+                return jsonify({"type": "search_results", **agent._compact_search_response(results)})
             return jsonify({
                 "response": await agent._format_search_response(results),
                 "type": "search_results",
@@ -93,8 +312,13 @@ async def handle_chat():
             response = await agent.execute_task(message[9:])
             return jsonify({"response": response, "type": "text"})
         
+        elif message.startswith("/plan "):
+            report = await agent.execute_plan(message[6:])
+            return jsonify({"response": agent.format_plan_report(report), "type": "text", "plan": report})
+        
         elif message == "/reflect":
-            response = agent.reflect()
+            # reflect为同步方法，放到线程中执行以免阻塞事件循环
+            response = await asyncio.to_thread(agent.reflect)
             return jsonify({"response": response, "type": "text"})
         
         elif message == "/capabilities":
@@ -111,37 +335,235 @@ async def handle_chat():
             return jsonify({"response": response, "type": "text"})
         
         else:
-            response = agent._call_llm(message)
+            # 客户端可传 "cache": false 强制重新生成
+            response = await agent._acall_llm(message, use_cache=data.get("cache", True))
             return jsonify({"response": response, "type": "text"})
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _stream(body, mimetype: str) -> Response:
+    """流式响应(不受RESPONSE_TIMEOUT限制，客户端断开时生成器被关闭)"""
+    trace = getattr(g, "trace", None)
+    if trace:
+        g.trace_streaming = True
+        body = _traced_body(body, trace[0])
+    response = Response(
+        body,
+        mimetype=mimetype,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    response.timeout = None
+    return response
+
+async def _traced_body(body, root):
+    """在请求的追踪中产出流式响应体，产出完毕(或客户端断开)后结束追踪"""
+    token = activate(root)
+    error = None
+    try:
+        async for chunk in body:
+            yield chunk
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        TRACER.finish_trace(root, token, error=error)
+
+def _sse(event: str, data: dict) -> str:
+    """编码一条Server-Sent Events消息"""
+    return f"event: {event}\ndata: {dump_json(data).decode()}\n\n"
+
+@app.route("/api/chat/stream", methods=["POST"])
+async def handle_chat_stream():
+    """
+    流式聊天接口(SSE)
+    - /search、/deepsearch: 按搜索源逐个推送结果
+    - 普通消息: 逐个推送语言模型生成的文本片段
+    """
+    data = await request.get_json()
+    message = data.get("message", "").strip()
+
+    if not message:
+        return jsonify({"error": "Empty message"}), 400
+
+    if message.startswith("/search "):
+        query, mode = message[8:], "surface"
+    elif message.startswith("/deepsearch "):
+        query, mode = message[12:], "deep"
+    elif message.startswith("/"):
+        return jsonify({"error": "Streaming is not supported for this command"}), 400
+    else:
+        query, mode = message, None
+
+    command = _command_name(message)
+    g.trace[0].set(command=command)
+
+    async def events():
+        started = time.perf_counter()
+        try:
+            if mode is None:
+                parts = []
+                async for token in agent._stream_llm(message, use_cache=data.get("cache", True)):
+                    parts.append(token)
+                    yield _sse("token", {"content": token})
+                yield _sse("done", {"response": "".join(parts)})
+            else:
+                async for event in agent._stream_meta_search(query, mode):
+                    yield _sse(event["event"], event)
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+        finally:
+            COMMAND_LATENCY.observe(time.perf_counter() - started, command, "sse")
+
+    return _stream(events(), "text/event-stream")
+
+@app.route("/api/search/batch", methods=["POST"])
+async def handle_search_batch():
+    """
+    批量搜索接口(NDJSON): 每个查询完成后输出一行JSON
+
+    请求体:
+        {
+            "queries": ["查询1", {"query": "查询2", "mode": "deep"}],
+            "mode": "mixed",     # 未单独指定模式的查询使用的模式
+            "concurrency": 8     # 同时进行的查询数(可选)
+        }
+    """
+    data = await request.get_json() or {}
+    queries = data.get("queries")
+    if not isinstance(queries, list) or not queries:
+        return jsonify({"error": "queries must be a non-empty list"}), 400
+    if len(queries) > BATCH_MAX_QUERIES:
+        return jsonify({"error": f"too many queries (max {BATCH_MAX_QUERIES})"}), 400
+    concurrency = data.get("concurrency")
+    if concurrency is not None:
+        try:
+            concurrency = max(1, min(int(concurrency), CONCURRENCY_CONFIG["batch"]))
+        except (TypeError, ValueError):
+            return jsonify({"error": "concurrency must be an integer"}), 400
+
+    async def lines():
+        try:
+            async for item in agent._batch_meta_search(queries, data.get("mode"), concurrency):
+                yield dump_json(item) + b"\n"
+        except Exception as e:
+            yield dump_json({"error": str(e)}) + b"\n"
+
+    return _stream(lines(), "application/x-ndjson")
+
 @app.route("/api/memory", methods=["GET"])
 async def get_memory():
-    """获取记忆内容"""
+    """
+    获取记忆内容
+
+    不带store参数时返回各存储最近的条目(每条带id)和版本号version；带store参数时按条件分页查询:
+        store: memory/goals/learning
+        type: 条目类型(如note/reminder)
+        after/before: 时间戳范围，格式 YYYY-MM-DD HH:MM:SS
+        contains: 条目内容包含的文本
+        cursor: 上一页返回的next_cursor
+        limit: 每页条数(1-200)
+        order: desc(新到旧，默认)/asc(旧到新，配合cursor增量拉取新条目)
+
+    增量同步: 带上次响应的version作为since参数时只返回变化:
+        {"delta": true, "version": ..., "<存储>": {"added": [新条目], "removed_before": id}}
+    客户端删除ID小于removed_before的条目并追加added。since无法增量时返回完整快照(delta为false)。
+    响应带ETag，请求头If-None-Match与之相同时返回304。
+    """
+    stores = {"memory": agent.memory, "goals": agent.goals, "learning": agent.learning_data}
+    since = request.args.get("since")
     try:
-        return jsonify({
-            "goals": agent.goals,
-            "memory": agent.memory[-20:],  # 最近20条记忆
-            "learning": agent.learning_data[-10:]  # 最近10条学习记录
-        })
+        store_name = request.args.get("store")
+        if store_name:
+            if store_name not in stores:
+                return jsonify({"error": f"未知的存储: {store_name}"}), 400
+            store = stores[store_name]
+            not_modified = _not_modified(f"{store_name}-{store.version}")
+            if not_modified:
+                return not_modified
+            if since is not None:
+                if any(name in request.args for name in ("type", "after", "before", "contains", "cursor")):
+                    return jsonify({"error": "since不能与查询条件同时使用"}), 400
+                changes = store.changes(int(since))
+                delta = changes is not None
+                if not delta:
+                    changes = store.changes(0)
+                return _with_etag(jsonify({"delta": delta, **changes}), f"{store_name}-{changes['version']}")
+
+            version = store.version
+            cursor = request.args.get("cursor")
+            items, next_cursor = store.query(
+                entry_type=request.args.get("type"),
+                after=request.args.get("after"),
+                before=request.args.get("before"),
+                contains=request.args.get("contains"),
+                cursor=int(cursor) if cursor else None,
+                limit=max(1, min(int(request.args.get("limit", "20")), 200)),
+                order="asc" if request.args.get("order") == "asc" else "desc"
+            )
+            return _with_etag(jsonify({"items": items, "next_cursor": next_cursor, "version": version}),
+                              f"{store_name}-{version}")
+
+        version = ".".join(str(stores[name].version) for name in MEMORY_VIEW)
+        not_modified = _not_modified(f"memory-{version}")
+        if not_modified:
+            return not_modified
+
+        views = None
+        if since is not None:
+            previous = [int(v) for v in since.split(".")]
+            if len(previous) != len(MEMORY_VIEW):
+                raise ValueError(f"since must be the version returned by /api/memory: {since}")
+            views = {
+                name: stores[name].changes(previous[i], window)
+                for i, (name, window) in enumerate(MEMORY_VIEW.items())
+            }
+        if views is not None and all(changes is not None for changes in views.values()):
+            payload = {"delta": True, **{
+                name: {"added": changes["added"], "removed_before": changes["removed_before"]}
+                for name, changes in views.items()
+            }}
+        else:
+            views = {name: stores[name].changes(0, window) for name, window in MEMORY_VIEW.items()}
+            payload = {name: changes["added"] for name, changes in views.items()}
+            if since is not None:
+                payload["delta"] = False
+        version = ".".join(str(views[name]["version"]) for name in MEMORY_VIEW)
+        payload["version"] = version
+        return _with_etag(jsonify(payload), f"memory-{version}")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route("/api/status", methods=["GET"])
 async def get_status():
-    """获取智能体状态"""
+    """
+    获取智能体状态
+
+    ETag按时间戳以外的内容计算，状态未变时返回304。
+    versions为各记忆存储的版本号，变化时再拉取/api/memory。
+    """
     try:
-        return jsonify({
+        status = {
             "status": "active",
-            "timestamp": datetime.now().isoformat(),
             "current_task": agent.current_task,
+            "search_engines": list(SEARCH_APIS.keys()),
+            "deepweb_enabled": DEEPWEB_CONFIG["enable"],
             "memory_size": len(agent.memory),
-            "learning_records": len(agent.learning_data)
-        })
+            "learning_records": len(agent.learning_data),
+            "versions": agent.store_versions(),
+            "engine_health": agent.search_engine.resilience_stats() if agent.search_engine else {}
+        }
+        etag = f"status-{hashlib.blake2b(dump_json(status), digest_size=8).hexdigest()}"
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        status["timestamp"] = datetime.now().isoformat()
+        return _with_etag(jsonify(status), etag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    # 开发服务器; 生产环境使用 python main.py 或 uvicorn app:app
+    app.run(host="0.0.0.0", port=5000, debug=os.getenv("APP_DEBUG") == "1")
\ No newline at end of file
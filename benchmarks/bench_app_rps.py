@@ -0,0 +1,205 @@
+"""
+Web服务吞吐基准测试
+
+在本地启动模拟的SerpAPI/Bing搜索接口，分别以两种方式提供同一个智能体:
+1. asgi:   app.py在uvicorn中运行，每个worker一个事件循环，连接池在启动时打开
+2. legacy: 原来的Flask方式，每个请求新建事件循环，请求结束后关闭连接池
+
+然后用相同的并发向 /api/chat 发送不重复的 /search 查询(不命中结果缓存)，
+报告每秒请求数和延迟。
+
+legacy模式需要Flask(不在应用依赖中): pip install -r benchmarks/requirements.txt，
+未安装时跳过legacy模式。
+
+用法:
+    python benchmarks/bench_app_rps.py --requests 500 --concurrency 20
+    python benchmarks/bench_app_rps.py --modes asgi --workers 4
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import importlib.util
+import statistics
+import subprocess
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from aiohttp import web
+import aiohttp
+
+from stub_search import create_app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_search_stub(port: int, latency: float):
+    """在后台线程中运行模拟的搜索接口"""
+    stub = create_app(latency)
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(stub, access_log=None)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def serve_legacy(port: int):
+    """按原来的方式提供服务: Flask异步视图 + 每个请求结束后关闭连接池"""
+    from flask import Flask, request, jsonify
+    from app import agent
+
+    legacy = Flask(__name__)
+
+    @legacy.before_request
+    async def initialize_agent():
+        if not hasattr(legacy, "agent_initialized"):
+            await agent.initialize()
+            legacy.agent_initialized = True
+
+    @legacy.teardown_appcontext
+    async def cleanup(exception=None):
+        await agent.close()
+
+    @legacy.route("/api/status")
+    def status():
+        return jsonify({"status": "active"})
+
+    @legacy.route("/api/chat", methods=["POST"])
+    async def chat():
+        query = request.json["message"][8:]
+        results = await agent._perform_meta_search(query, "surface")
+        return jsonify({"response": await agent._format_search_response(results), "results": results})
+
+    legacy.run(host="127.0.0.1", port=port, threaded=True)
+
+
+def launch(mode: str, port: int, stub_port: int, workers: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "bench",
+        "GOOGLE_API_KEY": "bench",
+        "BING_API_KEY": "bench",
+        "GOOGLE_SEARCH_ENDPOINT": f"http://127.0.0.1:{stub_port}/google",
+        "BING_SEARCH_ENDPOINT": f"http://127.0.0.1:{stub_port}/bing",
+        "SEARCH_CACHE_BACKEND": "memory",
+        "MEMORY_BACKEND": "memory",
+        # 替身接口没有配额，不限速
+        "SEARCH_RATE_LIMITS": json.dumps({"google": None, "bing": None})
+    }
+    if mode == "asgi":
+        command = [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1",
+                   "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    else:
+        command = [sys.executable, os.path.abspath(__file__), "--serve-legacy", str(port)]
+    return subprocess.Popen(command, cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base_url}/api/status") as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{base_url} did not start")
+
+
+async def load(base_url: str, requests: int, concurrency: int, tag: str) -> dict:
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker(session: aiohttp.ClientSession):
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                async with session.post(f"{base_url}/api/chat",
+                                        json={"message": f"/search {tag}-{i}"}) as resp:
+                    await resp.read()
+                    if resp.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(ordered) * 1000, 1),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 1),
+        "errors": errors
+    }
+
+
+def bench(mode: str, args, stub_port: int) -> dict:
+    port = _free_port()
+    process = launch(mode, port, stub_port, args.workers)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(wait_ready(base_url))
+        asyncio.run(load(base_url, min(args.warmup, args.requests), args.concurrency, f"warmup-{mode}"))
+        report = asyncio.run(load(base_url, args.requests, args.concurrency, f"bench-{mode}"))
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return {"mode": mode, "workers": args.workers if mode == "asgi" else 1, **report}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="legacy,asgi", help="逗号分隔: legacy,asgi")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="asgi模式的uvicorn worker数")
+    parser.add_argument("--upstream-latency", type=float, default=0.02, help="模拟搜索接口的延迟(秒)")
+    parser.add_argument("--serve-legacy", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    if args.serve_legacy:
+        serve_legacy(args.serve_legacy)
+        return
+
+    stub_port = _free_port()
+    start_search_stub(stub_port, args.upstream_latency)
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    if "legacy" in modes and importlib.util.find_spec("flask") is None:
+        print("未安装Flask，跳过legacy模式(pip install -r benchmarks/requirements.txt)", file=sys.stderr)
+        modes.remove("legacy")
+    reports = [bench(mode, args, stub_port) for mode in modes]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'mode':<8} {'workers':>7} {'rps':>8} {'p50(ms)':>8} {'p99(ms)':>8} {'errors':>7}")
+    for r in reports:
+        print(f"{r['mode']:<8} {r['workers']:>7} {r['rps']:>8} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+多worker缓存命中率基准测试
+
+模拟 gunicorn -w N 部署: 每个worker进程独立处理一部分查询流量，
+对比"每个worker独立内存缓存"与"共享SQLite缓存"时的命中率和上游请求次数。
+
+用法:
+    python benchmarks/bench_cache_workers.py --workers 4 --requests 2000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_cache import create_search_cache
+
+
+def _fake_results(query: str) -> dict:
+    """构造与meta_search返回结构一致的假结果"""
+    return {
+        "surface": [
+            {
+                "title": f"{query} 结果 {i}",
+                "link": f"https://example.com/{abs(hash(query)) % 10000}/{i}",
+                "snippet": "示例摘要 " * 20,
+                "source": "Google",
+                "type": "surface",
+                "score": 1.0 - i / 10
+            }
+            for i in range(10)
+        ],
+        "deepweb": []
+    }
+
+
+def _worker(worker_id: int, cache_config: dict, queries: list, upstream_delay: float, out):
+    cache = create_search_cache(cache_config)
+    upstream_calls = 0
+    started = time.perf_counter()
+    for query in queries:
+        key = cache.make_key(query, "surface")
+        if cache.get(key) is None:
+            upstream_calls += 1
+            time.sleep(upstream_delay)
+            cache.set(key, _fake_results(query), ttl=cache.ttl_for("surface"))
+    elapsed = time.perf_counter() - started
+    stats = cache.stats()
+    out.put({
+        "worker": worker_id,
+        "hits": stats["hits"],
+        "misses": stats["misses"],
+        "upstream_calls": upstream_calls,
+        "elapsed": elapsed
+    })
+
+
+def run(backend: str, workers: int, requests: int, distinct: int, upstream_delay: float,
+        seed: int) -> dict:
+    rng = random.Random(seed)
+    # Zipf分布近似: 少数热门查询占据大部分流量
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    stream = rng.choices([f"query {i}" for i in range(distinct)], weights=weights, k=requests)
+    # 按轮询方式把请求分配给各worker(类似负载均衡)
+    shards = [stream[i::workers] for i in range(workers)]
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_cache_")
+    cache_config = {"backend": backend, "path": os.path.join(tmpdir, "cache.db")}
+
+    out = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=_worker, args=(i, cache_config, shards[i], upstream_delay, out))
+        for i in range(workers)
+    ]
+    started = time.perf_counter()
+    for proc in procs:
+        proc.start()
+    reports = [out.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    wall = time.perf_counter() - started
+
+    hits = sum(r["hits"] for r in reports)
+    misses = sum(r["misses"] for r in reports)
+    return {
+        "backend": backend,
+        "workers": workers,
+        "requests": requests,
+        "distinct_queries": distinct,
+        "hit_rate": round(hits / (hits + misses), 4),
+        "upstream_calls": sum(r["upstream_calls"] for r in reports),
+        "wall_seconds": round(wall, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=300)
+    parser.add_argument("--upstream-delay", type=float, default=0.005,
+                        help="模拟上游搜索API延迟(秒)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    results = [
+        run(backend, args.workers, args.requests, args.distinct, args.upstream_delay, args.seed)
+        for backend in ("memory", "sqlite")
+    ]
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    print(f"{'backend':<8} {'hit_rate':>9} {'upstream':>9} {'wall(s)':>8}")
+    for r in results:
+        print(f"{r['backend']:<8} {r['hit_rate']:>9.2%} {r['upstream_calls']:>9} {r['wall_seconds']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+熔断器基准测试
+
+在进程内启动可注入故障的搜索替身(stub_search.py)，让MetaSearchEngine依次经历:
+1. healthy:   两个引擎都正常
+2. outage:    一个引擎故障(hang: 挂起到截止时间 / down: 立即503)
+3. recovered: 故障恢复，等待熔断器半开试探后继续查询
+
+分别在启用与不启用熔断器时运行，报告各阶段的查询延迟和故障引擎收到的请求数。
+启用熔断器时，故障引擎连续失败几次后被短路，查询延迟回到只请求健康引擎的水平。
+
+用法:
+    python benchmarks/bench_circuit_breaker.py --queries 50 --fault hang --deadline 1
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+from search_tools import MetaSearchEngine
+from stub_search import create_app
+
+
+async def run_phase(engine: MetaSearchEngine, phase: str, queries: int, concurrency: int) -> dict:
+    latencies, statuses = [], {}
+    counter = iter(range(queries))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            result = await engine.meta_search(f"{phase}-{i}-{time.time_ns()}", "surface")
+            latencies.append(time.perf_counter() - started)
+            for source, status in result["sources"].items():
+                key = f"{source}:{status['status']}"
+                statuses[key] = statuses.get(key, 0) + 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    ordered = sorted(latencies)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 1),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 1),
+        "statuses": statuses
+    }
+
+
+async def bench(breaker: bool, args, base_url: str, stub: web.Application) -> dict:
+    stub["faults"].update(google="ok", bing="ok")
+    stats = stub["stats"][args.engine]
+    engine = MetaSearchEngine(
+        {
+            "google": {"api_key": "bench", "endpoint": f"{base_url}/google"},
+            "bing": {"api_key": "bench", "endpoint": f"{base_url}/bing"}
+        },
+        deadlines={"surface": args.deadline},
+        resilience_config={
+            # 不限速，只比较熔断器的效果
+            "rate_limits": {"google": None, "bing": None},
+            "breaker": {
+                "failure_threshold": args.threshold if breaker else 10 ** 9,
+                "recovery_timeout": args.recovery
+            }
+        }
+    )
+    await engine.initialize()
+    report = {"breaker": breaker, "phases": {}}
+    try:
+        for phase in ("healthy", "outage", "recovered"):
+            if phase == "outage":
+                stub["faults"][args.engine] = args.fault
+            elif phase == "recovered":
+                stub["faults"][args.engine] = "ok"
+                await asyncio.sleep(args.recovery)
+            before = stats["requests"]
+            result = await run_phase(engine, phase, args.queries, args.concurrency)
+            result["upstream_requests"] = stats["requests"] - before
+            report["phases"][phase] = result
+        report["engine_health"] = engine.resilience_stats()[args.engine]["breaker"]["state"]
+    finally:
+        await engine.close()
+    return report
+
+
+async def run(args) -> list:
+    stub = create_app(args.latency)
+    runner = web.AppRunner(stub, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        return [await bench(breaker, args, f"http://127.0.0.1:{port}", stub) for breaker in (False, True)]
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=50, help="每个阶段的查询数")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--engine", default="bing", choices=("google", "bing"), help="注入故障的引擎")
+    parser.add_argument("--fault", default="hang", choices=("hang", "down", "slow"))
+    parser.add_argument("--latency", type=float, default=0.02, help="替身接口的正常延迟(秒)")
+    parser.add_argument("--deadline", type=float, default=1.0, help="明网搜索截止时间(秒)")
+    parser.add_argument("--threshold", type=int, default=3, help="熔断的连续失败次数")
+    parser.add_argument("--recovery", type=float, default=2.0, help="熔断后进入半开状态的时间(秒)")
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    reports = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'breaker':<8} {'phase':<10} {'p50(ms)':>8} {'p99(ms)':>8} {args.engine + ' reqs':>10}")
+    for r in reports:
+        for phase, p in r["phases"].items():
+            print(f"{str(r['breaker']):<8} {phase:<10} {p['p50_ms']:>8} {p['p99_ms']:>8} {p['upstream_requests']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+连接池基准测试
+
+启动一个本地HTTP代理替身: 每个新TCP连接先等待 --setup-delay 秒
+(模拟Tor线路建立/代理握手)，之后在同一连接上直接返回结果页面。
+对比原先 force_close=True 的会话与 ConnectionPool 长连接池的总耗时和新建连接数。
+
+用法:
+    python benchmarks/bench_connection_pool.py --requests 200 --concurrency 10
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connection_pool import ConnectionPool
+
+BODY = ("<html><body>" + "<div class='result'><a href='#'>stub</a></div>" * 20 + "</body></html>").encode()
+
+
+class StubProxy:
+    """保持连接的HTTP代理替身，统计新建连接数"""
+    def __init__(self, setup_delay: float):
+        self.setup_delay = setup_delay
+        self.connections = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        await asyncio.sleep(self.setup_delay)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                close = b"connection: close" in head.lower()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n"
+                    + f"Content-Length: {len(BODY)}\r\n".encode()
+                    + (b"Connection: close\r\n\r\n" if close else b"Connection: keep-alive\r\n\r\n")
+                    + BODY
+                )
+                await writer.drain()
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _drive(fetch, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await fetch(f"http://search.example.onion/search/?q=q{i}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - started
+
+
+async def run(requests: int, concurrency: int, setup_delay: float) -> list:
+    proxy = StubProxy(setup_delay)
+    server = await asyncio.start_server(proxy.handle, "127.0.0.1", 0)
+    proxy_url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    timeout = aiohttp.ClientTimeout(total=30)
+    reports = []
+
+    # 原实现: 每次请求都关闭连接
+    session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(force_close=True))
+
+    async def fetch_force_close(url):
+        async with session.get(url, proxy=proxy_url, timeout=timeout) as resp:
+            await resp.read()
+
+    elapsed = await _drive(fetch_force_close, requests, concurrency)
+    await session.close()
+    reports.append({"mode": "force_close", "seconds": round(elapsed, 3),
+                    "connections": proxy.connections})
+
+    # 长连接池
+    proxy.connections = 0
+    pool = ConnectionPool(limit_per_host=concurrency)
+
+    async def fetch_pooled(url):
+        async with pool.get(url, proxy=proxy_url, timeout=timeout) as resp:
+            await resp.read()
+
+    elapsed = await _drive(fetch_pooled, requests, concurrency)
+    stats = pool.stats()
+    await pool.close()
+    reports.append({"mode": "pooled", "seconds": round(elapsed, 3),
+                    "connections": proxy.connections, "pool_stats": stats})
+
+    server.close()
+    await server.wait_closed()
+    for report in reports:
+        report["requests"] = requests
+        report["rps"] = round(requests / report["seconds"], 1)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--setup-delay", type=float, default=0.05,
+                        help="每个新连接的建立开销(秒)")
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    reports = asyncio.run(run(args.requests, args.concurrency, args.setup_delay))
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+        return
+    print(f"{'mode':<12} {'seconds':>8} {'rps':>8} {'connections':>12}")
+    for r in reports:
+        print(f"{r['mode']:<12} {r['seconds']:>8} {r['rps']:>8} {r['connections']:>12}")
+
+
+if __name__ == "__main__":
+    main()
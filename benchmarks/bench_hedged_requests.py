@@ -0,0 +1,125 @@
+"""
+自适应超时与对冲请求基准测试
+
+在进程内启动搜索替身(stub_search.py)，让一个引擎以tail模式运行:
+大部分请求正常返回，少量请求额外延迟 --slow-latency 秒。对比:
+1. fixed:  固定超时，不发对冲请求
+2. hedged: 按延迟分位数计算超时，慢请求超过p95时发出对冲请求
+
+报告查询延迟分位数、对冲请求数/胜出数和故障引擎收到的请求数。
+
+用法:
+    python benchmarks/bench_hedged_requests.py --queries 1000 --tail-rate 0.03 --slow-latency 1
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+from search_tools import MetaSearchEngine
+from stub_search import create_app
+
+
+def _percentile(ordered: list, q: float) -> float:
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 1)
+
+
+async def run_queries(engine: MetaSearchEngine, tag: str, queries: int, concurrency: int) -> list:
+    latencies = []
+    counter = iter(range(queries))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            await engine.meta_search(f"{tag}-{i}-{time.time_ns()}", "surface")
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return sorted(latencies)
+
+
+async def bench(mode: str, args, base_url: str, stub: web.Application) -> dict:
+    hedge = mode == "hedged"
+    engine = MetaSearchEngine(
+        {
+            "google": {"api_key": "bench", "endpoint": f"{base_url}/google"},
+            "bing": {"api_key": "bench", "endpoint": f"{base_url}/bing"}
+        },
+        resilience_config={"rate_limits": {"google": None, "bing": None}},
+        latency_config={
+            # fixed模式下样本永远不足，始终使用固定超时且不对冲
+            "min_samples": args.min_samples if hedge else 10 ** 9,
+            "hedge_engines": [args.engine],
+            "hedge_percentile": args.hedge_percentile
+        }
+    )
+    await engine.initialize()
+    stats = stub["stats"][args.engine]
+    try:
+        await run_queries(engine, f"warmup-{mode}", args.warmup, args.concurrency)
+        before = stats["requests"]
+        ordered = await run_queries(engine, f"bench-{mode}", args.queries, args.concurrency)
+        latency = engine.resilience_stats()[args.engine]["latency"]
+    finally:
+        await engine.close()
+    return {
+        "mode": mode,
+        "p50_ms": _percentile(ordered, 0.5),
+        "p95_ms": _percentile(ordered, 0.95),
+        "p99_ms": _percentile(ordered, 0.99),
+        "max_ms": round(ordered[-1] * 1000, 1),
+        "upstream_requests": stats["requests"] - before,
+        "timeout": latency["timeout"],
+        "hedges_sent": latency["hedges_sent"],
+        "hedges_won": latency["hedges_won"]
+    }
+
+
+async def run(args) -> list:
+    stub = create_app(args.latency, {args.engine: "tail"}, slow_latency=args.slow_latency,
+                      tail_rate=args.tail_rate)
+    runner = web.AppRunner(stub, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        return [await bench(mode, args, f"http://127.0.0.1:{port}", stub) for mode in args.modes.split(",")]
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="fixed,hedged", help="逗号分隔: fixed,hedged")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=100, help="积累延迟样本的预热查询数")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--engine", default="bing", choices=("google", "bing"), help="长尾延迟的引擎")
+    parser.add_argument("--latency", type=float, default=0.02, help="替身接口的正常延迟(秒)")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="慢请求的额外延迟(秒)")
+    parser.add_argument("--tail-rate", type=float, default=0.03, help="慢请求比例")
+    parser.add_argument("--hedge-percentile", type=float, default=0.95)
+    parser.add_argument("--min-samples", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    reports = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'mode':<7} {'p50(ms)':>8} {'p95(ms)':>8} {'p99(ms)':>8} {'max(ms)':>8} "
+          f"{'reqs':>6} {'timeout':>8} {'hedges':>7} {'won':>5}")
+    for r in reports:
+        print(f"{r['mode']:<7} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['max_ms']:>8} "
+              f"{r['upstream_requests']:>6} {r['timeout']:>8} {r['hedges_sent']:>7} {r['hedges_won']:>5}")
+
+
+if __name__ == "__main__":
+    main()
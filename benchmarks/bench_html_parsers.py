@@ -0,0 +1,123 @@
+"""
+深网结果页解析基准测试
+
+1. 对比各解析后端(selectolax/lxml/bs4)解析Ahmia/Torch/I2P结果页的耗时，并校验结果一致
+2. 对比在事件循环中直接解析与放入线程池解析时的事件循环最大延迟
+
+默认使用生成的结果页；可用 --pages 指定保存的真实结果页目录，
+文件名以引擎名开头(如 ahmia_1.html、torch.html、i2p.html)。
+
+用法:
+    python benchmarks/bench_html_parsers.py --results 200 --repeat 20
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_parsers import RESULT_SPECS, ResultPageParser, available_backends, extract_results
+from stub_deepweb import generate_page
+
+
+def load_pages(directory: str, results: int) -> dict:
+    pages = {}
+    for engine in RESULT_SPECS:
+        if directory:
+            files = sorted(f for f in os.listdir(directory) if f.startswith(engine) and f.endswith(".html"))
+            pages[engine] = [open(os.path.join(directory, f), encoding="utf-8").read() for f in files]
+        else:
+            pages[engine] = [generate_page(engine, results)]
+    return pages
+
+
+def bench_backends(pages: dict, repeat: int, limit: int) -> list:
+    reports = []
+    for engine, engine_pages in pages.items():
+        if not engine_pages:
+            continue
+        reference = None
+        for backend in available_backends():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                for html in engine_pages:
+                    output = extract_results(html, engine, backend, limit)
+            elapsed = time.perf_counter() - started
+            if reference is None:
+                reference = output
+            reports.append({
+                "engine": engine,
+                "backend": backend,
+                "ms_per_page": round(elapsed * 1000 / (repeat * len(engine_pages)), 3),
+                "results": len(output),
+                "matches_reference": output == reference
+            })
+    return reports
+
+
+async def _max_loop_lag(parser: ResultPageParser, html: str, engine: str, parses: int, limit: int) -> float:
+    """并发解析的同时测量事件循环的最大调度延迟"""
+    lags = []
+    stop = asyncio.Event()
+
+    async def ticker():
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            expected = loop.time() + 0.001
+            await asyncio.sleep(0.001)
+            lags.append(max(0.0, loop.time() - expected))
+
+    tick = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0.01)
+    await asyncio.gather(*(parser.parse(html, engine, limit) for _ in range(parses)))
+    stop.set()
+    await tick
+    parser.close()
+    return max(lags) if lags else 0.0
+
+
+def bench_loop_lag(pages: dict, parses: int, limit: int) -> list:
+    reports = []
+    engine = "ahmia" if pages.get("ahmia") else next(e for e, p in pages.items() if p)
+    html = pages[engine][0]
+    for backend in ("bs4", available_backends()[0]):
+        for executor in ("inline", "thread"):
+            parser = ResultPageParser(backend=backend, executor=executor)
+            lag = asyncio.run(_max_loop_lag(parser, html, engine, parses, limit))
+            reports.append({"backend": backend, "executor": executor,
+                            "max_loop_lag_ms": round(lag * 1000, 2)})
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="保存的结果页目录")
+    parser.add_argument("--results", type=int, default=200, help="生成页面中的结果数")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=5, help="每页提取的结果上限")
+    parser.add_argument("--parses", type=int, default=10, help="测量循环延迟时的并发解析次数")
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages, args.results)
+    report = {
+        "backends": bench_backends(pages, args.repeat, args.limit),
+        "loop_lag": bench_loop_lag(pages, args.parses, args.limit)
+    }
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print(f"{'engine':<8} {'backend':<11} {'ms/page':>9} {'results':>8} {'match':>6}")
+    for r in report["backends"]:
+        print(f"{r['engine']:<8} {r['backend']:<11} {r['ms_per_page']:>9} {r['results']:>8} {str(r['matches_reference']):>6}")
+    print()
+    print(f"{'backend':<11} {'executor':<8} {'max loop lag(ms)':>17}")
+    for r in report["loop_lag"]:
+        print(f"{r['backend']:<11} {r['executor']:<8} {r['max_loop_lag_ms']:>17}")
+
+
+if __name__ == "__main__":
+    main()
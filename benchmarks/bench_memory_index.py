@@ -0,0 +1,164 @@
+"""
+记忆检索索引基准测试
+
+生成中英文混合的笔记和学习记录(词频服从Zipf分布)，测量:
+1. 建索引耗时和索引占用的内存
+2. 查询延迟(p50/p99)，并与逐条扫描子串匹配对比
+3. 达到容量上限后"追加 + 淘汰"的增量更新耗时
+
+用法:
+    python benchmarks/bench_memory_index.py --records 100000 --queries 1000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_index import MemoryIndex, entry_text
+from memory_store import RingBuffer
+
+SYLLABLES = "ba ce di fo gu ka le mi no pu ra se ti vo zu xan tor net web".split()
+HANZI = "深网搜索缓存代理延迟索引查询记忆智能体规划反思结果错误超时重试爬虫解析网络安全隐私市场论坛学习任务提醒笔记"
+
+
+def build_vocabulary(size: int, seed: int = 0) -> tuple:
+    """生成英文和中文词表，以及Zipf分布的累积权重"""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        if rng.random() < 0.5:
+            words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+        else:
+            words.add("".join(rng.choice(HANZI) for _ in range(rng.randint(2, 3))))
+    words = sorted(words)
+    rng.shuffle(words)
+    cum_weights, total = [], 0.0
+    for rank in range(1, len(words) + 1):
+        total += 1.0 / rank
+        cum_weights.append(total)
+    return words, cum_weights
+
+
+VOCABULARY = build_vocabulary(20000)
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(VOCABULARY[0], cum_weights=VOCABULARY[1], k=words))
+
+
+def generate_records(count: int, seed: int = 0) -> list:
+    """生成与agent_core中结构一致的笔记、提醒和学习记录"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        timestamp = f"2024-01-01 00:{i // 60 % 60:02d}:{i % 60:02d}"
+        kind = rng.random()
+        if kind < 0.5:
+            records.append({"content": f"{_sentence(rng, 12)} #{i}", "timestamp": timestamp, "type": "note"})
+        elif kind < 0.6:
+            records.append({"time": "明天 09:00", "task": _sentence(rng, 6), "timestamp": timestamp, "type": "reminder"})
+        else:
+            records.append({
+                "task": _sentence(rng, 8),
+                "execution": {"thought_process": _sentence(rng, 20), "tool_used": "search",
+                              "result": _sentence(rng, 30)},
+                "timestamp": timestamp,
+                "used_deepweb": rng.random() < 0.3
+            })
+    return records
+
+
+def _percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def _build(records: list) -> MemoryIndex:
+    index = MemoryIndex()
+    for record in records:
+        index.add_entry(record)
+    return index
+
+
+def bench(records: list, queries: list, k: int, scan_queries: int) -> dict:
+    started = time.perf_counter()
+    index = _build(records)
+    build_seconds = time.perf_counter() - started
+
+    # 内存单独测量(tracemalloc会拖慢建索引)，不含条目对象本身
+    tracemalloc.start()
+    measured = _build(records)
+    index_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del measured
+
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        index.top_k(query, k)
+        latencies.append(time.perf_counter() - started)
+
+    # 对比: 逐条扫描条目文本做子串匹配(只能判断包含，无法排序)
+    texts = [entry_text(record).lower() for record in records]
+    scan_latencies = []
+    for query in queries[:scan_queries]:
+        started = time.perf_counter()
+        terms = query.lower().split()
+        [text for text in texts if any(term in text for term in terms)][:k]
+        scan_latencies.append(time.perf_counter() - started)
+
+    # 增量维护: 容量为记录数一半的环形缓冲区，追加时淘汰并从索引中移除
+    capacity = max(1, len(records) // 2)
+    live = MemoryIndex()
+    store = RingBuffer(capacity, on_evict=live.remove_entry)
+    for record in records[:capacity]:
+        store.append(record)
+        live.add_entry(record)
+    started = time.perf_counter()
+    for record in records[capacity:]:
+        store.append(record)
+        live.add_entry(record)
+    update_seconds = time.perf_counter() - started
+    updates = max(1, len(records) - capacity)
+
+    return {
+        "records": len(records),
+        "build_seconds": round(build_seconds, 3),
+        "index_mb": round(index_bytes / 1024 / 1024, 1),
+        **index.stats(),
+        "query_p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "query_p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "scan_p50_ms": round(statistics.median(scan_latencies) * 1000, 3),
+        "us_per_append_evict": round(update_seconds * 1e6 / updates, 1),
+        "live_documents": len(live)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--scan-queries", type=int, default=50, help="逐条扫描对比的查询数")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    records = generate_records(args.records)
+    rng = random.Random(1)
+    queries = [_sentence(rng, rng.randint(2, 6)) for _ in range(args.queries)]
+    report = bench(records, queries, args.k, args.scan_queries)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    for key, value in report.items():
+        print(f"{key:<20} {value}")
+
+
+if __name__ == "__main__":
+    main()
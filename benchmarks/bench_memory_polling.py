@@ -0,0 +1,112 @@
+"""
+记忆/状态轮询基准测试
+
+模拟前端定时轮询 /api/memory 和 /api/status，对比每次轮询的响应体大小和服务端耗时:
+1. full:  每次拉取完整视图(原来的方式)
+2. gzip:  完整视图 + Accept-Encoding: gzip
+3. etag:  带If-None-Match，未变化时返回304
+4. delta: 带since=<上次的version>，只返回新增条目(配合ETag)
+
+每轮轮询之间按 --write-every 追加一条记忆(模拟智能体运行中写入)，
+通过Quart测试客户端直接调用应用，不经过网络。
+
+用法:
+    python benchmarks/bench_memory_polling.py --polls 500 --write-every 10
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("MEMORY_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+import app as app_module
+
+CONTENT = "用户询问了关于隐私保护搜索工具的问题，智能体检索了明网和深网并整理出对比表格。" * 3
+
+
+def write_entry(i: int):
+    app_module.agent.memory.append({
+        "type": "conversation",
+        "content": f"{CONTENT} #{i}",
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+    })
+
+
+async def poll(client, mode: str, path: str, state: dict) -> int:
+    """按模式轮询一次，返回响应体字节数"""
+    headers = {}
+    query = ""
+    if mode == "gzip":
+        headers["Accept-Encoding"] = "gzip"
+    if mode in ("etag", "delta") and state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if mode == "delta" and state.get("version"):
+        query = f"?since={state['version']}"
+    response = await client.get(path + query, headers=headers)
+    body = await response.get_data()
+    if response.status_code == 200:
+        state["etag"] = response.headers.get("ETag")
+        if mode == "delta" and path == "/api/memory":
+            state["version"] = json.loads(body)["version"]
+    return len(body)
+
+
+async def bench(mode: str, path: str, polls: int, write_every: int, prefill: int) -> dict:
+    app_module.agent.memory.clear()
+    for i in range(prefill):
+        write_entry(i)
+    client = app_module.app.test_client()
+    state = {}
+    await poll(client, mode, path, state)  # 首次拉取完整数据(不计入)
+
+    total_bytes = 0
+    elapsed = 0.0
+    for i in range(polls):
+        if write_every and i % write_every == 0:
+            write_entry(prefill + i)
+        started = time.perf_counter()
+        total_bytes += await poll(client, mode, path, state)
+        elapsed += time.perf_counter() - started
+    return {
+        "path": path,
+        "mode": mode,
+        "polls": polls,
+        "bytes_per_poll": round(total_bytes / polls, 1),
+        "us_per_poll": round(elapsed / polls * 1e6, 1)
+    }
+
+
+async def run(args) -> list:
+    reports = []
+    for path, modes in (("/api/memory", ("full", "gzip", "etag", "delta")),
+                        ("/api/status", ("full", "gzip", "etag"))):
+        for mode in modes:
+            reports.append(await bench(mode, path, args.polls, args.write_every, args.prefill))
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--polls", type=int, default=500)
+    parser.add_argument("--write-every", type=int, default=10, help="每隔多少次轮询写入一条记忆(0为不写入)")
+    parser.add_argument("--prefill", type=int, default=100, help="开始前写入的记忆条数")
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    reports = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'path':<12} {'mode':<6} {'bytes/poll':>11} {'us/poll':>9}")
+    for r in reports:
+        print(f"{r['path']:<12} {r['mode']:<6} {r['bytes_per_poll']:>11} {r['us_per_poll']:>9}")
+
+
+if __name__ == "__main__":
+    main()
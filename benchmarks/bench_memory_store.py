@@ -0,0 +1,97 @@
+"""
+记忆存储基准测试
+
+对比原先"列表追加 + 超限后切片"的做法与RingBuffer在达到容量上限后的
+追加吞吐、读取最近N条的耗时以及内存占用。
+
+用法:
+    python benchmarks/bench_memory_store.py --capacity 1000 --appends 200000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_store import RingBuffer
+
+
+class ListStore:
+    """原实现: 追加后用切片截断"""
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.items = []
+
+    def append(self, item):
+        self.items.append(item)
+        if len(self.items) > self.capacity:
+            self.items = self.items[-self.capacity:]
+
+    def last(self, n: int):
+        return self.items[-n:]
+
+
+def _entry(i: int) -> dict:
+    return {"content": f"note {i}", "timestamp": "2024-01-01 00:00:00", "type": "note"}
+
+
+def bench(store_cls, capacity: int, appends: int, reads: int) -> dict:
+    entries = [_entry(i) for i in range(appends)]
+
+    # 预先填满，只测量达到上限之后的稳态
+    store = store_cls(capacity)
+    for entry in entries[:capacity]:
+        store.append(entry)
+    started = time.perf_counter()
+    for entry in entries[capacity:]:
+        store.append(entry)
+    append_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(reads):
+        store.last(20)
+    read_seconds = time.perf_counter() - started
+
+    # 内存占用只统计容器本身(条目对象预先创建，不计入)
+    tracemalloc.start()
+    store = store_cls(capacity)
+    for entry in entries[:capacity * 2]:
+        store.append(entry)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    steady = max(1, appends - capacity)
+    return {
+        "store": store_cls.__name__,
+        "capacity": capacity,
+        "appends_per_sec": round(steady / append_seconds),
+        "ns_per_append": round(append_seconds * 1e9 / steady, 1),
+        "us_per_last20": round(read_seconds * 1e6 / reads, 3),
+        "container_bytes": current,
+        "peak_bytes": peak
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capacity", type=int, default=1000)
+    parser.add_argument("--appends", type=int, default=200000)
+    parser.add_argument("--reads", type=int, default=100000)
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    reports = [bench(cls, args.capacity, args.appends, args.reads) for cls in (ListStore, RingBuffer)]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'store':<11} {'appends/s':>12} {'ns/append':>10} {'us/last20':>10} {'bytes':>10} {'peak':>10}")
+    for r in reports:
+        print(f"{r['store']:<11} {r['appends_per_sec']:>12} {r['ns_per_append']:>10} "
+              f"{r['us_per_last20']:>10} {r['container_bytes']:>10} {r['peak_bytes']:>10}")
+
+
+if __name__ == "__main__":
+    main()
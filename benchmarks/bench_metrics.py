@@ -0,0 +1,74 @@
+"""
+指标记录开销基准测试
+
+测量请求路径上的指标操作耗时:
+1. Histogram.observe (HTTP请求/搜索源/LLM延迟)
+2. Counter.inc (token用量)
+以及 /metrics 导出一次全部指标的耗时。
+
+用法:
+    python benchmarks/bench_metrics.py --ops 1000000 --series 50
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import MetricsRegistry
+
+
+def bench(ops: int, series: int) -> list:
+    registry = MetricsRegistry()
+    histogram = registry.histogram("bench_duration_seconds", "bench", ("route", "status"))
+    counter = registry.counter("bench_total", "bench", ("route",))
+    rng = random.Random(0)
+    labels = [(f"/route/{i}", "200") for i in range(series)]
+    samples = [(rng.expovariate(20), labels[rng.randrange(series)]) for _ in range(ops)]
+
+    started = time.perf_counter()
+    for value, (route, status) in samples:
+        pass
+    baseline = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for value, (route, status) in samples:
+        histogram.observe(value, route, status)
+    observe = time.perf_counter() - started - baseline
+
+    started = time.perf_counter()
+    for value, (route, status) in samples:
+        counter.inc(route)
+    inc = time.perf_counter() - started - baseline
+
+    started = time.perf_counter()
+    text = registry.render()
+    render = time.perf_counter() - started
+
+    return [
+        {"operation": "histogram.observe", "ns_per_op": round(observe * 1e9 / ops, 1)},
+        {"operation": "counter.inc", "ns_per_op": round(inc * 1e9 / ops, 1)},
+        {"operation": "render", "ms": round(render * 1000, 2), "bytes": len(text)}
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=1000000)
+    parser.add_argument("--series", type=int, default=50, help="标签组合数")
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    reports = bench(args.ops, args.series)
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    for r in reports:
+        print("  ".join(f"{key}={value}" for key, value in r.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+搜索结果融合基准测试
+
+模拟多个搜索引擎返回部分重叠的结果，对比:
+1. 原实现: 拼接所有结果后整体排序取前N(不去重)
+2. fuse_results: 规范化URL去重 + 排名融合 + 堆选前N
+
+报告每次合并的耗时和前N个结果中的重复链接数。
+
+用法:
+    python benchmarks/bench_result_fusion.py --engines 20 --results 100 --limit 10
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_fusion import canonicalize_url, fuse_results
+
+
+def generate_pool(engines: int, results: int, overlap: float, seed: int = 0) -> dict:
+    """生成各引擎的结果列表，overlap比例的结果来自共享的热门页面(链接写法各异)"""
+    rng = random.Random(seed)
+    popular = [f"example{i}.com/article/{i}" for i in range(results)]
+    pool = {}
+    for engine in range(engines):
+        items = []
+        for rank in range(results):
+            if rng.random() < overlap:
+                page = popular[min(results - 1, int(rng.expovariate(1 / 10)))]
+                scheme = rng.choice(("http://", "https://", "https://www."))
+                suffix = rng.choice(("", "/", "?utm_source=engine", "#top"))
+                link = f"{scheme}{page}{suffix}"
+            else:
+                link = f"https://site{engine}-{rank}.org/page"
+            items.append({
+                "title": f"result {engine}-{rank}",
+                "link": link,
+                "snippet": "snippet " * rng.randint(5, 40),
+                "source": f"engine{engine}"
+            })
+        pool[f"engine{engine}"] = items
+    return pool
+
+
+def legacy_combine(pool: dict, limit: int) -> list:
+    """原实现: 按标题和摘要长度打分，整体排序"""
+    combined = []
+    for items in pool.values():
+        for item in items:
+            combined.append({**item, "score": (len(item["title"]) * 0.6 + len(item["snippet"]) * 0.4) / 100})
+    return sorted(combined, key=lambda x: x["score"], reverse=True)[:limit]
+
+
+def duplicates(results: list) -> int:
+    links = [canonicalize_url(item["link"]) for item in results]
+    return len(links) - len(set(links))
+
+
+def bench(pool: dict, limit: int, repeat: int) -> list:
+    reports = []
+    for name, combine in (("legacy_sort", legacy_combine), ("fuse_rrf", fuse_results),
+                          ("fuse_weighted", lambda p, n: fuse_results(p, n, method="weighted"))):
+        combine(pool, limit)  # 预热URL规范化缓存
+        started = time.perf_counter()
+        for _ in range(repeat):
+            output = combine(pool, limit)
+        elapsed = time.perf_counter() - started
+        reports.append({
+            "method": name,
+            "candidates": sum(len(items) for items in pool.values()),
+            "ms_per_merge": round(elapsed * 1000 / repeat, 3),
+            "duplicates_in_top": duplicates(output)
+        })
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", type=int, default=20)
+    parser.add_argument("--results", type=int, default=100, help="每个引擎的结果数")
+    parser.add_argument("--overlap", type=float, default=0.5, help="来自共享热门页面的结果比例")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    pool = generate_pool(args.engines, args.results, args.overlap)
+    reports = bench(pool, args.limit, args.repeat)
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'method':<14} {'candidates':>10} {'ms/merge':>9} {'dups':>5}")
+    for r in reports:
+        print(f"{r['method']:<14} {r['candidates']:>10} {r['ms_per_merge']:>9} {r['duplicates_in_top']:>5}")
+
+
+if __name__ == "__main__":
+    main()
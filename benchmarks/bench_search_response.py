@@ -0,0 +1,153 @@
+"""
+搜索响应格式基准测试
+
+对比 /search 响应的几种生成方式的响应体大小和耗时(渲染 + JSON序列化):
+1. legacy:       f-string拼接HTML + 完整结果，标准库JSON(排序键、中文转义为\\uXXXX，原Quart默认)
+2. html:         模板渲染HTML(字段转义，legacy不转义) + 完整结果，json_codec序列化
+3. compact:      精简结构化结果(前端渲染)，json_codec序列化
+4. compact-json: 精简结构化结果，标准库JSON(单独看序列化器的影响)
+
+用法:
+    python benchmarks/bench_search_response.py --sizes 10,100,1000 --repeat 200
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_codec
+from search_tools import MetaSearchEngine
+
+TITLE_WORDS = ["人工智能", "最新", "新闻", "Python", "教程", "隐私", "工具", "guide", "release", "论坛"]
+
+
+def generate_results(count: int, seed: int = 0) -> dict:
+    """生成与meta_search返回结构一致的结果(含融合分数、来源引擎和搜索源状态)"""
+    rng = random.Random(seed)
+
+    def item(i: int, deep: bool) -> dict:
+        words = " ".join(rng.choice(TITLE_WORDS) for _ in range(6))
+        host = f"{'x' * 56}{i % 10}.onion" if deep else f"example{i}.com"
+        return {
+            "title": f"{words} {i}",
+            "link": f"http://{host}/page/{i}?q={rng.randrange(10 ** 6)}",
+            "snippet": " ".join(rng.choice(TITLE_WORDS) for _ in range(30)),
+            "source": rng.choice(["Tor (Ahmia)", "I2P"]) if deep else rng.choice(["Google", "Bing"]),
+            "score": round(rng.random() / 30, 6),
+            "engines": ["tor_ahmia"] if deep else ["google", "bing"]
+        }
+
+    deep = count // 3
+    return {
+        "surface": [item(i, False) for i in range(count - deep)],
+        "deepweb": [item(i, True) for i in range(deep)],
+        "sources": {
+            engine: {"status": "completed", "elapsed": round(rng.random(), 3), "count": 10}
+            for engine in ("google", "bing", "tor_ahmia", "tor_torch", "i2p")
+        }
+    }
+
+
+def legacy_format_results(results: dict, warning: str = "注意: 深网链接需要Tor/I2P浏览器访问") -> str:
+    """原来的f-string渲染方式(用于对比)"""
+    def item(index, result, is_deepweb=False):
+        return f"""
+        <div class='search-result p-2 mb-2 {'deepweb-result' if is_deepweb else 'bg-white'}'>
+            <div class='result-header d-flex justify-content-between mb-1'>
+                <span class='result-index fw-bold'>{index}.</span>
+                <span class='result-source badge {'bg-dark' if is_deepweb else 'bg-info'}>
+                    {result['source']}
+                </span>
+            </div>
+            <a href='{result['link']}' target='_blank'
+               class='result-title d-block fw-bold mb-1 {'onion-link' if is_deepweb else ''}'>
+                {result['title']}
+            </a>
+            <div class='result-snippet small text-muted'>
+                {result.get('snippet', '无描述')}
+            </div>
+        </div>"""
+
+    formatted = ["<div class='search-results'>"]
+    if results["surface"]:
+        formatted.append("<h3>🌐 明网搜索结果</h3>")
+        formatted.extend(item(i, r) for i, r in enumerate(results["surface"], 1))
+    if results["deepweb"]:
+        formatted.append("<h3 class='mt-3'>🕶️ 深网搜索结果</h3>")
+        formatted.append(f"<div class='alert alert-warning'>{warning}</div>")
+        formatted.extend(item(i, r, True) for i, r in enumerate(results["deepweb"], 1))
+    formatted.append("</div>")
+    return "\n".join(formatted)
+
+
+def stdlib_dumps(obj) -> bytes:
+    """原Quart默认JSON提供者的输出(紧凑分隔符，排序键，ASCII转义)"""
+    return json.dumps(obj, separators=(",", ":"), sort_keys=True).encode()
+
+
+def modes(engine: MetaSearchEngine) -> dict:
+    """各格式: 名称 -> (渲染函数, 序列化函数)"""
+    return {
+        "legacy": (lambda r: {"response": legacy_format_results(r), "type": "search_results", "results": r},
+                   stdlib_dumps),
+        "html": (lambda r: {"response": engine.format_results(r), "type": "search_results", "results": r},
+                 json_codec.dumps),
+        "compact": (lambda r: {"type": "search_results", "results": engine.compact_results(r)},
+                    json_codec.dumps),
+        "compact-json": (lambda r: {"type": "search_results", "results": engine.compact_results(r)},
+                         stdlib_dumps)
+    }
+
+
+def bench(size: int, repeat: int) -> list:
+    engine = MetaSearchEngine({})
+    results = generate_results(size)
+    reports = []
+    for mode, (build, dumps) in modes(engine).items():
+        build(results)  # 预热(模板首次使用时填入样式类)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            payload = build(results)
+        render = (time.perf_counter() - started) / repeat
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            body = dumps(payload)
+        serialize = (time.perf_counter() - started) / repeat
+        reports.append({
+            "mode": mode,
+            "results": size,
+            "bytes": len(body),
+            "render_us": round(render * 1e6, 1),
+            "serialize_us": round(serialize * 1e6, 1),
+            "total_us": round((render + serialize) * 1e6, 1)
+        })
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000", help="逗号分隔的结果数")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    reports = []
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        reports.extend(bench(size, args.repeat))
+    if args.json:
+        print(json.dumps({"serializer": json_codec.backend(), "reports": reports}, indent=2))
+        return
+    print(f"serializer: {json_codec.backend()}")
+    print(f"{'mode':<13} {'results':>7} {'bytes':>9} {'render(us)':>11} {'serialize(us)':>14} {'total(us)':>10}")
+    for r in reports:
+        print(f"{r['mode']:<13} {r['results']:>7} {r['bytes']:>9} {r['render_us']:>11} "
+              f"{r['serialize_us']:>14} {r['total_us']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+离线基准测试套件
+
+在本地启动全部上游替身，不需要网络、API密钥或Tor/I2P:
+- SerpAPI(organic_results)/Bing(webPages.value): stub_search.py
+- Ahmia/Torch/I2P结果页 + 假HTTP代理/SOCKS5代理: stub_deepweb.py
+- OpenAI chat completions(对/execute返回meta_search调用，对/plan返回三步计划): stub_openai.py
+
+然后用uvicorn启动app.py(环境变量指向替身)，依次运行各场景，
+向 /api/chat 发送不重复的消息(不命中缓存)，报告吞吐和p50/p95/p99:
+    search:     /search <查询>
+    deepsearch: /deepsearch <查询>
+    execute:    /execute <任务>(LLM → meta_search → 格式化)
+    plan:       /plan <目标>(规划 → 两个并行步骤 → 汇总步骤，每步同execute)
+    chat:       自由对话(LLM)
+
+--output 保存JSON结果，--baseline 与之前保存的结果对比，
+任一场景吞吐下降或延迟分位数上升超过 --max-regression 时以非0状态退出。
+
+用法:
+    python benchmarks/bench_suite.py --output baseline.json
+    python benchmarks/bench_suite.py --baseline baseline.json --max-regression 0.15
+    python benchmarks/bench_suite.py --scenarios search,execute --llm-latency lognormal:0.3,0.5
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import aiohttp
+
+import stub_deepweb
+import stub_openai
+import stub_search
+from bench_app_rps import _free_port, wait_ready
+from stub_common import run_in_thread
+
+try:
+    import aiohttp_socks  # noqa: F401
+    HAS_SOCKS = True
+except ImportError:
+    HAS_SOCKS = False
+
+# 场景: 名称 -> 根据(标签, 序号)生成请求体
+SCENARIOS = {
+    "search": lambda tag, i: {"message": f"/search {tag} query {i}"},
+    "deepsearch": lambda tag, i: {"message": f"/deepsearch {tag} query {i}"},
+    "execute": lambda tag, i: {"message": f"/execute find {tag} topic {i}"},
+    "plan": lambda tag, i: {"message": f"/plan research {tag} topic {i}"},
+    "chat": lambda tag, i: {"message": f"{tag} question {i}"}
+}
+
+# 对比基线时: 指标 -> 数值变大是否为退化
+COMPARED = {"rps": False, "p50_ms": True, "p95_ms": True, "p99_ms": True}
+
+
+def start_stubs(args) -> dict:
+    """在后台线程中启动全部替身，返回各替身端口和应用"""
+    ports = {"search": _free_port(), "deepweb": _free_port(), "openai": _free_port(), "socks": _free_port()}
+    apps = {
+        "search": stub_search.create_app(args.search_latency, error_rate=args.error_rate,
+                                         faults={"google": "flaky", "bing": "flaky"} if args.error_rate else None,
+                                         results=args.results),
+        "deepweb": stub_deepweb.create_app(args.deep_latency, args.error_rate, results=args.results),
+        "openai": stub_openai.create_app(args.llm_latency, args.error_rate,
+                                         rules=stub_openai.TOOL_RULES)
+    }
+    run_in_thread(
+        [(apps[name], ports[name]) for name in ("search", "deepweb", "openai")],
+        [lambda: stub_deepweb.start_socks_proxy(ports["socks"], ports["deepweb"])]
+    )
+    return {"ports": ports, "apps": apps}
+
+
+def server_env(ports: dict, tor_proxy: str) -> dict:
+    deepweb = f"http://127.0.0.1:{ports['deepweb']}"
+    return {
+        **os.environ,
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_API_BASE": f"http://127.0.0.1:{ports['openai']}/v1",
+        "GOOGLE_API_KEY": "bench",
+        "BING_API_KEY": "bench",
+        "GOOGLE_SEARCH_ENDPOINT": f"http://127.0.0.1:{ports['search']}/google",
+        "BING_SEARCH_ENDPOINT": f"http://127.0.0.1:{ports['search']}/bing",
+        "TOR_PROXY": f"socks5://127.0.0.1:{ports['socks']}" if tor_proxy == "socks" else deepweb,
+        "I2P_PROXY": deepweb,
+        "SEARCH_CACHE_BACKEND": "memory",
+        "MEMORY_BACKEND": "memory",
+        "LLM_CACHE_BACKEND": "memory",
+        # 替身接口没有配额，不限速
+        "SEARCH_RATE_LIMITS": json.dumps({
+            engine: None for engine in ("google", "bing", "tor_ahmia", "tor_torch", "i2p")
+        })
+    }
+
+
+def percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def run_scenario(base_url: str, scenario: str, requests: int, concurrency: int, tag: str) -> dict:
+    build = SCENARIOS[scenario]
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker(session: aiohttp.ClientSession):
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                async with session.post(f"{base_url}/api/chat", json=build(tag, i)) as resp:
+                    body = await resp.json(content_type=None)
+                    if resp.status != 200 or "error" in body:
+                        errors += 1
+            except (aiohttp.ClientError, ValueError):
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        "scenario": scenario,
+        "requests": requests,
+        "concurrency": concurrency,
+        "rps": round(requests / elapsed, 1),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 1),
+        "p50_ms": round(statistics.median(ordered) * 1000, 1),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 1),
+        "errors": errors
+    }
+
+
+def upstream_counts(apps: dict) -> dict:
+    """各替身收到的请求数(用于换算每个场景的上游放大倍数)"""
+    search = apps["search"]["stats"]
+    deepweb = apps["deepweb"]["stats"]
+    return {
+        "google": search["google"]["requests"],
+        "bing": search["bing"]["requests"],
+        **{engine: counts["requests"] for engine, counts in deepweb.items()},
+        "openai": apps["openai"]["stats"]["requests"]
+    }
+
+
+def bench(args) -> dict:
+    stubs = start_stubs(args)
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=ROOT, env=server_env(stubs["ports"], args.tor_proxy),
+        stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL
+    )
+    reports = []
+    try:
+        asyncio.run(wait_ready(base_url))
+        run_id = int(time.time())
+        for scenario in args.scenarios:
+            if args.warmup:
+                asyncio.run(run_scenario(base_url, scenario, args.warmup, args.concurrency,
+                                         f"warmup{run_id}"))
+            before = upstream_counts(stubs["apps"])
+            report = asyncio.run(run_scenario(base_url, scenario, args.requests, args.concurrency,
+                                              f"bench{run_id}"))
+            after = upstream_counts(stubs["apps"])
+            report["upstream_per_request"] = {
+                name: round((after[name] - before[name]) / args.requests, 2)
+                for name in after if after[name] != before[name]
+            }
+            reports.append(report)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "search_latency": args.search_latency,
+            "deep_latency": args.deep_latency,
+            "llm_latency": args.llm_latency,
+            "error_rate": args.error_rate,
+            "tor_proxy": args.tor_proxy,
+            "python": platform.python_version()
+        },
+        "scenarios": reports
+    }
+
+
+def compare(result: dict, baseline: dict, max_regression: float) -> list:
+    """逐场景对比基线，返回 [(场景, 指标, 基线值, 当前值, 变化比例, 是否退化)]"""
+    previous = {r["scenario"]: r for r in baseline.get("scenarios", [])}
+    rows = []
+    for report in result["scenarios"]:
+        old = previous.get(report["scenario"])
+        if not old:
+            continue
+        for metric, higher_is_worse in COMPARED.items():
+            if not old.get(metric):
+                continue
+            change = (report[metric] - old[metric]) / old[metric]
+            worse = change if higher_is_worse else -change
+            rows.append((report["scenario"], metric, old[metric], report[metric], change,
+                         worse > max_regression))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"逗号分隔: {','.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=300, help="每个场景的请求数")
+    parser.add_argument("--warmup", type=int, default=30, help="每个场景的预热请求数")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker数")
+    parser.add_argument("--search-latency", default="lognormal:0.03,0.3", help="SerpAPI/Bing替身延迟分布")
+    parser.add_argument("--deep-latency", default="lognormal:0.3,0.5", help="Ahmia/Torch/I2P替身延迟分布")
+    parser.add_argument("--llm-latency", default="lognormal:0.2,0.4", help="OpenAI替身延迟分布")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="各替身返回错误的概率")
+    parser.add_argument("--results", type=int, default=10, help="替身每次返回的结果数")
+    parser.add_argument("--tor-proxy", choices=("http", "socks"), default="socks" if HAS_SOCKS else "http",
+                        help="Tor代理类型(socks需要aiohttp-socks)")
+    parser.add_argument("--output", help="把结果保存为JSON文件")
+    parser.add_argument("--baseline", help="与之前保存的JSON结果对比")
+    parser.add_argument("--max-regression", type=float, default=0.1, help="允许的退化比例")
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    parser.add_argument("--verbose", action="store_true", help="显示服务端输出")
+    args = parser.parse_args()
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {sorted(unknown)}")
+
+    result = bench(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    rows = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            rows = compare(result, json.load(f), args.max_regression)
+        result["comparison"] = [
+            {"scenario": s, "metric": m, "baseline": old, "current": new,
+             "change": round(change, 3), "regression": regressed}
+            for s, m, old, new, change, regressed in rows
+        ]
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{'scenario':<11} {'rps':>8} {'p50(ms)':>8} {'p95(ms)':>8} {'p99(ms)':>8} {'errors':>7}  upstream/req")
+        for r in result["scenarios"]:
+            upstream = " ".join(f"{name}={count}" for name, count in r["upstream_per_request"].items())
+            print(f"{r['scenario']:<11} {r['rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} "
+                  f"{r['errors']:>7}  {upstream}")
+        if rows:
+            print(f"\n{'scenario':<11} {'metric':<7} {'baseline':>9} {'current':>9} {'change':>8}")
+            for s, m, old, new, change, regressed in rows:
+                print(f"{s:<11} {m:<7} {old:>9} {new:>9} {change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+
+    if any(regressed for *_, regressed in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+多工具调用基准测试
+
+对比execute_task中一组工具调用的两种执行方式(不含LLM调用):
+1. sequential: 逐个执行(原来每轮只能调用一个工具)
+2. parallel:   _run_tool_calls同时执行(异步工具在事件循环上，plan_tasks/reflect在线程池中)
+
+搜索源使用本地替身(stub_search.py/stub_deepweb.py)，不需要网络、API密钥或Tor/I2P。
+每次使用不重复的查询，不命中搜索缓存。
+
+用法:
+    python benchmarks/bench_tool_calls.py --rounds 20 --deep-latency lognormal:0.3,0.5
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_suite import server_env, start_stubs
+
+
+def tool_calls(tag: str) -> list:
+    """一个典型任务: 明网搜索、深网搜索和一条笔记"""
+    return [
+        {"tool": "surface_search", "arguments": {"query": f"{tag} privacy tools"}},
+        {"tool": "deep_search", "arguments": {"query": f"{tag} privacy forums"}},
+        {"tool": "take_notes", "arguments": {"content": f"{tag} research started"}}
+    ]
+
+
+async def bench(agent, rounds: int) -> list:
+    async def sequential(calls):
+        return [outcome for call in calls for outcome in await agent._run_tool_calls([call])]
+
+    modes = {"sequential": sequential, "parallel": agent._run_tool_calls}
+    timings = {mode: [] for mode in modes}
+    errors = {mode: 0 for mode in modes}
+    for i in range(rounds):
+        for mode, run in modes.items():
+            started = time.perf_counter()
+            outcomes = await run(tool_calls(f"{mode}{i}"))
+            timings[mode].append(time.perf_counter() - started)
+            errors[mode] += sum("error" in outcome for outcome in outcomes)
+    return [{
+        "mode": mode,
+        "rounds": rounds,
+        "mean_ms": round(statistics.fmean(samples) * 1000, 1),
+        "p50_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+        "errors": errors[mode]
+    } for mode, samples in timings.items()]
+
+
+async def run(args) -> list:
+    # 应用在导入时读取配置，需先设置环境变量
+    import app as app_module
+    async with app_module.app.test_app():
+        return await bench(app_module.agent, args.rounds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--search-latency", default="lognormal:0.03,0.3", help="SerpAPI/Bing替身延迟分布")
+    parser.add_argument("--deep-latency", default="lognormal:0.3,0.5", help="Ahmia/Torch/I2P替身延迟分布")
+    parser.add_argument("--results", type=int, default=10, help="替身每次返回的结果数")
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    stubs = start_stubs(argparse.Namespace(
+        search_latency=args.search_latency, deep_latency=args.deep_latency, llm_latency=0,
+        error_rate=0.0, results=args.results
+    ))
+    os.environ.update(server_env(stubs["ports"], "http"))
+    reports = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'mode':<11} {'mean(ms)':>9} {'p50(ms)':>8} {'max(ms)':>8} {'errors':>7}")
+    for r in reports:
+        print(f"{r['mode']:<11} {r['mean_ms']:>9} {r['p50_ms']:>8} {r['max_ms']:>8} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+替身服务的公共部分: 延迟分布、错误分布，以及在后台线程中运行多个替身服务
+
+延迟分布写法(秒):
+    0.05                  固定延迟
+    uniform:0.01,0.1      均匀分布
+    lognormal:0.05,0.5    对数正态分布(中位数, sigma)
+    tail:0.02,0.03,1.0    基础延迟，按比例(0.03)额外延迟1.0秒
+"""
+import math
+import random
+import asyncio
+import threading
+from typing import Callable, Dict, List, Tuple, Union
+
+from aiohttp import web
+
+LATENCY_KINDS = ("fixed", "uniform", "lognormal", "tail")
+
+
+def latency_model(spec: Union[str, float, int, None]) -> Callable[[], float]:
+    """把延迟分布写法解析为返回一次延迟(秒)的函数"""
+    if spec is None or spec == "":
+        return lambda: 0.0
+    if isinstance(spec, (int, float)):
+        return lambda: float(spec)
+    kind, _, params = str(spec).partition(":")
+    if not params:
+        value = float(kind)
+        return lambda: value
+    values = [float(value) for value in params.split(",")]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        low, high = values
+        return lambda: random.uniform(low, high)
+    if kind == "lognormal":
+        median, sigma = values
+        mu = math.log(median)
+        return lambda: random.lognormvariate(mu, sigma)
+    if kind == "tail":
+        base, rate, extra = values
+        return lambda: base + (extra if random.random() < rate else 0.0)
+    raise ValueError(f"unknown latency distribution: {spec} (kinds: {LATENCY_KINDS})")
+
+
+def error_model(error_rate: float = 0.0, statuses: Union[str, Dict[int, float], None] = None) -> Callable[[], int]:
+    """
+    错误分布: 返回0表示正常，否则为本次应返回的HTTP状态码
+
+    参数:
+        error_rate: 出错概率
+        statuses: 出错时各状态码的权重，如 "503:3,429:1" 或 {503: 3, 429: 1}，默认全部为503
+    """
+    if isinstance(statuses, str):
+        statuses = {int(code): float(weight) for code, _, weight in
+                    (item.partition(":") for item in statuses.split(",") if item)}
+    statuses = statuses or {503: 1.0}
+    codes, weights = list(statuses), list(statuses.values())
+
+    def draw() -> int:
+        if error_rate and random.random() < error_rate:
+            return random.choices(codes, weights)[0]
+        return 0
+    return draw
+
+
+async def _start(loop_apps: List[Tuple[web.Application, int]], runners: list):
+    for app, port in loop_apps:
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        runners.append(runner)
+
+
+def run_in_thread(apps: List[Tuple[web.Application, int]],
+                  servers: List[Callable[[], "asyncio.Future"]] = ()) -> asyncio.AbstractEventLoop:
+    """
+    在一个后台线程的事件循环中运行多个替身服务
+
+    参数:
+        apps: [(aiohttp应用, 端口)]
+        servers: 返回协程的函数(如启动SOCKS代理)，在同一个循环中执行
+    返回:
+        后台事件循环(可用run_coroutine_threadsafe修改替身状态)
+    """
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    errors = []
+
+    def run():
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(_start(apps, []))
+            for server in servers:
+                loop.run_until_complete(server())
+        except Exception as e:
+            errors.append(e)
+        finally:
+            ready.set()
+        if not errors:
+            loop.run_forever()
+
+    threading.Thread(target=run, name="stubs", daemon=True).start()
+    ready.wait()
+    if errors:
+        raise errors[0]
+    return loop
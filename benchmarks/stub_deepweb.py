@@ -0,0 +1,172 @@
+"""
+本地深网替身: Ahmia/Torch/I2P结果页 + 假代理
+
+一个HTTP服务按Host头返回对应搜索引擎的结果页(结构与真实页面一致)，同时充当:
+- HTTP代理: aiohttp以绝对URI把请求发给代理，Host头即目标.onion/.i2p地址
+- SOCKS5代理(--socks-port): 接受任意CONNECT目标(包括远程解析的域名)，
+  把连接转给上面的HTTP服务，用于安装了aiohttp-socks时的socks5://配置
+
+用法:
+    python benchmarks/stub_deepweb.py --port 8003 --socks-port 9053 --latency lognormal:0.8,0.6
+    TOR_PROXY=socks5://127.0.0.1:9053 I2P_PROXY=http://127.0.0.1:8003 python main.py
+    (未安装aiohttp-socks时 TOR_PROXY=http://127.0.0.1:8003)
+"""
+import asyncio
+import argparse
+import ipaddress
+import socket
+import struct
+from urllib.parse import quote
+
+from aiohttp import web
+
+from stub_common import error_model, latency_model
+
+TEXT = "lorem ipsum dolor sit amet " * 30
+FILLER = f"<p>{TEXT}</p>"
+
+# 按目标主机判断模拟的搜索引擎(与search_tools.DeepWebSearcher中的地址一致)
+HOST_ENGINES = (
+    ("juhanurmihxlp77nkq76byazcldy2hlmovfu2epvl5ankdibsot4csyd.onion", "ahmia"),
+    ("xmh57jrzrnw6insl.onion", "torch"),
+    (".i2p", "i2p")
+)
+
+
+def generate_page(engine: str, results: int, query: str = "") -> str:
+    """生成与真实结果页结构一致的页面"""
+    items = []
+    for i in range(results):
+        link = f"http://{'x' * 56}{i % 10}.onion/page/{i}"
+        if query:
+            link = f"{link}?q={quote(query)}"
+        if engine == "ahmia":
+            items.append(
+                f"<li class='result'><h4><a class='title' href='{link}'>Ahmia result {i}</a></h4>"
+                f"<p class='description'>description {i} <span>{TEXT}</span></p>"
+                f"<cite><a class='link' href='{link}'>{link}</a></cite></li>"
+            )
+        elif engine == "torch":
+            items.append(f"<dt><a href='{link}'>Torch result {i}</a></dt><dd>{FILLER}</dd>")
+        else:
+            items.append(
+                f"<div class='result'><h3><a href='{link}'>I2P result {i}</a></h3>{FILLER}</div>"
+            )
+    return f"<html><head><title>{engine}</title></head><body>{FILLER}{''.join(items)}</body></html>"
+
+
+def engine_for_host(host: str) -> str:
+    host = (host or "").split(":")[0].lower()
+    for suffix, engine in HOST_ENGINES:
+        if host.endswith(suffix):
+            return engine
+    return ""
+
+
+def create_app(latency="0", error_rate: float = 0.0, error_statuses: str = None,
+               results: int = 20) -> web.Application:
+    """创建结果页服务(直接访问或作为HTTP代理访问均可)"""
+    delay = latency_model(latency)
+    draw_error = error_model(error_rate, error_statuses)
+    stats = {engine: {"requests": 0, "errors": 0} for _, engine in HOST_ENGINES}
+
+    async def page(request: web.Request) -> web.Response:
+        engine = engine_for_host(request.host)
+        if not engine:
+            return web.Response(status=502, text=f"unknown hidden service: {request.host}")
+        stats[engine]["requests"] += 1
+        await asyncio.sleep(delay())
+        status = draw_error()
+        if status:
+            stats[engine]["errors"] += 1
+            return web.Response(status=status, text="stub proxy error")
+        return web.Response(
+            text=generate_page(engine, results, request.query.get("q", "")),
+            content_type="text/html"
+        )
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_get("/_stats", get_stats)
+    app.router.add_route("GET", "/{tail:.*}", page)
+    return app
+
+
+async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _socks_handshake(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> str:
+    """SOCKS5无认证握手，返回CONNECT的目标主机"""
+    version, methods = struct.unpack("!BB", await reader.readexactly(2))
+    await reader.readexactly(methods)
+    if version != 5:
+        raise ConnectionError("not a SOCKS5 client")
+    writer.write(b"\x05\x00")
+    _, command, _, address_type = struct.unpack("!BBBB", await reader.readexactly(4))
+    if address_type == 1:
+        host = str(ipaddress.IPv4Address(await reader.readexactly(4)))
+    elif address_type == 3:
+        length = (await reader.readexactly(1))[0]
+        host = (await reader.readexactly(length)).decode()
+    elif address_type == 4:
+        host = str(ipaddress.IPv6Address(await reader.readexactly(16)))
+    else:
+        raise ConnectionError("unsupported address type")
+    await reader.readexactly(2)  # 端口
+    if command != 1:
+        writer.write(b"\x05\x07\x00\x01" + socket.inet_aton("0.0.0.0") + b"\x00\x00")
+        raise ConnectionError("only CONNECT is supported")
+    writer.write(b"\x05\x00\x00\x01" + socket.inet_aton("127.0.0.1") + b"\x00\x00")
+    await writer.drain()
+    return host
+
+
+async def start_socks_proxy(port: int, upstream_port: int, host: str = "127.0.0.1") -> asyncio.AbstractServer:
+    """启动SOCKS5代理，所有CONNECT都转到本地结果页服务"""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await _socks_handshake(reader, writer)
+            upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", upstream_port)
+        except (ConnectionError, asyncio.IncompleteReadError, OSError):
+            writer.close()
+            return
+        await asyncio.gather(_pipe(reader, upstream_writer), _pipe(upstream_reader, writer))
+
+    return await asyncio.start_server(handle, host, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8003, help="结果页服务/HTTP代理端口")
+    parser.add_argument("--socks-port", type=int, help="SOCKS5代理端口(可选)")
+    parser.add_argument("--latency", default="0", help="延迟分布(见stub_common.py)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-statuses", help="出错时的状态码权重，如 503:3,504:1")
+    parser.add_argument("--results", type=int, default=20, help="每页结果数")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.error_rate, args.error_statuses, args.results)
+    if args.socks_port:
+        async def socks(app):
+            app["socks"] = await start_socks_proxy(args.socks_port, args.port, args.host)
+        app.on_startup.append(socks)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
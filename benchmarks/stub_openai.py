@@ -0,0 +1,161 @@
+"""
+本地OpenAI兼容替身服务
+
+实现 POST /v1/chat/completions，回复内容回显用户消息，
+可配置延迟分布(写法见stub_common.py)和错误分布，用于在无网络/无密钥时测试LLM客户端。
+请求体带 "stream": true 时按词以SSE分块返回(与OpenAI流式格式一致)。
+
+--tool-calls 时对执行者提示词(/execute)返回调用 meta_search 的执行计划，
+查询词取自任务内容，使 /execute 走完整的"LLM → 工具 → 格式化"路径；
+对规划提示词(/plan)返回两个并行搜索步骤和一个依赖两者的汇总步骤。
+
+用法:
+    python benchmarks/stub_openai.py --port 8001 --latency lognormal:0.2,0.4 --error-rate 0.1
+    OPENAI_API_BASE=http://127.0.0.1:8001/v1 python app.py
+"""
+import re
+import json
+import time
+import asyncio
+import argparse
+
+from typing import Callable, List, Tuple, Union
+
+from aiohttp import web
+
+from stub_common import error_model, latency_model
+
+# 执行者提示词(agent_core.execute_task)和规划提示词(agent_core.plan_tasks)的标识
+EXECUTOR_MARKER = "你是一个AI执行者"
+PLANNER_MARKER = "你是一个任务规划AI"
+
+
+def tool_call_reply(prompt: str) -> str:
+    """对执行者提示词返回调用meta_search的执行计划(查询词为任务内容)"""
+    match = re.search(r"任务: (.+)", prompt)
+    task = match.group(1).strip() if match else prompt[:80]
+    return json.dumps({
+        "thought_process": "stub: search for the task",
+        "tool_calls": [{"tool": "meta_search", "arguments": {"query": task, "mode": "surface"}}],
+        "result": ""
+    }, ensure_ascii=False)
+
+
+def plan_reply(prompt: str) -> str:
+    """对规划提示词返回菱形计划: 步骤1、2互不依赖，步骤3依赖两者"""
+    match = re.search(r"目标: (.+)", prompt)
+    objective = match.group(1).strip() if match else prompt[:80]
+    return json.dumps({"tasks": [
+        {"step": 1, "description": f"{objective} overview", "expected_outcome": "surface results",
+         "dependencies": [], "tools_needed": ["meta_search"]},
+        {"step": 2, "description": f"{objective} forums", "expected_outcome": "surface results",
+         "dependencies": [], "tools_needed": ["meta_search"]},
+        {"step": 3, "description": f"{objective} summary", "expected_outcome": "combined results",
+         "dependencies": [1, 2], "tools_needed": ["meta_search"]}
+    ]}, ensure_ascii=False)
+
+
+# --tool-calls时的回复规则
+TOOL_RULES = [(PLANNER_MARKER, plan_reply), (EXECUTOR_MARKER, tool_call_reply)]
+
+
+async def _stream_reply(request: web.Request, payload: dict, content: str, chunk_delay: float) -> web.StreamResponse:
+    """按OpenAI流式格式逐词返回回复"""
+    resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await resp.prepare(request)
+    words = content.split(" ")
+    for i, word in enumerate(words):
+        chunk = {
+            "object": "chat.completion.chunk",
+            "model": payload.get("model", "stub"),
+            "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}}]
+        }
+        await resp.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+        if chunk_delay:
+            await asyncio.sleep(chunk_delay)
+    await resp.write(b"data: [DONE]\n\n")
+    await resp.write_eof()
+    return resp
+
+
+def create_app(latency=0.0, error_rate: float = 0.0, reply: str = None,
+               chunk_delay: float = 0.0, error_statuses=None,
+               rules: List[Tuple[str, Union[str, Callable[[str], str]]]] = ()) -> web.Application:
+    """
+    创建替身服务应用
+
+    参数:
+        latency: 延迟(秒)或延迟分布写法
+        error_statuses: 出错时的状态码分布，如 "503:3,429:1"
+        rules: [(提示词包含的子串, 回复或根据提示词生成回复的函数)]，按顺序匹配，优先于reply
+    """
+    stats = {"requests": 0, "errors": 0}
+    delay = latency_model(latency)
+    draw_error = error_model(error_rate, error_statuses)
+
+    def respond(prompt: str) -> str:
+        for marker, answer in rules:
+            if marker in prompt:
+                return answer(prompt) if callable(answer) else answer
+        return reply if reply is not None else f"stub reply: {prompt[:80]}"
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        payload = await request.json()
+        await asyncio.sleep(delay())
+        status = draw_error()
+        if status:
+            stats["errors"] += 1
+            return web.json_response({"error": {"message": "stub overloaded"}}, status=status)
+
+        prompt = payload["messages"][-1]["content"]
+        content = respond(prompt)
+        if payload.get("stream"):
+            return await _stream_reply(request, payload, content, chunk_delay)
+        return web.json_response({
+            "id": f"chatcmpl-stub-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": len(prompt.split()),
+                "completion_tokens": len(content.split()),
+                "total_tokens": len(prompt.split()) + len(content.split())
+            }
+        })
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_get("/stats", get_stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", default="0", help="响应延迟(秒)或延迟分布(见stub_common.py)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回错误的概率")
+    parser.add_argument("--error-statuses", help="错误状态码分布，如 503:3,429:1(默认503)")
+    parser.add_argument("--tool-calls", action="store_true", help="对执行者/规划提示词返回meta_search调用/计划")
+    parser.add_argument("--reply", help="固定回复内容(默认回显用户消息)")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="流式响应每个分块的间隔(秒)")
+    args = parser.parse_args()
+    web.run_app(
+        create_app(args.latency, args.error_rate, args.reply, args.chunk_delay, args.error_statuses,
+                   TOOL_RULES if args.tool_calls else ()),
+        host=args.host, port=args.port
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+本地搜索接口替身服务(可注入故障)
+
+实现 GET /google (SerpAPI格式) 和 GET /bing (Bing Web Search格式)，
+延迟按 --latency 分布抽样(写法见stub_common.py)，
+每个引擎可单独设置故障模式，运行中通过 POST /fault 切换:
+    ok:   正常返回
+    down: 立即返回503
+    hang: 挂起直到客户端超时
+    slow: 额外延迟 --slow-latency 秒
+    flaky: 按 --error-rate 概率返回错误(状态码按 --error-statuses 分布，默认503)
+    tail: 按 --tail-rate 概率额外延迟 --slow-latency 秒(长尾延迟)
+
+用法:
+    python benchmarks/stub_search.py --port 8002 --latency lognormal:0.05,0.5 --fault bing=hang
+    GOOGLE_SEARCH_ENDPOINT=http://127.0.0.1:8002/google \\
+    BING_SEARCH_ENDPOINT=http://127.0.0.1:8002/bing python main.py
+    curl -X POST http://127.0.0.1:8002/fault -d '{"engine": "bing", "mode": "ok"}'
+"""
+import random
+import asyncio
+import argparse
+
+from aiohttp import web
+
+from stub_common import error_model, latency_model
+
+FAULT_MODES = ("ok", "down", "hang", "slow", "flaky", "tail")
+HANG_SECONDS = 3600
+
+
+def _google_payload(query: str, count: int) -> dict:
+    return {"organic_results": [
+        {"title": f"{query} result {i}", "link": f"https://example{i}.com/{query}", "snippet": "snippet"}
+        for i in range(count)
+    ]}
+
+
+def _bing_payload(query: str, count: int) -> dict:
+    return {"webPages": {"value": [
+        {"name": f"{query} result {i}", "url": f"https://example{i}.com/{query}", "snippet": "snippet"}
+        for i in range(count)
+    ]}}
+
+
+def create_app(latency=0.0, faults: dict = None, slow_latency: float = 2.0,
+               error_rate: float = 0.5, results: int = 5, tail_rate: float = 0.05,
+               error_statuses=None) -> web.Application:
+    """
+    创建替身服务应用
+
+    参数:
+        latency: 延迟(秒)或延迟分布写法
+        faults: {引擎: 故障模式}
+        error_statuses: down/flaky模式返回的状态码分布，如 "503:3,429:1"
+    """
+    faults = {"google": "ok", "bing": "ok", **(faults or {})}
+    delay = latency_model(latency)
+    draw_error = error_model(1.0, error_statuses)
+    stats = {engine: {"requests": 0, "errors": 0} for engine in faults}
+
+    def handler(engine: str, payload):
+        async def search(request: web.Request) -> web.Response:
+            stats[engine]["requests"] += 1
+            mode = faults[engine]
+            await asyncio.sleep(delay())
+            if mode == "down" or (mode == "flaky" and random.random() < error_rate):
+                stats[engine]["errors"] += 1
+                return web.json_response({"error": "stub unavailable"}, status=draw_error())
+            if mode == "hang":
+                await asyncio.sleep(HANG_SECONDS)
+            elif mode == "slow" or (mode == "tail" and random.random() < tail_rate):
+                await asyncio.sleep(slow_latency)
+            return web.json_response(payload(request.query.get("q", ""), results))
+        return search
+
+    async def set_fault(request: web.Request) -> web.Response:
+        payload = await request.json()
+        engine, mode = payload.get("engine"), payload.get("mode")
+        if engine not in faults or mode not in FAULT_MODES:
+            return web.json_response({"error": f"engine in {list(faults)}, mode in {FAULT_MODES}"}, status=400)
+        faults[engine] = mode
+        return web.json_response(faults)
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response({"faults": faults, "stats": stats})
+
+    app = web.Application()
+    app["faults"] = faults
+    app["stats"] = stats
+    app.router.add_get("/google", handler("google", _google_payload))
+    app.router.add_get("/bing", handler("bing", _bing_payload))
+    app.router.add_post("/fault", set_fault)
+    app.router.add_get("/stats", get_stats)
+    return app
+
+
+def parse_faults(values: list) -> dict:
+    """解析 engine=mode 形式的故障设置"""
+    faults = {}
+    for value in values or []:
+        engine, _, mode = value.partition("=")
+        if mode not in FAULT_MODES:
+            raise argparse.ArgumentTypeError(f"unknown fault mode: {value}")
+        faults[engine] = mode
+    return faults
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--latency", default="0", help="响应延迟(秒)或延迟分布(见stub_common.py)")
+    parser.add_argument("--fault", action="append", metavar="ENGINE=MODE", help="初始故障模式，可重复")
+    parser.add_argument("--slow-latency", type=float, default=2.0, help="slow/tail模式的额外延迟(秒)")
+    parser.add_argument("--error-rate", type=float, default=0.5, help="flaky模式返回错误的概率")
+    parser.add_argument("--error-statuses", help="错误状态码分布，如 503:3,429:1")
+    parser.add_argument("--results", type=int, default=5, help="每次返回的结果数")
+    parser.add_argument("--tail-rate", type=float, default=0.05, help="tail模式下慢请求的比例")
+    args = parser.parse_args()
+    web.run_app(
+        create_app(args.latency, parse_faults(args.fault), args.slow_latency, args.error_rate, args.results,
+                   args.tail_rate, args.error_statuses),
+        host=args.host, port=args.port
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import asyncio
+import aiohttp
+from typing import Dict, Optional
+
+try:
+    from aiohttp_socks import ProxyConnector
+except ImportError:  # 未安装aiohttp-socks时SOCKS代理退回到请求级proxy参数
+    ProxyConnector = None
+
+DIRECT = "direct"
+
+
+class ConnectionPool:
+    """
+    按代理划分的长连接池
+
+    每个出口(直连、Tor SOCKS代理、I2P HTTP代理)各持有一个复用连接的
+    connector，避免每次请求都重新建立TCP连接、代理握手和Tor线路。
+    """
+    def __init__(self, limit: int = 100, limit_per_host: int = 10,
+                 keepalive_timeout: float = 30.0, ttl_dns_cache: Optional[int] = 300,
+                 headers: Optional[Dict[str, str]] = None):
+        """
+        参数:
+            limit: 每个connector的最大连接数
+            limit_per_host: 每个目标主机的最大连接数
+            keepalive_timeout: 空闲连接保留时间(秒)
+            ttl_dns_cache: DNS缓存时间(秒)，None表示永久缓存
+            headers: 所有会话的默认请求头
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.headers = headers or {}
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._socks: Dict[str, bool] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _trace_config(self, name: str) -> aiohttp.TraceConfig:
+        """统计新建连接与复用连接次数"""
+        counters = self._counters.setdefault(name, {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0
+        })
+
+        async def on_request_start(session, ctx, params):
+            counters["requests"] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            counters["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            counters["connections_reused"] += 1
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace
+
+    def _create_connector(self, proxy: Optional[str]) -> aiohttp.BaseConnector:
+        options = {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "keepalive_timeout": self.keepalive_timeout,
+            "ttl_dns_cache": self.ttl_dns_cache,
+            "use_dns_cache": True
+        }
+        if proxy and proxy.startswith("socks") and ProxyConnector is not None:
+            # rdns: .onion/.i2p地址必须交给代理解析
+            return ProxyConnector.from_url(proxy, rdns=True, **options)
+        return aiohttp.TCPConnector(**options)
+
+    def session(self, proxy: Optional[str] = None) -> aiohttp.ClientSession:
+        """获取指定代理对应的共享会话(首次调用时创建)"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        name = proxy or DIRECT
+        session = self._sessions.get(name)
+        if session is None or session.closed:
+            connector = self._create_connector(proxy)
+            self._socks[name] = ProxyConnector is not None and isinstance(connector, ProxyConnector)
+            session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                trace_configs=[self._trace_config(name)]
+            )
+            self._sessions[name] = session
+        return session
+
+    def request(self, method: str, url: str, proxy: Optional[str] = None, **kwargs):
+        """
+        通过对应代理的连接池发起请求
+
+        用法:
+            async with pool.request("GET", url, proxy=tor_proxy, timeout=...) as resp:
+                ...
+        """
+        session = self.session(proxy)
+        if proxy and not self._socks.get(proxy or DIRECT):
+            kwargs["proxy"] = proxy
+        return session.request(method, url, **kwargs)
+
+    def get(self, url: str, proxy: Optional[str] = None, **kwargs):
+        """发起GET请求"""
+        return self.request("GET", url, proxy=proxy, **kwargs)
+
+    async def close(self):
+        """关闭所有会话及其连接"""
+        self._closed = True
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Dict]:
+        """各连接池的连接统计"""
+        stats = {}
+        for name, counters in self._counters.items():
+            session = self._sessions.get(name)
+            connector = session.connector if session is not None and not session.closed else None
+            stats[name] = {
+                **counters,
+                "limit": self.limit,
+                "limit_per_host": self.limit_per_host,
+                "open": not (connector is None or connector.closed),
+                "idle_connections": (
+                    sum(len(conns) for conns in connector._conns.values()) if connector else 0
+                ),
+                "active_connections": len(connector._acquired) if connector else 0
+            }
+        return stats
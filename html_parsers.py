@@ -0,0 +1,236 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+except ImportError:  # 未安装lxml或cssselect
+    CSSSelector = None
+
+# 各深网搜索引擎结果页的提取规则
+RESULT_SPECS = {
+    "ahmia": {
+        "item": ".result",
+        "title": ".title",
+        "link": ".link",
+        "snippet": ".description",
+        "source": "Tor (Ahmia)"
+    },
+    "torch": {
+        "item": "dt",
+        "title": "a",
+        "link": "a",
+        "snippet": None,
+        "source": "Tor (Torch)"
+    },
+    "i2p": {
+        "item": ".result",
+        "title": "h3 a",
+        "link": "h3 a",
+        "snippet": None,
+        "source": "I2P"
+    }
+}
+
+# 自动选择时的后端优先级
+BACKEND_PRIORITY = ("selectolax", "lxml", "bs4")
+
+
+def available_backends() -> List[str]:
+    """列出当前环境可用的解析后端"""
+    backends = []
+    if SelectolaxParser is not None:
+        backends.append("selectolax")
+    if CSSSelector is not None:
+        backends.append("lxml")
+    backends.append("bs4")
+    return backends
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """解析后端名称，不可用时退回到可用的最快后端"""
+    available = available_backends()
+    if backend in available:
+        return backend
+    if backend not in (None, "auto"):
+        print(f"HTML解析后端 {backend} 不可用，改用 {available[0]}")
+    return next(name for name in BACKEND_PRIORITY if name in available)
+
+
+def _make_result(spec: Dict, title: str, link: str, snippet: str) -> Dict:
+    return {
+        "title": title.strip(),
+        "link": link.strip(),
+        "snippet": snippet.strip(),
+        "source": spec["source"]
+    }
+
+
+def _extract_bs4(html: str, spec: Dict, limit: int) -> List[Dict]:
+    soup = BeautifulSoup(html, 'html.parser')
+    results = []
+    for item in soup.select(spec["item"]):
+        title = item.select_one(spec["title"])
+        link = item.select_one(spec["link"])
+        if not (title and link):
+            continue
+        desc = item.select_one(spec["snippet"]) if spec["snippet"] else None
+        results.append(_make_result(
+            spec, title.get_text(), link.get('href', ''), desc.get_text() if desc else ""
+        ))
+        if len(results) >= limit:
+            break
+    return results
+
+
+def _extract_selectolax(html: str, spec: Dict, limit: int) -> List[Dict]:
+    tree = SelectolaxParser(html)
+    results = []
+    for item in tree.css(spec["item"]):
+        title = item.css_first(spec["title"])
+        link = item.css_first(spec["link"])
+        if title is None or link is None:
+            continue
+        desc = item.css_first(spec["snippet"]) if spec["snippet"] else None
+        results.append(_make_result(
+            spec,
+            title.text(),
+            link.attributes.get('href') or '',
+            desc.text() if desc is not None else ""
+        ))
+        if len(results) >= limit:
+            break
+    return results
+
+
+@lru_cache(maxsize=None)
+def _compiled_selector(selector: str):
+    """预编译CSS选择器(编译为XPath后缓存复用)"""
+    return CSSSelector(selector)
+
+
+def _extract_lxml(html: str, spec: Dict, limit: int) -> List[Dict]:
+    if not html.strip():
+        return []
+    root = lxml.html.fromstring(html)
+    title_sel = _compiled_selector(spec["title"])
+    link_sel = _compiled_selector(spec["link"])
+    desc_sel = _compiled_selector(spec["snippet"]) if spec["snippet"] else None
+    results = []
+    for item in _compiled_selector(spec["item"])(root):
+        titles = title_sel(item)
+        links = link_sel(item)
+        if not (titles and links):
+            continue
+        descs = desc_sel(item) if desc_sel is not None else []
+        results.append(_make_result(
+            spec,
+            titles[0].text_content(),
+            links[0].get('href', ''),
+            descs[0].text_content() if descs else ""
+        ))
+        if len(results) >= limit:
+            break
+    return results
+
+
+_EXTRACTORS = {
+    "selectolax": _extract_selectolax,
+    "lxml": _extract_lxml,
+    "bs4": _extract_bs4
+}
+
+
+def extract_results(html: str, engine: str, backend: Optional[str] = None, limit: int = 5) -> List[Dict]:
+    """
+    从搜索结果页提取标准化结果(同步、CPU密集)
+
+    参数:
+        html: 结果页HTML
+        engine: ahmia/torch/i2p
+        backend: selectolax/lxml/bs4/auto
+        limit: 最多提取的结果数
+    """
+    spec = RESULT_SPECS[engine]
+    backend = resolve_backend(backend)
+    try:
+        return _EXTRACTORS[backend](html, spec, limit)
+    except Exception as e:
+        if backend == "bs4":
+            raise
+        print(f"{backend}解析出错，改用bs4: {str(e)}")
+        return _extract_bs4(html, spec, limit)
+
+
+class ResultPageParser:
+    """在线程池/进程池中解析结果页，避免阻塞事件循环"""
+    def __init__(self, backend: str = "auto", executor: str = "thread", max_workers: int = 2):
+        """
+        参数:
+            backend: 解析后端 selectolax/lxml/bs4/auto
+            executor: thread(线程池)/process(进程池)/inline(直接在事件循环中解析)
+            max_workers: 线程池/进程池大小
+        """
+        self.backend = resolve_backend(backend)
+        self.executor_type = executor
+        self.max_workers = max_workers
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.executor_type == "inline":
+            return None
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="html-parser"
+                )
+        return self._executor
+
+    async def parse(self, html: str, engine: str, limit: int = 5) -> List[Dict]:
+        """异步解析结果页"""
+        executor = self._get_executor()
+        if executor is None:
+            return extract_results(html, engine, self.backend, limit)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, extract_results, html, engine, self.backend, limit
+        )
+
+    def close(self):
+        """关闭线程池/进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def create_result_parser(parser_config: Optional[Dict] = None) -> ResultPageParser:
+    """
+    根据配置创建结果页解析器
+
+    参数:
+        parser_config: {
+            "backend": "auto",     # selectolax/lxml/bs4/auto
+            "executor": "thread",  # thread/process/inline
+            "max_workers": 2
+        }
+    """
+    parser_config = parser_config or {}
+    return ResultPageParser(
+        backend=parser_config.get("backend", "auto"),
+        executor=parser_config.get("executor", "thread"),
+        max_workers=parser_config.get("max_workers", 2)
+    )
@@ -0,0 +1,62 @@
+import json
+from typing import Any
+
+from quart.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时使用标准库json
+    orjson = None
+
+# 允许非字符串键(与标准库行为一致)
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def backend() -> str:
+    """当前使用的JSON序列化后端"""
+    return "orjson" if orjson is not None else "json"
+
+
+def dumps(obj: Any) -> bytes:
+    """序列化为紧凑的UTF-8 JSON(不转义中文、不排序键)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=DefaultJSONProvider.default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # orjson不支持的值(如超过64位的整数)退回标准库
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"),
+                      default=DefaultJSONProvider.default).encode()
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Quart的JSON提供者: jsonify直接输出orjson生成的UTF-8字节
+
+    默认提供者按键排序并把中文转义为\\uXXXX，中文结果的响应体因此大一倍以上。
+    调试模式或传入了indent等参数时仍使用标准库。
+    """
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if not kwargs:
+            return dumps(obj).decode()
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if not kwargs:
+            return loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj) + b"\n", mimetype=self.mimetype)
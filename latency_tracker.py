@@ -0,0 +1,86 @@
+import time
+import bisect
+from typing import Dict, List, Optional
+
+# 直方图桶上界(秒): 10ms起按1.25倍递增到约180s
+DEFAULT_BOUNDS = tuple(round(0.01 * 1.25 ** i, 4) for i in range(45))
+
+
+class LatencyHistogram:
+    """
+    滑动窗口延迟直方图
+
+    窗口分为若干时间片，每片一个分桶计数数组，过期的时间片整体清零，
+    记录和求分位数都只与桶数有关，不保存原始样本。
+    """
+    __slots__ = ("bounds", "slice_seconds", "_slices", "_slice_ids", "total")
+
+    def __init__(self, window: float = 300, slices: int = 10, bounds: tuple = DEFAULT_BOUNDS):
+        """
+        参数:
+            window: 统计窗口(秒)
+            slices: 窗口划分的时间片数
+            bounds: 桶上界(秒)，超过最后一个上界的样本计入溢出桶
+        """
+        self.bounds = bounds
+        self.slice_seconds = window / slices
+        self._slices: List[List[int]] = [[0] * (len(bounds) + 1) for _ in range(slices)]
+        self._slice_ids: List[int] = [-1] * slices
+        self.total = 0  # 累计样本数(不随窗口滑动减少)
+
+    def _current(self, now: float) -> List[int]:
+        slice_id = int(now / self.slice_seconds)
+        index = slice_id % len(self._slices)
+        if self._slice_ids[index] != slice_id:
+            counts = self._slices[index]
+            for i in range(len(counts)):
+                counts[i] = 0
+            self._slice_ids[index] = slice_id
+        return self._slices[index]
+
+    def record(self, seconds: float, now: Optional[float] = None):
+        """记录一次延迟"""
+        counts = self._current(time.monotonic() if now is None else now)
+        counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.total += 1
+
+    def _window_counts(self, now: float) -> List[int]:
+        oldest = int(now / self.slice_seconds) - len(self._slices) + 1
+        merged = [0] * (len(self.bounds) + 1)
+        for slice_id, counts in zip(self._slice_ids, self._slices):
+            if slice_id >= oldest:
+                for i, count in enumerate(counts):
+                    merged[i] += count
+        return merged
+
+    def count(self, now: Optional[float] = None) -> int:
+        """窗口内的样本数"""
+        return sum(self._window_counts(time.monotonic() if now is None else now))
+
+    def percentile(self, q: float, now: Optional[float] = None) -> Optional[float]:
+        """
+        窗口内延迟的q分位数(0 < q <= 1)，返回所在桶的上界，无样本时返回None
+
+        落在溢出桶的分位数返回最后一个上界。
+        """
+        merged = self._window_counts(time.monotonic() if now is None else now)
+        total = sum(merged)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(merged):
+            seen += count
+            if seen >= rank:
+                return self.bounds[min(i, len(self.bounds) - 1)]
+        return self.bounds[-1]
+
+    def snapshot(self, now: Optional[float] = None) -> Dict:
+        """窗口内的样本数与常用分位数"""
+        now = time.monotonic() if now is None else now
+        return {
+            "samples": self.count(now),
+            "p50": self.percentile(0.5, now),
+            "p95": self.percentile(0.95, now),
+            "p99": self.percentile(0.99, now)
+        }
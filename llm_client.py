@@ -0,0 +1,367 @@
+import json
+import time
+import asyncio
+import random
+import hashlib
+import threading
+import aiohttp
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from search_cache import LRUCache, SQLiteCache
+from metrics import REGISTRY
+
+# 触发重试的HTTP状态码
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+LLM_LATENCY = REGISTRY.histogram(
+    "agent_llm_request_duration_seconds", "语言模型请求耗时(含重试，不含缓存命中)",
+    ("model", "mode", "outcome")
+)
+LLM_TOKENS = REGISTRY.counter(
+    "agent_llm_tokens_total", "语言模型接口返回的token用量", ("model", "type")
+)
+
+
+class LLMError(Exception):
+    """语言模型调用失败"""
+
+
+def create_response_cache(cache_config: Optional[Dict] = None):
+    """
+    根据配置创建LLM响应缓存
+
+    参数:
+        cache_config: {
+            "enable": True,
+            "backend": "memory",  # memory/sqlite
+            "path": "data/llm_cache.db",
+            "max_entries": 2048,
+            "max_bytes": 33554432,
+            "ttl": 86400  # 过期时间(秒)，None表示永不过期
+        }
+    """
+    cache_config = cache_config or {}
+    if not cache_config.get("enable", True):
+        return None
+    if cache_config.get("backend") == "sqlite":
+        return SQLiteCache(
+            cache_config.get("path", "data/llm_cache.db"),
+            max_entries=cache_config.get("max_entries", 100000),
+            max_bytes=cache_config.get("max_bytes", 256 * 1024 * 1024),
+            default_ttl=cache_config.get("ttl", 24 * 60 * 60)
+        )
+    return LRUCache(
+        max_entries=cache_config.get("max_entries", 2048),
+        max_bytes=cache_config.get("max_bytes", 32 * 1024 * 1024),
+        default_ttl=cache_config.get("ttl", 24 * 60 * 60)
+    )
+
+
+class LLMClient:
+    """
+    OpenAI兼容接口的异步LLM客户端
+
+    客户端在独立的后台事件循环线程中持有长连接池，因此既可以在任意事件循环中
+    await调用，也可以通过同步包装在普通函数中调用，连接在多次请求之间复用。
+    """
+    def __init__(self, api_key: str, base_url: str = "https://api.openai.com/v1",
+                 model: str = "gpt-3.5-turbo", max_concurrency: int = 8,
+                 timeout: float = 60.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 pool_limit: int = 32, cache_config: Optional[Dict] = None):
+        """
+        参数:
+            api_key: API密钥
+            base_url: OpenAI兼容接口地址(可指向本地替身服务)
+            model: 默认模型
+            max_concurrency: 同时进行的请求数上限
+            timeout: 单次请求超时(秒)
+            max_retries: 失败后的最大重试次数
+            backoff_base: 退避基数(秒)，第n次重试等待 [0, base * 2^n] 内的随机时间
+            backoff_max: 单次退避的最长等待(秒)
+            pool_limit: 连接池大小
+            cache_config: 响应缓存配置(见create_response_cache)，{"enable": False}关闭缓存
+        """
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_limit = pool_limit
+        self.cache = create_response_cache(cache_config)
+        self._cache_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """启动(或复用)后台事件循环线程"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed() or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-client", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+                self._session = None
+            return self._loop
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取后台循环中的共享会话(仅在后台循环内调用)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_limit, keepalive_timeout=60),
+                headers={"Authorization": f"Bearer {self.api_key}"}
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """计算重试等待时间(带抖动的指数退避，优先遵循Retry-After)"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _payload(self, messages: List[Dict], **kwargs) -> Dict:
+        return {"model": kwargs.pop("model", self.model), "messages": messages, **kwargs}
+
+    @staticmethod
+    def _cache_key(payload: Dict) -> str:
+        """按模型、消息和生成参数生成缓存键"""
+        canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[Dict]:
+        with self._cache_lock:
+            return self.cache.get(key)
+
+    def _cache_set(self, key: str, response: Dict):
+        with self._cache_lock:
+            self.cache.set(key, response)
+
+    async def _cached_request(self, payload: Dict, key: Optional[str]) -> Dict:
+        """发送请求并在成功后写入缓存"""
+        response = await self._request(payload)
+        if key is not None:
+            self._cache_set(key, response)
+        return response
+
+    def _lookup(self, messages: List[Dict], use_cache: bool, kwargs: Dict[str, Any]):
+        """构造请求体并查询缓存，返回(请求体, 缓存键, 缓存命中的响应)"""
+        payload = self._payload(messages, **kwargs)
+        if not use_cache or self.cache is None:
+            return payload, None, None
+        key = self._cache_key(payload)
+        return payload, key, self._cache_get(key)
+
+    async def _request(self, payload: Dict) -> Dict:
+        """发送请求并记录耗时和token用量"""
+        started = time.monotonic()
+        outcome = "error"
+        try:
+            response = await self._send(payload)
+            outcome = "ok"
+        finally:
+            LLM_LATENCY.observe(time.monotonic() - started, payload["model"], "chat", outcome)
+        usage = response.get("usage") or {}
+        for field, kind in (("prompt_tokens", "prompt"), ("completion_tokens", "completion")):
+            if usage.get(field):
+                LLM_TOKENS.inc(payload["model"], kind, amount=usage[field])
+        return response
+
+    async def _send(self, payload: Dict) -> Dict:
+        """在后台循环中发送请求，按需重试"""
+        session = self._get_session()
+        url = f"{self.base_url}/chat/completions"
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        self.requests += 1
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                retry_after = None
+                try:
+                    async with session.post(url, json=payload, timeout=timeout) as resp:
+                        if resp.status == 200:
+                            return await resp.json()
+                        error = f"HTTP {resp.status}: {(await resp.text())[:200]}"
+                        if resp.status not in RETRY_STATUSES:
+                            self.failures += 1
+                            raise LLMError(error)
+                        retry_after = resp.headers.get("Retry-After")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = f"{type(e).__name__}: {str(e)}"
+
+                if attempt == self.max_retries:
+                    self.failures += 1
+                    raise LLMError(error)
+                self.retries += 1
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    async def chat(self, messages: List[Dict], use_cache: bool = True, **kwargs) -> Dict:
+        """异步调用聊天接口，返回原始响应(use_cache=False跳过响应缓存)"""
+        payload, key, cached = self._lookup(messages, use_cache, kwargs)
+        if cached is not None:
+            return cached
+        future = asyncio.run_coroutine_threadsafe(
+            self._cached_request(payload, key), self._ensure_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+    async def complete(self, prompt: str, use_cache: bool = True, **kwargs) -> str:
+        """异步调用，返回回复文本"""
+        response = await self.chat([{"role": "user", "content": prompt}], use_cache=use_cache, **kwargs)
+        return response["choices"][0]["message"]["content"]
+
+    def complete_sync(self, prompt: str, use_cache: bool = True, **kwargs) -> str:
+        """同步调用(供plan_tasks、reflect等同步方法使用)"""
+        payload, key, response = self._lookup(
+            [{"role": "user", "content": prompt}], use_cache, kwargs
+        )
+        if response is None:
+            future = asyncio.run_coroutine_threadsafe(
+                self._cached_request(payload, key), self._ensure_loop()
+            )
+            response = future.result()
+        return response["choices"][0]["message"]["content"]
+
+    async def _stream_request(self, payload: Dict, emit: Callable[[str, Any], None]):
+        """发送流式请求并记录耗时(到最后一个片段)"""
+        started = time.monotonic()
+        outcome = ["error"]
+
+        def tracked_emit(kind: str, value: Any):
+            if kind == "done":
+                outcome[0] = "ok"
+            emit(kind, value)
+
+        try:
+            await self._send_stream(payload, tracked_emit)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 其他异常(如响应中的无效JSON)也要通知调用方，否则stream()会一直等待队列
+            self.failures += 1
+            emit("error", f"{type(e).__name__}: {str(e)}")
+        finally:
+            LLM_LATENCY.observe(time.monotonic() - started, payload["model"], "stream", outcome[0])
+
+    async def _send_stream(self, payload: Dict, emit: Callable[[str, Any], None]):
+        """
+        在后台循环中发送流式请求，逐个产出增量文本
+
+        emit(kind, value) 把事件送回调用方的事件循环:
+            ("token", 文本片段) / ("done", 完整响应) / ("error", 错误信息)
+        尚未收到任何片段时失败会按退避策略重试。
+        """
+        session = self._get_session()
+        url = f"{self.base_url}/chat/completions"
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        payload = {**payload, "stream": True}
+
+        self.requests += 1
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                retry_after = None
+                parts = []
+                try:
+                    async with session.post(url, json=payload, timeout=timeout) as resp:
+                        if resp.status == 200:
+                            async for line in resp.content:
+                                line = line.strip()
+                                if not line.startswith(b"data:"):
+                                    continue
+                                data = line[5:].strip()
+                                if data == b"[DONE]":
+                                    break
+                                choices = json.loads(data).get("choices")
+                                if not choices:
+                                    # Azure等会发送choices为空的片段(如内容过滤结果)
+                                    continue
+                                delta = choices[0].get("delta") or {}
+                                if delta.get("content"):
+                                    parts.append(delta["content"])
+                                    emit("token", delta["content"])
+                            emit("done", {"choices": [{"message": {
+                                "role": "assistant", "content": "".join(parts)
+                            }}]})
+                            return
+                        error = f"HTTP {resp.status}: {(await resp.text())[:200]}"
+                        retryable = resp.status in RETRY_STATUSES
+                        retry_after = resp.headers.get("Retry-After")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = f"{type(e).__name__}: {str(e)}"
+                    retryable = True
+
+                # 已经输出部分内容后不能重试，否则客户端会收到重复文本
+                if not retryable or parts or attempt == self.max_retries:
+                    self.failures += 1
+                    emit("error", error)
+                    return
+                self.retries += 1
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    async def stream(self, messages: List[Dict], use_cache: bool = True, **kwargs) -> AsyncIterator[str]:
+        """流式调用聊天接口，逐个产出增量文本(缓存命中时一次性产出)"""
+        payload, key, cached = self._lookup(messages, use_cache, kwargs)
+        if cached is not None:
+            yield cached["choices"][0]["message"]["content"]
+            return
+
+        caller_loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def emit(kind: str, value: Any):
+            caller_loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._stream_request(payload, emit), self._ensure_loop()
+        )
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == "token":
+                    yield value
+                elif kind == "error":
+                    raise LLMError(value)
+                else:
+                    if key is not None:
+                        self._cache_set(key, value)
+                    return
+        finally:
+            # 调用方提前退出(如浏览器断开)时停止上游请求
+            future.cancel()
+
+    def stats(self) -> Dict:
+        """调用统计"""
+        return {
+            "model": self.model,
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "max_concurrency": self.max_concurrency,
+            "cache": self.cache.stats() if self.cache is not None else {"enabled": False}
+        }
+
+    def close(self):
+        """关闭连接池并停止后台事件循环"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or loop.is_closed():
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result()
+            self._session = None
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
@@ -0,0 +1,239 @@
+import re
+import json
+import math
+import heapq
+import hashlib
+import bisect
+from array import array
+from sys import intern
+import unicodedata
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# 英文/数字按单词切分，连续的中日韩字符按单字+双字切分
+_TOKEN_RE = re.compile(r"[0-9a-z_]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+
+# 建索引时忽略的元数据字段
+SKIP_FIELDS = {"id", "timestamp", "created", "type", "used_deepweb"}
+
+
+def tokenize(text: str, for_query: bool = False) -> List[str]:
+    """
+    切分词项(NFKC规范化并忽略大小写)
+
+    for_query=True时多字的中日韩词只取双字，单字几乎出现在每条记录中，
+    区分度低却要遍历最长的倒排表。
+    """
+    tokens = []
+    for word in _TOKEN_RE.findall(unicodedata.normalize("NFKC", text).casefold()):
+        if word[0].isascii() or len(word) == 1:
+            tokens.append(word)
+            continue
+        if not for_query:
+            tokens.extend(word)
+        tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def entry_text(entry: Any) -> str:
+    """提取记忆条目中参与检索的文本(跳过时间戳等元数据)"""
+    parts = []
+
+    def collect(value: Any):
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if key not in SKIP_FIELDS:
+                    collect(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                collect(item)
+
+    collect(entry)
+    return "\n".join(parts)
+
+
+def entry_key(entry: Any) -> bytes:
+    """条目规范化JSON的摘要，作为索引中的文档键(持久化存储取回的副本也能对应上)"""
+    canonical = json.dumps(entry, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).digest()
+
+
+class BM25Index:
+    """
+    增量维护的BM25倒排索引
+
+    add/remove只更新受影响词项的倒排表，不需要重建整个索引；
+    查询只遍历查询词的倒排表，用堆取前k个。倒排表是按文档ID递增的
+    紧凑数组(文档ID, 词频)，删除时只做标记，某个倒排表中已删除的
+    文档过半时才压缩，淘汰最旧条目不需要移动整个数组。
+    """
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        参数:
+            k1: 词频饱和参数
+            b: 文档长度归一化参数
+        """
+        self.k1 = k1
+        self.b = b
+        # 词项 -> [文档ID数组, 词频数组, 已删除文档数]
+        self._postings: Dict[str, list] = {}
+        # 文档ID -> (键, 负载, 词项)，保存词项以便删除时只更新相关倒排表
+        self._docs: Dict[int, Tuple[Hashable, Any, Tuple[str, ...]]] = {}
+        # 存活文档的长度，同时用来判断倒排表中的文档是否已删除
+        self._lengths: Dict[int, int] = {}
+        self._doc_ids: Dict[Hashable, int] = {}
+        self._refs: Dict[int, int] = {}
+        self._next_id = 0
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._doc_ids
+
+    def add(self, key: Hashable, text: str, payload: Any = None):
+        """添加文档，相同键重复添加时只增加引用计数"""
+        doc_id = self._doc_ids.get(key)
+        if doc_id is not None:
+            self._refs[doc_id] += 1
+            return
+        doc_id = self._next_id
+        self._next_id += 1
+        tokens = tokenize(text)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        postings = self._postings
+        terms = []
+        for token, tf in counts.items():
+            # 各文档的词项元组共享同一个字符串对象
+            token = intern(token)
+            entry = postings.get(token)
+            if entry is None:
+                entry = postings[token] = [array("q"), array("l"), 0]
+            entry[0].append(doc_id)
+            entry[1].append(tf)
+            terms.append(token)
+        self._docs[doc_id] = (key, payload, tuple(terms))
+        self._lengths[doc_id] = len(tokens)
+        self._doc_ids[key] = doc_id
+        self._refs[doc_id] = 1
+        self._total_length += len(tokens)
+
+    def remove(self, key: Hashable) -> bool:
+        """移除文档(引用计数归零时才真正删除)，返回文档是否存在"""
+        doc_id = self._doc_ids.get(key)
+        if doc_id is None:
+            return False
+        self._refs[doc_id] -= 1
+        if self._refs[doc_id] > 0:
+            return True
+        del self._refs[doc_id]
+        del self._doc_ids[key]
+        _, _, terms = self._docs.pop(doc_id)
+        self._total_length -= self._lengths.pop(doc_id)
+        for token in terms:
+            entry = self._postings[token]
+            entry[2] += 1
+            if entry[2] * 2 >= len(entry[0]):
+                self._compact(token, entry)
+        return True
+
+    def _compact(self, token: str, entry: list):
+        """清除倒排表中已删除的文档"""
+        lengths = self._lengths
+        live = [(doc_id, tf) for doc_id, tf in zip(entry[0], entry[1]) if doc_id in lengths]
+        if not live:
+            del self._postings[token]
+            return
+        entry[0] = array("q", (doc_id for doc_id, _ in live))
+        entry[1] = array("l", (tf for _, tf in live))
+        entry[2] = 0
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[float, Hashable, Any]]:
+        """返回与查询最相关的前k个文档 [(分数, 键, 负载)]"""
+        if not self._docs or k <= 0:
+            return []
+        n = len(self._docs)
+        avg_length = self._total_length / n or 1.0
+        k1, b = self.k1, self.b
+        # tf + k1 * (1 - b + b * len / avg) 拆成常数项和长度项，避免循环内重复计算
+        base, per_length = k1 * (1 - b), k1 * b / avg_length
+        lengths = self._lengths
+
+        # 按区分度从高到低处理词项; weight是该词项对单个文档得分的上界
+        terms = []
+        for token in set(tokenize(query, for_query=True)):
+            entry = self._postings.get(token)
+            if entry is not None:
+                df = len(entry[0]) - entry[2]
+                terms.append((math.log(1 + (n - df + 0.5) / (df + 0.5)) * (k1 + 1), entry[0], entry[1]))
+        terms.sort(key=lambda term: term[0], reverse=True)
+        remaining = sum(term[0] for term in terms)
+
+        scores: Dict[int, float] = {}
+        get = scores.get
+        for weight, doc_ids, tfs in terms:
+            # MaxScore剪枝: 剩余词项的上界之和不超过当前第k名时，未出现过的文档
+            # 不可能进入前k，只需给已有候选补分
+            if len(scores) >= k and heapq.nlargest(k, scores.values())[-1] >= remaining:
+                if len(scores) < len(doc_ids):
+                    for doc_id in scores:
+                        position = bisect.bisect_left(doc_ids, doc_id)
+                        if position < len(doc_ids) and doc_ids[position] == doc_id:
+                            tf = tfs[position]
+                            scores[doc_id] += weight * tf / (tf + base + per_length * lengths[doc_id])
+                else:
+                    for doc_id, tf in zip(doc_ids, tfs):
+                        if doc_id in scores:
+                            scores[doc_id] += weight * tf / (tf + base + per_length * lengths[doc_id])
+            else:
+                for doc_id, tf in zip(doc_ids, tfs):
+                    length = lengths.get(doc_id)
+                    if length is not None:
+                        scores[doc_id] = get(doc_id, 0.0) + weight * tf / (tf + base + per_length * length)
+            remaining -= weight
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(score, self._docs[doc_id][0], self._docs[doc_id][1]) for doc_id, score in top]
+
+    def clear(self):
+        """清空索引"""
+        self._postings.clear()
+        self._docs.clear()
+        self._lengths.clear()
+        self._doc_ids.clear()
+        self._refs.clear()
+        self._total_length = 0
+
+    def stats(self) -> Dict:
+        """索引统计"""
+        return {
+            "documents": len(self._docs),
+            "terms": len(self._postings),
+            "avg_length": round(self._total_length / len(self._docs), 1) if self._docs else 0
+        }
+
+
+class MemoryIndex(BM25Index):
+    """记忆条目索引: 以条目本身为负载，配合存储的追加和淘汰回调增量更新"""
+    def add_entry(self, entry: Any):
+        """索引新追加的条目"""
+        self.add(entry_key(entry), entry_text(entry), entry)
+
+    def remove_entry(self, entry: Any):
+        """移除被淘汰的条目(可直接作为存储的on_evict回调)"""
+        self.remove(entry_key(entry))
+
+    def rebuild(self, entries: Iterable[Any]):
+        """从已有条目(如持久化存储)重建索引"""
+        self.clear()
+        for entry in entries:
+            self.add_entry(entry)
+
+    def top_k(self, query: str, k: int = 3, exclude: Optional[Iterable[Any]] = None) -> List[Tuple[float, Any]]:
+        """检索最相关的k个条目 [(分数, 条目)]，exclude中的条目不返回"""
+        excluded = {entry_key(entry) for entry in exclude or ()}
+        hits = self.search(query, k + len(excluded))
+        return [(score, entry) for score, key, entry in hits if key not in excluded][:k]
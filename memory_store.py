@@ -0,0 +1,469 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+def _entry_timestamp(entry: Dict) -> str:
+    """条目的时间戳(目标使用created字段)"""
+    return entry.get("timestamp") or entry.get("created") or ""
+
+
+def _matches(entry: Dict, entry_type: Optional[str], after: Optional[str],
+             before: Optional[str], contains: Optional[str]) -> bool:
+    """判断条目是否满足查询条件"""
+    if entry_type is not None and entry.get("type") != entry_type:
+        return False
+    timestamp = _entry_timestamp(entry)
+    if after is not None and timestamp <= after:
+        return False
+    if before is not None and timestamp >= before:
+        return False
+    if contains is not None:
+        # 与SQLite的LIKE一致，忽略大小写
+        text = json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+        if contains.lower() not in text.lower():
+            return False
+    return True
+
+
+class RingBuffer:
+    """
+    固定容量的环形缓冲区
+
+    预先分配容量大小的槽位，追加和淘汰都是O(1)，不会像列表切片那样
+    在达到上限后每次追加都复制整个列表。按从旧到新的顺序迭代。
+
+    条目ID即追加序号，从进程启动时的微秒时间戳开始，重启后ID和版本号仍然递增，
+    客户端持有的旧版本号不会与新进程的条目混淆。
+    """
+    __slots__ = ("capacity", "on_evict", "_items", "_start", "_size", "_seq")
+
+    def __init__(self, capacity: int, on_evict: Optional[Callable[[Any], None]] = None):
+        """
+        参数:
+            capacity: 最大条目数
+            on_evict: 条目被淘汰时的回调
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.on_evict = on_evict
+        self._items: List[Any] = [None] * capacity
+        self._start = 0
+        self._size = 0
+        # 最后分配的ID，用作条目的递增ID(分页游标)和存储的版本号
+        self._seq = int(time.time() * 1_000_000)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    @property
+    def version(self) -> int:
+        """存储的版本号，每次追加或清空后递增"""
+        return self._seq
+
+    def __iter__(self) -> Iterator[Any]:
+        items, start, capacity = self._items, self._start, self.capacity
+        for i in range(self._size):
+            yield items[(start + i) % capacity]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("ring buffer index out of range")
+        return self._items[(self._start + index) % self.capacity]
+
+    def append(self, item: Any) -> Optional[Any]:
+        """追加条目，已满时淘汰最旧的条目并返回它"""
+        evicted = None
+        self._seq += 1
+        if self._size < self.capacity:
+            self._items[(self._start + self._size) % self.capacity] = item
+            self._size += 1
+        else:
+            evicted = self._items[self._start]
+            self._items[self._start] = item
+            self._start = (self._start + 1) % self.capacity
+            if self.on_evict is not None:
+                self.on_evict(evicted)
+        return evicted
+
+    def last(self, n: int) -> List[Any]:
+        """最近n条(从旧到新)，只复制这n条"""
+        n = max(0, min(n, self._size))
+        begin = (self._start + self._size - n) % self.capacity
+        end = begin + n
+        if end <= self.capacity:
+            return self._items[begin:end]
+        # 跨越数组末尾时拼接两段
+        return self._items[begin:] + self._items[:end - self.capacity]
+
+    def to_list(self) -> List[Any]:
+        """全部条目(从旧到新)"""
+        return self.last(self._size)
+
+    def query(self, entry_type: Optional[str] = None, after: Optional[str] = None,
+              before: Optional[str] = None, contains: Optional[str] = None,
+              cursor: Optional[int] = None, limit: int = 20,
+              order: str = "desc") -> Tuple[List[Dict], Optional[int]]:
+        """
+        按条件查询条目，使用ID游标分页
+
+        参数:
+            entry_type: 条目类型(note/reminder/...)
+            after/before: 时间戳范围(不含端点)
+            contains: 条目内容包含的文本
+            cursor: 上一页返回的游标，desc时返回ID更小的条目，asc时返回ID更大的条目
+            limit: 每页条数
+            order: desc(新到旧)/asc(旧到新)
+
+        返回:
+            (带id字段的条目列表, 下一页游标或None)
+        """
+        first_id = self._seq - self._size + 1
+        if order == "asc":
+            begin = 0 if cursor is None else max(0, cursor - first_id + 1)
+            indices = range(begin, self._size)
+        else:
+            end = self._size if cursor is None else min(self._size, cursor - first_id)
+            indices = range(end - 1, -1, -1)
+
+        page = []
+        for index in indices:
+            entry = self[index]
+            if not _matches(entry, entry_type, after, before, contains):
+                continue
+            page.append({"id": first_id + index, **entry})
+            if len(page) > limit:
+                break
+        next_cursor = page[limit - 1]["id"] if len(page) > limit else None
+        return page[:limit], next_cursor
+
+    def changes(self, since: int, window: Optional[int] = None) -> Optional[Dict]:
+        """
+        since版本之后最近window条(None为全部条目)的变化，用于客户端增量同步
+
+        返回:
+            {
+                "version": 当前版本,
+                "added": [since之后追加且仍在范围内的条目(带id)],
+                "removed_before": 客户端应删除ID小于它的条目(已淘汰、清空或移出范围)
+            }
+            since比当前版本还新时返回None，调用方应返回完整快照
+        """
+        version = self._seq
+        if since > version:
+            return None
+        size = self._size if window is None else max(0, min(window, self._size))
+        first_id = version - size + 1
+        base = version - self._size + 1
+        added = [{"id": entry_id, **self[entry_id - base]}
+                 for entry_id in range(max(since + 1, first_id), version + 1)]
+        return {"version": version, "added": added, "removed_before": first_id}
+
+    def clear(self):
+        """清空缓冲区(不触发淘汰回调)，版本号递增"""
+        self._items = [None] * self.capacity
+        self._start = 0
+        self._size = 0
+        self._seq += 1
+
+
+class SQLiteMemoryStore:
+    """
+    基于SQLite(WAL模式)的持久化记忆存储
+
+    接口与RingBuffer一致(append/last/to_list/clear/query/changes)，多个存储可共用
+    同一个数据库文件，按名称区分。重启后保留，gunicorn的多个worker看到的是
+    同一份数据。条目类型和时间戳上建有索引，query使用ID做键集分页。
+    各存储的版本号记录在store_versions表中，多个worker看到同一个版本号。
+    """
+    def __init__(self, path: str, name: str, capacity: int,
+                 on_evict: Optional[Callable[[Any], None]] = None,
+                 busy_timeout: float = 5.0):
+        """
+        参数:
+            path: 数据库文件路径
+            name: 存储名称(memory/goals/learning)
+            capacity: 最大条目数，超出时淘汰最旧条目
+            on_evict: 条目被淘汰时的回调
+            busy_timeout: 等待其他进程释放写锁的时间(秒)
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.path = path
+        self.name = name
+        self.capacity = capacity
+        self.on_evict = on_evict
+        self.busy_timeout = busy_timeout
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取当前进程的数据库连接(fork后自动重连)"""
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    store TEXT NOT NULL,
+                    type TEXT,
+                    timestamp TEXT NOT NULL,
+                    data TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_store ON entries(store, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_type ON entries(store, type, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries(store, timestamp)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS store_versions (
+                    store TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                )
+            """)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def _encode(entry: Any) -> str:
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM entries WHERE store = ?", (self.name,)
+            ).fetchone()[0]
+
+    def __bool__(self) -> bool:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT 1 FROM entries WHERE store = ? LIMIT 1", (self.name,)
+            ).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.to_list())
+
+    def _version(self, conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT version FROM store_versions WHERE store = ?", (self.name,)).fetchone()
+        if row:
+            return row[0]
+        # 加入版本号之前创建的数据库没有这一行，以最后一条条目的ID为版本号，
+        # 否则since=0会把已有条目当作新增再返回一遍
+        row = conn.execute("SELECT MAX(id) FROM entries WHERE store = ?", (self.name,)).fetchone()
+        return row[0] or 0
+
+    def _set_version(self, conn: sqlite3.Connection, version: int):
+        conn.execute("INSERT OR REPLACE INTO store_versions (store, version) VALUES (?, ?)",
+                     (self.name, version))
+
+    @property
+    def version(self) -> int:
+        """存储的版本号(最后追加的条目ID，清空时推进自增序列)，每次追加或清空后递增"""
+        with self._lock:
+            return self._version(self._connection())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_list()[index]
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("memory store index out of range")
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT data FROM entries WHERE store = ? ORDER BY id LIMIT 1 OFFSET ?",
+                (self.name, index)
+            ).fetchone()
+        return json.loads(row[0])
+
+    def append(self, item: Any) -> Optional[Any]:
+        """追加条目，超出容量时淘汰最旧的条目并返回其中第一条"""
+        entry_type = item.get("type") if isinstance(item, dict) else None
+        timestamp = _entry_timestamp(item) if isinstance(item, dict) else ""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = conn.execute(
+                    "INSERT INTO entries (store, type, timestamp, data) VALUES (?, ?, ?, ?)",
+                    (self.name, entry_type, timestamp, self._encode(item))
+                )
+                self._set_version(conn, cursor.lastrowid)
+                evicted = self._evict(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if self.on_evict is not None:
+            for entry in evicted:
+                self.on_evict(entry)
+        return evicted[0] if evicted else None
+
+    def _evict(self, conn: sqlite3.Connection) -> List[Any]:
+        """删除超出容量的最旧条目(需在事务内调用)"""
+        row = conn.execute(
+            "SELECT id FROM entries WHERE store = ? ORDER BY id DESC LIMIT 1 OFFSET ?",
+            (self.name, self.capacity)
+        ).fetchone()
+        if row is None:
+            return []
+        evicted = [
+            json.loads(data) for (data,) in conn.execute(
+                "SELECT data FROM entries WHERE store = ? AND id <= ? ORDER BY id",
+                (self.name, row[0])
+            )
+        ]
+        conn.execute("DELETE FROM entries WHERE store = ? AND id <= ?", (self.name, row[0]))
+        return evicted
+
+    def last(self, n: int) -> List[Any]:
+        """最近n条(从旧到新)"""
+        if n <= 0:
+            return []
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT data FROM entries WHERE store = ? ORDER BY id DESC LIMIT ?",
+                (self.name, n)
+            ).fetchall()
+        return [json.loads(data) for (data,) in reversed(rows)]
+
+    def to_list(self) -> List[Any]:
+        """全部条目(从旧到新)"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT data FROM entries WHERE store = ? ORDER BY id", (self.name,)
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def query(self, entry_type: Optional[str] = None, after: Optional[str] = None,
+              before: Optional[str] = None, contains: Optional[str] = None,
+              cursor: Optional[int] = None, limit: int = 20,
+              order: str = "desc") -> Tuple[List[Dict], Optional[int]]:
+        """按条件查询条目，参数和返回值同RingBuffer.query"""
+        clauses, params = ["store = ?"], [self.name]
+        if entry_type is not None:
+            clauses.append("type = ?")
+            params.append(entry_type)
+        if after is not None:
+            clauses.append("timestamp > ?")
+            params.append(after)
+        if before is not None:
+            clauses.append("timestamp < ?")
+            params.append(before)
+        if contains is not None:
+            escaped = contains.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            clauses.append("data LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        if cursor is not None:
+            clauses.append("id > ?" if order == "asc" else "id < ?")
+            params.append(cursor)
+        direction = "ASC" if order == "asc" else "DESC"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT id, data FROM entries WHERE {' AND '.join(clauses)} "
+                f"ORDER BY id {direction} LIMIT ?",
+                params
+            ).fetchall()
+        page = [{"id": entry_id, **json.loads(data)} for entry_id, data in rows[:limit]]
+        next_cursor = page[-1]["id"] if len(rows) > limit else None
+        return page, next_cursor
+
+    def changes(self, since: int, window: Optional[int] = None) -> Optional[Dict]:
+        """since版本之后最近window条的变化，参数和返回值同RingBuffer.changes"""
+        with self._lock:
+            conn = self._connection()
+            # 在同一个读事务中取版本号和条目，避免其他worker在中间写入
+            conn.execute("BEGIN")
+            try:
+                version = self._version(conn)
+                if since > version:
+                    return None
+                if window is None:
+                    row = conn.execute("SELECT MIN(id) FROM entries WHERE store = ?", (self.name,)).fetchone()
+                elif window > 0:
+                    row = conn.execute(
+                        "SELECT MIN(id) FROM (SELECT id FROM entries WHERE store = ? ORDER BY id DESC LIMIT ?)",
+                        (self.name, window)
+                    ).fetchone()
+                else:
+                    row = None
+                first_id = row[0] if row and row[0] is not None else version + 1
+                rows = conn.execute(
+                    "SELECT id, data FROM entries WHERE store = ? AND id > ? AND id >= ? ORDER BY id",
+                    (self.name, since, first_id)
+                ).fetchall()
+            finally:
+                conn.execute("COMMIT")
+        added = [{"id": entry_id, **json.loads(data)} for entry_id, data in rows]
+        return {"version": version, "added": added, "removed_before": first_id}
+
+    def clear(self):
+        """清空该存储(不触发淘汰回调)，版本号推进到当前自增序列之后"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM entries WHERE store = ?", (self.name,))
+                # 推进自增序列，使版本号递增且之后追加的条目ID大于它
+                conn.execute("UPDATE sqlite_sequence SET seq = seq + 1 WHERE name = 'entries'")
+                row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'entries'").fetchone()
+                if row:
+                    self._set_version(conn, row[0])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+def create_memory_store(name: str, capacity: int, memory_config: Optional[Dict] = None,
+                        on_evict: Optional[Callable[[Any], None]] = None):
+    """
+    根据配置创建记忆存储
+
+    参数:
+        name: 存储名称(memory/goals/learning)
+        capacity: 最大条目数
+        memory_config: {
+            "backend": "memory",  # memory(进程内环形缓冲区)/sqlite(持久化)
+            "path": "data/agent_memory.db"
+        }
+        on_evict: 条目被淘汰时的回调
+    """
+    memory_config = memory_config or {}
+    if memory_config.get("backend") == "sqlite":
+        return SQLiteMemoryStore(
+            memory_config.get("path", "data/agent_memory.db"),
+            name, capacity, on_evict=on_evict
+        )
+    return RingBuffer(capacity, on_evict=on_evict)
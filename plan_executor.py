@@ -0,0 +1,184 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from tracing import span
+
+# 步骤状态: 完成/出错/超时/因上游失败跳过
+STEP_STATUSES = ("completed", "failed", "timeout", "skipped")
+
+
+class PlanError(ValueError):
+    """计划无法执行(不是列表、步骤编号重复或依赖成环)"""
+
+
+def build_dag(tasks: List[Dict]) -> Dict[int, Dict]:
+    """
+    把plan_tasks返回的步骤列表整理为DAG，按拓扑顺序返回 {步骤编号: 步骤}
+
+    步骤没有step字段时按位置编号；不是字典的步骤、依赖中指向自身或不存在的步骤会被忽略(打印提示)，
+    计划不是列表、编号重复或依赖成环时抛出PlanError。
+    """
+    if not isinstance(tasks, list):
+        raise PlanError(f"tasks must be a list, got {type(tasks).__name__}")
+    steps: Dict[int, Dict] = {}
+    for index, task in enumerate(tasks, 1):
+        if not isinstance(task, dict):
+            print(f"忽略无效的计划步骤{index}: {task!r}")
+            continue
+        try:
+            step_id = int(task.get("step", index))
+        except (TypeError, ValueError):
+            step_id = index
+        if step_id in steps:
+            raise PlanError(f"duplicate step: {step_id}")
+        steps[step_id] = {**task, "step": step_id}
+
+    for step_id, step in steps.items():
+        declared = step.get("dependencies") or []
+        dependencies = []
+        for dep in declared if isinstance(declared, list) else [declared]:
+            try:
+                dep = int(dep)
+            except (TypeError, ValueError):
+                dep = None
+            if dep is None or dep == step_id or dep not in steps:
+                print(f"忽略步骤{step_id}的无效依赖: {dep}")
+            elif dep not in dependencies:
+                dependencies.append(dep)
+        step["dependencies"] = dependencies
+
+    # Kahn算法排序，同一层按步骤编号
+    indegree = {step_id: len(step["dependencies"]) for step_id, step in steps.items()}
+    dependents: Dict[int, List[int]] = {step_id: [] for step_id in steps}
+    for step_id, step in steps.items():
+        for dep in step["dependencies"]:
+            dependents[dep].append(step_id)
+    ready = sorted(step_id for step_id, degree in indegree.items() if degree == 0)
+    ordered: Dict[int, Dict] = {}
+    while ready:
+        step_id = ready.pop(0)
+        ordered[step_id] = steps[step_id]
+        for child in dependents[step_id]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+        ready.sort()
+    if len(ordered) != len(steps):
+        raise PlanError(f"dependency cycle among steps: {sorted(set(steps) - set(ordered))}")
+    return ordered
+
+
+def critical_path(records: Dict[int, Dict]) -> List[int]:
+    """
+    实际执行中的关键路径: 从最后完成的步骤出发，每次回溯到最晚完成的上游步骤
+
+    关键路径上各步骤的耗时加上等待并发名额的时间即为计划总耗时。
+    """
+    if not records:
+        return []
+    step_id = max(records, key=lambda s: records[s]["finished"])
+    path = [step_id]
+    while records[step_id]["dependencies"]:
+        step_id = max(records[step_id]["dependencies"], key=lambda s: records[s]["finished"])
+        path.append(step_id)
+    return path[::-1]
+
+
+class PlanExecutor:
+    """
+    计划执行器
+
+    按依赖关系并发执行步骤: 上游全部完成后立即开始，同时运行的步骤数不超过max_concurrency，
+    每个步骤受step_timeout限制。上游的输出按步骤编号传给下游，上游失败时下游跳过。
+    """
+    def __init__(self, run_step: Callable[[Dict, Dict[int, Any]], Awaitable[Any]],
+                 max_concurrency: int = 4, step_timeout: Optional[float] = 120):
+        """
+        参数:
+            run_step: 执行单个步骤的协程函数，参数为(步骤, {上游步骤编号: 输出})
+            max_concurrency: 同时执行的步骤数
+            step_timeout: 单个步骤的超时(秒)，None为不限
+        """
+        self.run_step = run_step
+        self.max_concurrency = max(1, max_concurrency)
+        self.step_timeout = step_timeout
+
+    async def run(self, tasks: List[Dict]) -> Dict:
+        """
+        执行计划
+
+        返回:
+            {
+                "steps": [{"step", "description", "dependencies", "status", "output"/"error",
+                           "started", "finished", "elapsed", "queued"}],  # 时间为相对计划开始的秒数
+                "timing": {"total", "sum_of_steps", "critical_path", "critical_path_seconds", "speedup"}
+            }
+        """
+        steps = build_dag(tasks)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        started = time.perf_counter()
+        futures: Dict[int, asyncio.Future] = {}
+
+        async def _execute(step: Dict) -> Dict:
+            upstream = [await futures[dep] for dep in step["dependencies"]]
+            ready = time.perf_counter() - started
+            record = {
+                "step": step["step"],
+                "description": step.get("description", ""),
+                "dependencies": step["dependencies"],
+                "status": "skipped",
+                "started": ready,
+                "finished": ready,
+                "elapsed": 0.0,
+                "queued": 0.0
+            }
+            failed = [r["step"] for r in upstream if r["status"] != "completed"]
+            if failed:
+                record["error"] = f"upstream steps did not complete: {failed}"
+                return record
+
+            outputs = {r["step"]: r["output"] for r in upstream}
+            async with semaphore:
+                record["started"] = time.perf_counter() - started
+                record["queued"] = record["started"] - ready
+                with span("plan.step", step=step["step"]) as current:
+                    try:
+                        record["output"] = await asyncio.wait_for(self.run_step(step, outputs), self.step_timeout)
+                        record["status"] = "completed"
+                    except asyncio.TimeoutError:
+                        record["status"] = "timeout"
+                        record["error"] = f"step timed out after {self.step_timeout}s"
+                    except Exception as e:
+                        record["status"] = "failed"
+                        record["error"] = str(e)
+                    current.set(status=record["status"])
+                record["finished"] = time.perf_counter() - started
+                record["elapsed"] = record["finished"] - record["started"]
+            return record
+
+        # 按拓扑顺序创建，每个步骤创建时其上游的任务已经存在
+        for step_id, step in steps.items():
+            futures[step_id] = asyncio.ensure_future(_execute(step))
+        try:
+            records = {step_id: await future for step_id, future in futures.items()}
+        finally:
+            for future in futures.values():
+                future.cancel()
+        total = time.perf_counter() - started
+
+        path = critical_path(records)
+        sum_of_steps = sum(r["elapsed"] for r in records.values())
+        for record in records.values():
+            for field in ("started", "finished", "elapsed", "queued"):
+                record[field] = round(record[field], 3)
+        return {
+            "steps": list(records.values()),
+            "timing": {
+                "total": round(total, 3),
+                "sum_of_steps": round(sum_of_steps, 3),
+                "critical_path": path,
+                "critical_path_seconds": round(sum(records[s]["elapsed"] + records[s]["queued"] for s in path), 3),
+                "speedup": round(sum_of_steps / total, 2) if records and total > 0 else None
+            }
+        }
@@ -0,0 +1,115 @@
+import heapq
+import hashlib
+from functools import lru_cache
+from itertools import count
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 去重时忽略的跟踪参数
+TRACKING_PARAMS = {
+    "gclid", "fbclid", "msclkid", "yclid", "dclid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "spm", "_hsenc", "_hsmi"
+}
+TRACKING_PREFIXES = ("utm_",)
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+# 融合方法: rrf(倒数排名融合)/weighted(按排名线性衰减的加权融合)
+FUSION_METHODS = ("rrf", "weighted")
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    规范化URL，用于判断不同引擎返回的是否为同一页面
+
+    忽略协议(http/https)、大小写主机名、www.前缀、默认端口、片段、
+    末尾斜杠和跟踪参数，查询参数按名称排序。
+    """
+    url = url.strip()
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url if "://" in url else f"http://{url}")
+        port = parts.port
+    except ValueError:
+        return url.lower()
+    host = (parts.hostname or "").lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    if port is not None and str(port) != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    ))
+    return urlunsplit(("", host, path, query, ""))[2:]
+
+
+@lru_cache(maxsize=65536)
+def url_key(url: str) -> bytes:
+    """规范化URL的摘要(去重键，缓存最近的结果)"""
+    return hashlib.blake2b(canonicalize_url(url).encode(), digest_size=8).digest()
+
+
+@lru_cache(maxsize=32)
+def _rank_weights(method: str, rrf_k: int, length: int) -> tuple:
+    """预先计算第1..length名的排名得分，同一长度的结果列表共享"""
+    if method == "weighted":
+        return tuple((length - rank) / length for rank in range(length))
+    return tuple(1.0 / (rrf_k + rank) for rank in range(1, length + 1))
+
+
+def fuse_results(results_by_source: Dict[str, List[Dict]], limit: int,
+                 method: str = "rrf", rrf_k: int = 60,
+                 weights: Optional[Dict[str, float]] = None) -> List[Dict]:
+    """
+    融合多个搜索源的结果列表: 按规范化URL去重，合并排名得分，用堆选出前limit个
+
+    参数:
+        results_by_source: {来源: 按该来源排名排序的结果列表}
+        limit: 返回的结果数
+        method: rrf(得分 = Σ 权重 / (rrf_k + 排名))
+                weighted(得分 = Σ 权重 * (1 - (排名 - 1) / 列表长度))
+        rrf_k: RRF平滑常数
+        weights: {来源: 权重}，未配置的来源权重为1
+
+    返回:
+        结果列表，每项附加 score(融合得分) 和 engines(返回该结果的来源)
+    """
+    if limit <= 0:
+        return []
+    if method not in FUSION_METHODS:
+        raise ValueError(f"unknown fusion method: {method}")
+    weights = weights or {}
+
+    scores: Dict[bytes, float] = {}
+    best: Dict[bytes, tuple] = {}
+    engines: Dict[bytes, List[str]] = {}
+    order = count()
+    for source, results in results_by_source.items():
+        if not results:
+            continue
+        weight = weights.get(source, 1.0)
+        rank_weights = _rank_weights(method, rrf_k, len(results))
+        for rank_weight, item in zip(rank_weights, results):
+            link = item.get("link")
+            if not link:
+                continue
+            key = url_key(link)
+            source_list = engines.setdefault(key, [])
+            # 同一来源重复返回的链接只计最高排名
+            if source_list and source_list[-1] == source:
+                continue
+            source_list.append(source)
+            contribution = weight * rank_weight
+            scores[key] = scores.get(key, 0.0) + contribution
+            # 保留贡献最大的那一条作为展示内容
+            if key not in best or contribution > best[key][0]:
+                best[key] = (contribution, next(order), item)
+
+    top = heapq.nlargest(limit, scores.items(), key=lambda entry: (entry[1], -best[entry[0]][1]))
+    return [
+        {**best[key][2], "score": round(score, 6), "engines": engines[key]}
+        for key, score in top
+    ]
@@ -0,0 +1,403 @@
+import os
+import json
+import time
+import zlib
+import asyncio
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# 各搜索模式的默认过期时间(秒): 深网结果变化慢、获取代价高，保留更久
+DEFAULT_MODE_TTLS = {
+    "surface": 15 * 60,
+    "deep": 6 * 60 * 60,
+    "mixed": 15 * 60
+}
+
+# 命中时刷新SQLite缓存访问时间的默认间隔，占默认过期时间的比例
+TOUCH_FRACTION = 0.1
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询(Unicode NFKC、大小写、空白)，使近似查询共享同一缓存项"""
+    query = unicodedata.normalize("NFKC", query or "")
+    return " ".join(query.casefold().split())
+
+
+def make_search_key(query: str, mode: str) -> str:
+    """生成搜索缓存键(先规范化查询再哈希)"""
+    return hashlib.sha256(f"{normalize_query(query)}:{mode}".encode()).hexdigest()
+
+
+class LRUCache:
+    """带TTL过期和条目数/字节数上限的LRU缓存"""
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 default_ttl: Optional[float] = 3600):
+        """
+        参数:
+            max_entries: 最大条目数
+            max_bytes: 缓存值序列化后的总字节数上限
+            default_ttl: 默认过期时间(秒)，None表示永不过期
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        # key -> (value, 过期时刻, 字节数)
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and not self._is_expired(entry)
+
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        """估算缓存值大小(按JSON序列化后的字节数)"""
+        try:
+            return len(json.dumps(value, ensure_ascii=False, default=str).encode())
+        except (TypeError, ValueError):
+            return len(repr(value).encode())
+
+    @staticmethod
+    def _is_expired(entry: Tuple[Any, Optional[float], int]) -> bool:
+        expires_at = entry[1]
+        return expires_at is not None and expires_at <= time.monotonic()
+
+    def _remove(self, key: str):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """读取缓存，命中时移动到LRU队尾"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        if self._is_expired(entry):
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """写入缓存，超出上限时按LRU顺序淘汰"""
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        if key in self._data:
+            self._remove(key)
+
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (value, expires_at, size)
+        self._bytes += size
+
+        while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """在事件循环中读取缓存(内存操作，直接执行)"""
+        return self.get(key, default)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        """在事件循环中写入缓存(内存操作，直接执行)"""
+        self.set(key, value, ttl)
+
+    def delete(self, key: str):
+        """删除缓存项"""
+        if key in self._data:
+            self._remove(key)
+
+    def clear(self):
+        """清空缓存"""
+        self._data.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict:
+        """缓存统计信息"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class SearchCache(LRUCache):
+    """元搜索结果缓存(查询规范化 + 按搜索模式区分TTL)"""
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 mode_ttls: Optional[Dict[str, float]] = None):
+        self.mode_ttls = {**DEFAULT_MODE_TTLS, **(mode_ttls or {})}
+        super().__init__(max_entries, max_bytes, default_ttl=self.mode_ttls["surface"])
+
+    make_key = staticmethod(make_search_key)
+
+    def ttl_for(self, mode: str) -> Optional[float]:
+        """获取指定搜索模式的过期时间"""
+        return self.mode_ttls.get(mode, self.default_ttl)
+
+
+class SQLiteCache:
+    """
+    基于SQLite(WAL模式)的持久化缓存
+
+    多个进程(如gunicorn的多个worker)可同时读写同一数据库文件，
+    缓存值以zlib压缩的JSON存储，重启后仍然保留。
+    """
+    def __init__(self, path: str, max_entries: int = 100000,
+                 max_bytes: int = 256 * 1024 * 1024, default_ttl: Optional[float] = 3600,
+                 busy_timeout: float = 5.0, touch_interval: Optional[float] = None):
+        """
+        参数:
+            path: 数据库文件路径
+            max_entries: 最大条目数
+            max_bytes: 压缩后数据的总字节数上限
+            default_ttl: 默认过期时间(秒)，None表示永不过期
+            busy_timeout: 等待其他进程释放写锁的时间(秒)
+            touch_interval: 命中时刷新访问时间的最小间隔(秒)，默认为default_ttl的TOUCH_FRACTION倍
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.busy_timeout = busy_timeout
+        if touch_interval is None:
+            touch_interval = default_ttl * TOUCH_FRACTION if default_ttl is not None else 60
+        self.touch_interval = touch_interval
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        # 计数器只统计当前进程
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取当前进程的数据库连接(fork后自动重连)"""
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed_at)")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        return zlib.compress(
+            json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+        )
+
+    @staticmethod
+    def _decode(blob: bytes) -> Any:
+        return json.loads(zlib.decompress(blob))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT 1 FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        读取缓存并刷新访问时间
+
+        访问时间只用于LRU淘汰，距上次刷新超过touch_interval才写入，
+        热点缓存项的命中不会每次都争用写锁。
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            if row[1] is not None and row[1] <= now:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.expirations += 1
+                self.misses += 1
+                return default
+            if now - row[2] >= self.touch_interval:
+                conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return self._decode(row[0])
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """在线程池中读取缓存，不阻塞事件循环"""
+        return await asyncio.to_thread(self.get, key, default)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        """在线程池中写入缓存，不阻塞事件循环"""
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """写入缓存，超出上限时淘汰过期项和最久未访问的项"""
+        blob = self._encode(value)
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, blob, len(blob), expires_at, now)
+                )
+                self._evict(conn, now)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """按LRU顺序淘汰超出上限的条目(需在事务内调用)"""
+        self.expirations += conn.execute(
+            "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        ).rowcount
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        evict_keys = []
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed_at"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evict_keys.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM cache WHERE key = ?", evict_keys)
+        self.evictions += len(evict_keys)
+
+    def delete(self, key: str):
+        """删除缓存项"""
+        with self._lock:
+            self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        """清空缓存(影响所有共享该文件的进程)"""
+        with self._lock:
+            self._connection().execute("DELETE FROM cache")
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def stats(self) -> Dict:
+        """缓存统计信息(条目数和字节数为全局值，命中计数为当前进程)"""
+        with self._lock:
+            count, total = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": count,
+            "bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class SQLiteSearchCache(SQLiteCache):
+    """跨进程共享的元搜索结果缓存"""
+    def __init__(self, path: str, max_entries: int = 100000,
+                 max_bytes: int = 256 * 1024 * 1024,
+                 mode_ttls: Optional[Dict[str, float]] = None):
+        self.mode_ttls = {**DEFAULT_MODE_TTLS, **(mode_ttls or {})}
+        super().__init__(path, max_entries, max_bytes, default_ttl=self.mode_ttls["surface"])
+
+    make_key = staticmethod(make_search_key)
+
+    def ttl_for(self, mode: str) -> Optional[float]:
+        """获取指定搜索模式的过期时间"""
+        return self.mode_ttls.get(mode, self.default_ttl)
+
+
+def create_search_cache(cache_config: Optional[Dict] = None):
+    """
+    根据配置创建搜索缓存
+
+    参数:
+        cache_config: {
+            "backend": "memory",  # memory/sqlite
+            "path": "data/search_cache.db",  # sqlite后端的数据库文件
+            "max_entries": 1024,
+            "max_bytes": 67108864,
+            "ttl": {"surface": 900, "deep": 21600, "mixed": 900}
+        }
+    """
+    cache_config = cache_config or {}
+    if cache_config.get("backend") == "sqlite":
+        return SQLiteSearchCache(
+            cache_config.get("path", "data/search_cache.db"),
+            max_entries=cache_config.get("max_entries", 100000),
+            max_bytes=cache_config.get("max_bytes", 256 * 1024 * 1024),
+            mode_ttls=cache_config.get("ttl")
+        )
+    return SearchCache(
+        max_entries=cache_config.get("max_entries", 1024),
+        max_bytes=cache_config.get("max_bytes", 64 * 1024 * 1024),
+        mode_ttls=cache_config.get("ttl")
+    )
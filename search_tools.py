@@ -1,35 +1,288 @@
+import time
 import asyncio
 import aiohttp
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Callable, Awaitable, Any, AsyncIterator, Union
 import json
 from datetime import datetime
-import hashlib
 import base64
 from cryptography.fernet import Fernet
-from bs4 import BeautifulSoup
+from search_cache import create_search_cache
+from connection_pool import ConnectionPool
+from html_parsers import create_result_parser
+from result_fusion import fuse_results
+from latency_tracker import LatencyHistogram
+from metrics import REGISTRY
+from tracing import span
+from functools import lru_cache
+from html import escape
+
+try:
+    from markupsafe import escape as _escape  # C实现的转义(随Quart安装)，比html.escape快
+except ImportError:
+    _escape = escape
+
+# 参与并发搜索的Tor搜索引擎
+TOR_ENGINES = ("ahmia", "torch")
+
+# 各搜索模式的默认请求级截止时间(秒)
+DEFAULT_DEADLINES = {
+    "surface": 15,
+    "deep": 30,
+    "mixed": 30
+}
+
+# 截止时间到达时取消搜索源任务使用的消息，用于区分调用方提前退出
+DEADLINE_EXCEEDED = "deadline exceeded"
+
+# 部分搜索源超时/失败时结果的缓存时间(秒)
+PARTIAL_RESULT_TTL = 60
+
+# 深网结果的默认提示
+DEEPWEB_WARNING = "注意: 深网链接需要Tor/I2P浏览器访问"
+
+# 紧凑结果保留的字段
+COMPACT_FIELDS = ("title", "link", "snippet", "source")
+
+# 服务端渲染的单个结果项模板，明网/深网的样式类在首次使用时预先填好，
+# 转义后的字段按位置填入: 序号、来源、链接、标题、摘要
+RESULT_ITEM_TEMPLATE = """\
+<div class='search-result p-2 mb-2 {item_class}'>
+    <div class='result-header d-flex justify-content-between mb-1'>
+        <span class='result-index fw-bold'>%d.</span>
+        <span class='result-source badge {badge_class}'>%s</span>
+    </div>
+    <a href='%s' target='_blank' class='result-title d-block fw-bold mb-1{link_class}'>%s</a>
+    <div class='result-snippet small text-muted'>%s</div>
+</div>"""
+
+# 默认返回的结果数
+DEFAULT_MAX_RESULTS = {
+    "surface": 10,
+    "deepweb": 5
+}
+
+# 默认并发限制
+DEFAULT_CONCURRENCY = {
+    "batch": 8,       # 批量搜索时同时进行的查询数(进程内所有批量请求共享)
+    "per_engine": 8,  # 每个搜索源同时进行的请求数
+    "engines": {}     # 单独配置的搜索源 {"tor_ahmia": 2}
+}
+
+SEARCH_MODES = ("surface", "deep", "mixed")
+
+# 各搜索源的默认速率限制(每秒令牌数, 桶容量)，按服务商配额设置
+DEFAULT_RATE_LIMITS = {
+    "google": {"rate": 5.0, "burst": 10},   # SerpAPI
+    "bing": {"rate": 3.0, "burst": 3},      # Bing Web Search 免费层 3 TPS
+    "tor_ahmia": {"rate": 1.0, "burst": 3},
+    "tor_torch": {"rate": 1.0, "burst": 3},
+    "i2p": {"rate": 1.0, "burst": 2}
+}
+
+# 熔断器默认配置
+DEFAULT_BREAKER = {
+    "failure_threshold": 5,  # 连续失败多少次后熔断
+    "recovery_timeout": 30,  # 熔断多久后进入半开状态试探(秒)
+    "half_open_max_calls": 1  # 半开状态同时允许的试探请求数
+}
+
+
+# 自适应超时与对冲请求默认配置
+DEFAULT_LATENCY = {
+    "window": 300,               # 延迟统计窗口(秒)
+    "min_samples": 20,           # 样本数不足时使用固定超时、不发对冲请求
+    "timeout_percentile": 0.99,  # 超时 = 该分位数 * timeout_multiplier
+    "timeout_multiplier": 1.5,
+    "min_timeout": 2.0,          # 自适应超时下限(秒)，上限为原固定超时
+    "hedge_engines": ["tor_ahmia", "tor_torch", "i2p"],  # 长尾严重的搜索源
+    "hedge_percentile": 0.95,    # 首个请求超过该分位数仍未返回时发出对冲请求
+    "hedge_max_ratio": 0.1       # 对冲请求数不超过请求数的该比例
+}
+
+
+# 熔断器状态在指标中的取值
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+SOURCE_LATENCY = REGISTRY.histogram(
+    "agent_search_source_duration_seconds",
+    "单次搜索中各搜索源的耗时，按结果状态区分(completed/timeout/failed/circuit_open/rate_limited)",
+    ("engine", "status")
+)
+
+
+class RateLimitedError(Exception):
+    """搜索源超出速率限制"""
+
+
+class CircuitOpenError(Exception):
+    """搜索源已熔断"""
+
+
+class TokenBucket:
+    """令牌桶限速: 以固定速率补充令牌，允许不超过桶容量的突发请求"""
+    def __init__(self, rate: float, burst: int):
+        """
+        参数:
+            rate: 每秒补充的令牌数
+            burst: 桶容量(最大突发请求数)
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.rejected = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        """有可用令牌时立即取走，否则返回False(不计入拒绝数)"""
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    async def acquire(self, max_wait: float = 0.0) -> bool:
+        """获取一个令牌，最多等待max_wait秒，超时返回False"""
+        self._refill()
+        if self.tokens < 1:
+            wait = (1 - self.tokens) / self.rate
+            if wait > max_wait:
+                self.rejected += 1
+                return False
+            # 先预留令牌再等待，并发的调用方按顺序排队
+            self.tokens -= 1
+            await asyncio.sleep(wait)
+            return True
+        self.tokens -= 1
+        return True
+
+    def stats(self) -> Dict:
+        self._refill()
+        return {"rate": self.rate, "burst": self.burst,
+                "tokens": round(max(self.tokens, 0.0), 2), "rejected": self.rejected}
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    closed: 正常请求，连续失败达到阈值后转为open
+    open: 直接拒绝请求，recovery_timeout后转为half_open
+    half_open: 放行少量试探请求，成功则恢复closed，失败则重新open
+    """
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30,
+                 half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.short_circuited = 0
+        self.last_error = None
+
+    def allow(self) -> bool:
+        """判断是否放行请求"""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                self.short_circuited += 1
+                return False
+            self.state = "half_open"
+            self.half_open_calls = 0
+        if self.state == "half_open":
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.short_circuited += 1
+                return False
+            self.half_open_calls += 1
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.last_error = None
+
+    def record_failure(self, error: str):
+        self.failures += 1
+        self.last_error = error
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        retry_in = 0.0
+        if self.state == "open":
+            retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "retry_in": round(retry_in, 1),
+            "last_error": self.last_error
+        }
+
+
+@lru_cache(maxsize=2)
+def _item_template(deep: bool) -> str:
+    """明网或深网结果项的模板"""
+    if deep:
+        return RESULT_ITEM_TEMPLATE.format(item_class="deepweb-result", badge_class="bg-dark",
+                                           link_class=" onion-link")
+    return RESULT_ITEM_TEMPLATE.format(item_class="bg-white", badge_class="bg-info", link_class="")
+
+
+def _render_items(results: List[Dict], deep: bool) -> List[str]:
+    """渲染结果项: 所有字段拼接后一次转义，再按位置填入模板"""
+    if not results:
+        return []
+    template = _item_template(deep)
+    raw = [
+        field
+        for result in results
+        for field in (str(result.get("source", "")), str(result.get("link", "")),
+                      str(result.get("title", "")), str(result.get("snippet") or "无描述"))
+    ]
+    fields = str(_escape("\0".join(raw))).split("\0")
+    if len(fields) != len(raw):
+        # 字段中本身含分隔符时逐个转义
+        fields = [str(_escape(field)) for field in raw]
+    return [
+        template % (index, *fields[offset:offset + 4])
+        for index, offset in enumerate(range(0, len(fields), 4), 1)
+    ]
+
 
 class DeepWebSearcher:
     """深网搜索工具"""
-    def __init__(self, tor_proxy: str = None, i2p_proxy: str = None):
+    def __init__(self, tor_proxy: str = None, i2p_proxy: str = None, pool_config: Dict = None,
+                 parser_config: Dict = None):
         self.tor_proxy = tor_proxy or "socks5://localhost:9050"
         self.i2p_proxy = i2p_proxy
-        self.session = None
+        self.pool_config = pool_config or {}
+        self.pool = None
+        self.timeout = 30
+        # 结果页解析在线程池中进行，避免大页面阻塞事件循环
+        self.parser = create_result_parser(parser_config)
         self.encryption_key = Fernet.generate_key()
         self.cipher = Fernet(self.encryption_key)
         self.user_agent = "Mozilla/5.0 (Windows NT 10.0; rv:102.0) Gecko/20100101 Firefox/102.0"
 
     async def initialize(self):
-        """初始化深网会话"""
-        connector = aiohttp.TCPConnector(force_close=True)
-        self.session = aiohttp.ClientSession(
-            connector=connector,
-            headers={"User-Agent": self.user_agent}
+        """初始化深网连接池(Tor/I2P代理各一个长连接connector)"""
+        self.pool = ConnectionPool(
+            headers={"User-Agent": self.user_agent},
+            **self.pool_config
         )
 
     async def close(self):
-        """关闭会话"""
-        if self.session:
-            await self.session.close()
+        """关闭连接池和解析线程池"""
+        if self.pool:
+            await self.pool.close()
+        self.parser.close()
 
     def _encrypt_query(self, query: str) -> str:
         """加密搜索查询"""
@@ -39,96 +292,73 @@ class DeepWebSearcher:
         """解密响应数据"""
         return self.cipher.decrypt(encrypted.encode()).decode()
 
+    async def _get_html(self, url: str, proxy: Optional[str], timeout: float = None) -> str:
+        """通过代理获取页面HTML，失败时抛出异常"""
+        if not self.pool or self.pool.closed:
+            await self.initialize()
+        with span("deepweb.fetch_html", proxy=proxy or "direct") as fetch_span:
+            async with self.pool.get(
+                url,
+                proxy=proxy,
+                timeout=aiohttp.ClientTimeout(total=timeout or self.timeout)
+            ) as resp:
+                fetch_span.set(status=resp.status)
+                resp.raise_for_status()
+                return await resp.text()
+
     async def _fetch_tor(self, url: str) -> Optional[str]:
         """通过Tor网络获取内容"""
         try:
-            async with self.session.get(
-                url, 
-                proxy=self.tor_proxy,
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as resp:
-                if resp.status == 200:
-                    return await resp.text()
+            return await self._get_html(url, self.tor_proxy)
         except Exception as e:
             print(f"Tor请求出错: {str(e)}")
         return None
 
+    async def _search_tor_engine(self, query: str, engine: str = "ahmia", timeout: float = None) -> List[Dict]:
+        """通过Tor网络搜索(失败时抛出异常)"""
+        if engine == "ahmia":
+            url = f"http://juhanurmihxlp77nkq76byazcldy2hlmovfu2epvl5ankdibsot4csyd.onion/search/?q={query}"
+        elif engine == "torch":
+            url = f"http://xmh57jrzrnw6insl.onion/4a1f6b371c/search.cgi?q={query}"
+        else:
+            return []
+
+        html = await self._get_html(url, self.tor_proxy, timeout)
+        with span("deepweb.parse_html", engine=engine, bytes=len(html)):
+            return await self.parser.parse(html, engine, limit=5)
+
     async def search_tor(self, query: str, engine: str = "ahmia") -> List[Dict]:
         """通过Tor网络搜索"""
-        if not self.session:
-            await self.initialize()
-
-        results = []
         try:
-            if engine == "ahmia":
-                url = f"http://juhanurmihxlp77nkq76byazcldy2hlmovfu2epvl5ankdibsot4csyd.onion/search/?q={query}"
-                html = await self._fetch_tor(url)
-                if html:
-                    soup = BeautifulSoup(html, 'html.parser')
-                    for result in soup.select('.result'):
-                        title = result.select_one('.title')
-                        link = result.select_one('.link')
-                        desc = result.select_one('.description')
-                        if title and link:
-                            results.append({
-                                "title": title.get_text().strip(),
-                                "link": link.get('href', '').strip(),
-                                "snippet": desc.get_text().strip() if desc else "",
-                                "source": "Tor (Ahmia)"
-                            })
-            
-            elif engine == "torch":
-                url = f"http://xmh57jrzrnw6insl.onion/4a1f6b371c/search.cgi?q={query}"
-                html = await self._fetch_tor(url)
-                if html:
-                    soup = BeautifulSoup(html, 'html.parser')
-                    for result in soup.select('dt'):
-                        title = result.find('a')
-                        if title:
-                            results.append({
-                                "title": title.get_text().strip(),
-                                "link": title.get('href', '').strip(),
-                                "snippet": "",
-                                "source": "Tor (Torch)"
-                            })
-        
+            return await self._search_tor_engine(query, engine)
         except Exception as e:
             print(f"Tor搜索出错: {str(e)}")
-        
-        return results[:5]
+        return []
 
-    async def search_i2p(self, query: str) -> List[Dict]:
-        """通过I2P网络搜索"""
-        if not self.session or not self.i2p_proxy:
+    async def _search_i2p_engine(self, query: str, timeout: float = None) -> List[Dict]:
+        """通过I2P网络搜索(失败时抛出异常)"""
+        if not self.i2p_proxy:
             return []
 
-        results = []
+        url = f"http://udhdrtrcetjm5sxzskjyr5ztpeszydbh4dpl3pl4utgqqw2v4jna.b32.i2p/search?q={query}"
+        html = await self._get_html(url, self.i2p_proxy, timeout)
+        with span("deepweb.parse_html", engine="i2p", bytes=len(html)):
+            return await self.parser.parse(html, "i2p", limit=5)
+
+    async def search_i2p(self, query: str) -> List[Dict]:
+        """通过I2P网络搜索"""
         try:
-            url = f"http://udhdrtrcetjm5sxzskjyr5ztpeszydbh4dpl3pl4utgqqw2v4jna.b32.i2p/search?q={query}"
-            async with self.session.get(
-                url, 
-                proxy=self.i2p_proxy,
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as resp:
-                if resp.status == 200:
-                    html = await resp.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    for result in soup.select('.result'):
-                        title = result.select_one('h3 a')
-                        if title:
-                            results.append({
-                                "title": title.get_text().strip(),
-                                "link": title.get('href', '').strip(),
-                                "snippet": "",
-                                "source": "I2P"
-                            })
+            return await self._search_i2p_engine(query)
         except Exception as e:
             print(f"I2P搜索出错: {str(e)}")
-        
-        return results[:5]
+        return []
 
 class MetaSearchEngine:
-    def __init__(self, search_apis: Dict[str, dict], deepweb_config: Dict = None):
+    def __init__(self, search_apis: Dict[str, dict], deepweb_config: Dict = None,
+                 cache_config: Dict = None, deadlines: Dict[str, float] = None,
+                 pool_config: Dict = None, max_results: Dict[str, int] = None,
+                 fusion_config: Dict = None, concurrency_config: Dict = None,
+                 resilience_config: Dict = None, latency_config: Dict = None):
         """
         元搜索引擎(包含深网搜索)
         
@@ -138,41 +368,329 @@ class MetaSearchEngine:
                 "enable": True,
                 "tor_proxy": "socks5://localhost:9050",
                 "i2p_proxy": "http://localhost:4444",
-                "warning": "自定义警告信息"
+                "warning": "自定义警告信息",
+                "parser": {"backend": "auto", "executor": "thread", "max_workers": 2}
+            }
+            cache_config: 结果缓存配置 {
+                "max_entries": 1024,
+                "max_bytes": 67108864,
+                "ttl": {"surface": 900, "deep": 21600, "mixed": 900}
+            }
+            deadlines: 各搜索模式的请求级截止时间(秒) {"surface": 15, "deep": 30, "mixed": 30}
+            pool_config: 连接池配置 {
+                "limit": 100,
+                "limit_per_host": 10,
+                "keepalive_timeout": 30,
+                "ttl_dns_cache": 300
             }
+            max_results: 合并后返回的结果数 {"surface": 10, "deepweb": 5}
+            fusion_config: 结果融合配置 {
+                "method": "rrf",  # rrf(倒数排名融合)/weighted(加权排名融合)
+                "rrf_k": 60,
+                "weights": {"google": 1.0, "bing": 1.0, "tor_ahmia": 1.0}
+            }
+            concurrency_config: 并发限制 {
+                "batch": 8,        # 批量搜索时同时进行的查询数(进程内所有批量请求共享)
+                "per_engine": 8,   # 每个搜索源同时进行的请求数(所有搜索共享)
+                "engines": {"tor_ahmia": 2}
+            }
+            resilience_config: 限速与熔断配置 {
+                "rate_limits": {"google": {"rate": 5.0, "burst": 10}},  # 覆盖默认配额，None表示不限速
+                "max_wait": 1.0,  # 令牌不足时最多等待的时间(秒)，超过则跳过该搜索源
+                "breaker": {"failure_threshold": 5, "recovery_timeout": 30, "half_open_max_calls": 1}
+            }
+            latency_config: 自适应超时与对冲请求配置，见DEFAULT_LATENCY
         """
         self.search_apis = search_apis
         self.deepweb_config = deepweb_config or {}
         self.timeout = 15
-        self.session = None
+        self.deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+        self.pool_config = pool_config or {}
+        self.max_results = {**DEFAULT_MAX_RESULTS, **(max_results or {})}
+        self.fusion_config = fusion_config or {}
+        self.concurrency = {**DEFAULT_CONCURRENCY, **(concurrency_config or {})}
+        # 各搜索源和批量查询的并发信号量(绑定到创建时的事件循环)
+        self._engine_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._semaphore_loop = None
+        resilience_config = resilience_config or {}
+        self.rate_limit_wait = resilience_config.get("max_wait", 1.0)
+        self._rate_limits = {**DEFAULT_RATE_LIMITS, **resilience_config.get("rate_limits", {})}
+        self._breaker_config = {**DEFAULT_BREAKER, **resilience_config.get("breaker", {})}
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.latency_config = {**DEFAULT_LATENCY, **(latency_config or {})}
+        self._latencies: Dict[str, LatencyHistogram] = {}
+        self._hedge_stats: Dict[str, Dict[str, int]] = {}
+        self.pool = None
         self.deepweb_searcher = None
-        self.cache = {}
+        self.cache = create_search_cache(cache_config)
+        # 进行中的请求(single-flight): key -> 共享任务
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced_requests = 0
         
         if self.deepweb_config.get("enable"):
             self.deepweb_searcher = DeepWebSearcher(
                 tor_proxy=self.deepweb_config.get("tor_proxy"),
-                i2p_proxy=self.deepweb_config.get("i2p_proxy")
+                i2p_proxy=self.deepweb_config.get("i2p_proxy"),
+                pool_config=self.pool_config,
+                parser_config=self.deepweb_config.get("parser")
             )
 
     async def initialize(self):
-        """初始化所有搜索会话"""
-        self.session = aiohttp.ClientSession()
+        """初始化所有搜索连接池"""
+        self.pool = ConnectionPool(**self.pool_config)
         if self.deepweb_searcher:
             await self.deepweb_searcher.initialize()
 
     async def close(self):
-        """关闭所有会话"""
-        if self.session:
-            await self.session.close()
+        """关闭所有连接池"""
+        if self.pool:
+            await self.pool.close()
         if self.deepweb_searcher:
             await self.deepweb_searcher.close()
 
     def _get_cache_key(self, query: str, mode: str) -> str:
-        """生成缓存键"""
-        return hashlib.sha256(f"{query}:{mode}".encode()).hexdigest()
+        """生成缓存键(查询经规范化后哈希)"""
+        return self.cache.make_key(query, mode)
 
-    async def _fetch_surface_web(self, engine: str, query: str) -> List[Dict]:
-        """获取明网搜索结果"""
+    async def _single_flight(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        合并并发的相同请求: 同一键同时只执行一次factory，
+        其余调用方等待同一个共享任务的结果
+        """
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(key)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            self.coalesced_requests += 1
+            return await asyncio.shield(task)
+
+        task = loop.create_task(factory())
+        self._inflight[key] = task
+
+        def _cleanup(finished: asyncio.Task):
+            if self._inflight.get(key) is finished:
+                del self._inflight[key]
+            # 标记异常已读取，避免所有调用方都被取消时出现未处理异常警告
+            if not finished.cancelled():
+                finished.exception()
+
+        task.add_done_callback(_cleanup)
+        # shield: 单个调用方被取消不会中断其他调用方共享的任务
+        return await asyncio.shield(task)
+
+    def _shared_semaphore(self, name: str, limit: int) -> asyncio.Semaphore:
+        """获取按名称共享的信号量(事件循环变化时重新创建)"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._engine_semaphores = {}
+            self._semaphore_loop = loop
+        semaphore = self._engine_semaphores.get(name)
+        if semaphore is None:
+            semaphore = self._engine_semaphores[name] = asyncio.Semaphore(limit)
+        return semaphore
+
+    def _engine_semaphore(self, engine: str) -> asyncio.Semaphore:
+        """获取搜索源的并发信号量"""
+        return self._shared_semaphore(engine, self.concurrency["engines"].get(engine, self.concurrency["per_engine"]))
+
+    def _bucket(self, engine: str) -> Optional[TokenBucket]:
+        """搜索源的令牌桶(未配置配额时为None)"""
+        if engine not in self._buckets:
+            limit = self._rate_limits.get(engine)
+            self._buckets[engine] = TokenBucket(limit["rate"], limit["burst"]) if limit else None
+        return self._buckets[engine]
+
+    def _breaker(self, engine: str) -> CircuitBreaker:
+        breaker = self._breakers.get(engine)
+        if breaker is None:
+            breaker = self._breakers[engine] = CircuitBreaker(**self._breaker_config)
+        return breaker
+
+    async def _guarded_call(self, engine: str, factory: Callable[[], Awaitable[List[Dict]]]) -> List[Dict]:
+        """
+        经过熔断器、令牌桶和并发限制后请求搜索源
+
+        熔断或超出配额时立即抛出CircuitOpenError/RateLimitedError，
+        不占用连接也不等待上游超时。
+        已发出的请求因截止时间被取消时计为一次超时失败，其余取消不计成败。
+        """
+        breaker = self._breaker(engine)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{engine} circuit open")
+        bucket = self._bucket(engine)
+        upstream = False
+        try:
+            if bucket is not None and not await bucket.acquire(self.rate_limit_wait):
+                raise RateLimitedError(f"{engine} rate limited")
+            async with self._engine_semaphore(engine):
+                upstream = True
+                results = await factory()
+        except (asyncio.CancelledError, RateLimitedError) as e:
+            if upstream and isinstance(e, asyncio.CancelledError) and e.args == (DEADLINE_EXCEEDED,):
+                breaker.record_failure("timeout")
+            elif breaker.state == "half_open":
+                # 未实际发出请求或被调用方取消，不计成败，释放半开试探名额
+                breaker.half_open_calls = max(0, breaker.half_open_calls - 1)
+            raise
+        except Exception as e:
+            breaker.record_failure(f"{type(e).__name__}: {str(e)}"[:200])
+            raise
+        breaker.record_success()
+        return results
+
+    def _latency(self, engine: str) -> LatencyHistogram:
+        histogram = self._latencies.get(engine)
+        if histogram is None:
+            histogram = self._latencies[engine] = LatencyHistogram(self.latency_config["window"])
+        return histogram
+
+    def _max_timeout(self, engine: str) -> float:
+        if engine in self.search_apis or not self.deepweb_searcher:
+            return self.timeout
+        return self.deepweb_searcher.timeout
+
+    def timeout_for(self, engine: str) -> float:
+        """根据近期延迟分位数计算搜索源的请求超时，样本不足时使用固定超时"""
+        config = self.latency_config
+        max_timeout = self._max_timeout(engine)
+        histogram = self._latency(engine)
+        if histogram.count() < config["min_samples"]:
+            return max_timeout
+        observed = histogram.percentile(config["timeout_percentile"]) * config["timeout_multiplier"]
+        return min(max_timeout, max(config["min_timeout"], observed))
+
+    def _hedge_delay(self, engine: str) -> Optional[float]:
+        """对冲请求的发出时机(秒)，不对冲时返回None"""
+        config = self.latency_config
+        if engine not in config["hedge_engines"]:
+            return None
+        histogram = self._latency(engine)
+        if histogram.count() < config["min_samples"]:
+            return None
+        counters = self._hedge_counters(engine)
+        if counters["hedges_sent"] >= config["hedge_max_ratio"] * counters["requests"]:
+            return None
+        return histogram.percentile(config["hedge_percentile"])
+
+    def _hedge_counters(self, engine: str) -> Dict[str, int]:
+        counters = self._hedge_stats.get(engine)
+        if counters is None:
+            counters = self._hedge_stats[engine] = {"requests": 0, "hedges_sent": 0, "hedges_won": 0}
+        return counters
+
+    async def _attempt(self, engine: str, call: Callable[[float], Awaitable[List[Dict]]],
+                       timeout: float, hedge: bool = False) -> List[Dict]:
+        """发出一次请求并记录延迟(超时按超时时间记录，被取消按已等待时间记录)"""
+        started = time.monotonic()
+        try:
+            with span("search.attempt", engine=engine, timeout=round(timeout, 3), hedge=hedge):
+                results = await call(timeout)
+        except asyncio.TimeoutError:
+            self._latency(engine).record(timeout)
+            raise
+        except asyncio.CancelledError:
+            # 被对冲请求或截止时间取消的慢请求也计入，避免延迟分布只剩快的样本
+            self._latency(engine).record(time.monotonic() - started)
+            raise
+        self._latency(engine).record(time.monotonic() - started)
+        return results
+
+    async def _hedged_call(self, engine: str, call: Callable[[float], Awaitable[List[Dict]]]) -> List[Dict]:
+        """
+        以自适应超时请求搜索源，必要时发出对冲请求
+
+        首个请求超过延迟分位数仍未返回时，再发出一个相同请求，采用先成功返回的结果。
+        call接收本次请求的超时(秒)。
+        """
+        timeout = self.timeout_for(engine)
+        counters = self._hedge_counters(engine)
+        counters["requests"] += 1
+        delay = self._hedge_delay(engine)
+        first = asyncio.ensure_future(self._attempt(engine, call, timeout))
+        tasks = [first]
+        try:
+            if delay is None or delay >= timeout:
+                return await first
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            bucket = self._bucket(engine)
+            if done or (bucket is not None and not bucket.try_acquire()):
+                return await first
+
+            counters["hedges_sent"] += 1
+            tasks.append(asyncio.ensure_future(self._attempt(engine, call, timeout, hedge=True)))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            counters["hedges_won"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def resilience_stats(self) -> Dict:
+        """各搜索源的熔断器与限速状态"""
+        engines = set(self.search_apis) | set(self._breakers) | set(self._buckets)
+        if self.deepweb_searcher:
+            engines.update(f"tor_{engine}" for engine in TOR_ENGINES)
+            if self.deepweb_searcher.i2p_proxy:
+                engines.add("i2p")
+        return {
+            engine: {
+                "breaker": self._breaker(engine).stats(),
+                "rate_limit": self._bucket(engine).stats() if self._bucket(engine) else None,
+                "latency": {
+                    **self._latency(engine).snapshot(),
+                    "timeout": round(self.timeout_for(engine), 3),
+                    **self._hedge_counters(engine)
+                }
+            }
+            for engine in sorted(engines)
+        }
+
+    def collect_metrics(self) -> List[Tuple[str, str, str, List]]:
+        """导出各搜索源的熔断、限速和对冲指标"""
+        engines = self.resilience_stats()
+
+        def per_engine(getter) -> List:
+            return [({"engine": engine}, getter(health)) for engine, health in engines.items()]
+
+        return [
+            ("agent_search_breaker_state", "gauge", "熔断器状态(0=closed, 1=half_open, 2=open)",
+             per_engine(lambda h: BREAKER_STATES[h["breaker"]["state"]])),
+            ("agent_search_short_circuited_total", "counter", "被熔断器直接跳过的请求数",
+             per_engine(lambda h: h["breaker"]["short_circuited"])),
+            ("agent_search_rate_limited_total", "counter", "超出速率限制被跳过的请求数",
+             per_engine(lambda h: h["rate_limit"]["rejected"] if h["rate_limit"] else 0)),
+            ("agent_search_timeout_seconds", "gauge", "当前的自适应请求超时",
+             per_engine(lambda h: h["latency"]["timeout"])),
+            ("agent_search_hedges_sent_total", "counter", "发出的对冲请求数",
+             per_engine(lambda h: h["latency"]["hedges_sent"])),
+            ("agent_search_hedges_won_total", "counter", "先于原请求返回的对冲请求数",
+             per_engine(lambda h: h["latency"]["hedges_won"])),
+            ("agent_search_coalesced_requests_total", "counter", "合并到进行中请求的重复查询数",
+             [({}, self.coalesced_requests)])
+        ]
+
+    def stats(self) -> Dict:
+        """搜索引擎运行统计"""
+        pools = self.pool.stats() if self.pool else {}
+        if self.deepweb_searcher and self.deepweb_searcher.pool:
+            pools.update(self.deepweb_searcher.pool.stats())
+        return {
+            "coalesced_requests": self.coalesced_requests,
+            "inflight_requests": len(self._inflight),
+            "connection_pools": pools,
+            "engines": self.resilience_stats()
+        }
+
+    async def _query_surface_web(self, engine: str, query: str, timeout: float = None) -> List[Dict]:
+        """请求明网搜索引擎(失败时抛出异常)"""
         api_config = self.search_apis.get(engine)
         if not api_config:
             return []
@@ -183,38 +701,32 @@ class MetaSearchEngine:
             "num": 5
         }
 
+        async with self.pool.get(
+            api_config["endpoint"],
+            params=params,
+            timeout=aiohttp.ClientTimeout(total=timeout or self.timeout)
+        ) as resp:
+            resp.raise_for_status()
+            return self._normalize_results(engine, await resp.json())
+
+    async def _fetch_surface_web(self, engine: str, query: str) -> List[Dict]:
+        """获取明网搜索结果"""
         try:
-            async with self.session.get(
-                api_config["endpoint"],
-                params=params,
-                timeout=aiohttp.ClientTimeout(total=self.timeout)
-            ) as resp:
-                if resp.status == 200:
-                    return self._normalize_results(engine, await resp.json())
-                return []
+            return await self._query_surface_web(engine, query)
         except Exception as e:
             print(f"{engine}搜索出错: {str(e)}")
             return []
 
     async def _fetch_deep_web(self, query: str) -> List[Dict]:
-        """获取深网搜索结果"""
+        """获取深网搜索结果(Tor与I2P并发请求)"""
         if not self.deepweb_searcher:
             return []
 
-        results = []
-        try:
-            # Tor网络搜索
-            tor_results = await self.deepweb_searcher.search_tor(query)
-            results.extend(tor_results)
-            
-            # I2P网络搜索
-            i2p_results = await self.deepweb_searcher.search_i2p(query)
-            results.extend(i2p_results)
-            
-        except Exception as e:
-            print(f"深网搜索出错: {str(e)}")
-        
-        return results
+        results_by_source = {}
+        sources = self._search_sources(query, "deep")
+        async for (_, source), source_results, _ in self._fan_out(sources, self.deadline_for("deep")):
+            results_by_source[source] = source_results
+        return self._fuse(results_by_source, "deepweb")
 
     def _normalize_results(self, engine: str, data: Dict) -> List[Dict]:
         """标准化不同来源的结果"""
@@ -227,8 +739,7 @@ class MetaSearchEngine:
                     "link": item.get("link", ""),
                     "snippet": item.get("snippet", ""),
                     "source": "Google",
-                    "type": "surface",
-                    "score": self._calculate_score(item)
+                    "type": "surface"
                 })
         elif engine == "bing":
             for item in data.get("webPages", {}).get("value", []):
@@ -237,105 +748,348 @@ class MetaSearchEngine:
                     "link": item.get("url", ""),
                     "snippet": item.get("snippet", ""),
                     "source": "Bing",
-                    "type": "surface",
-                    "score": self._calculate_score(item)
+                    "type": "surface"
                 })
         
         return normalized
 
-    def _calculate_score(self, item: Dict) -> float:
-        """计算结果相关性分数"""
-        title = item.get("title", "")
-        snippet = item.get("snippet", "")
-        return (len(title) * 0.6 + len(snippet) * 0.4) / 100
-
-    async def meta_search(self, query: str, mode: str = "mixed") -> Dict[str, List[Dict]]:
+    async def meta_search(self, query: str, mode: str = "mixed", check_cache: bool = True) -> Dict[str, List[Dict]]:
         """
         执行元搜索
         
         参数:
             query: 搜索查询
             mode: surface/deep/mixed
+            check_cache: 为False时不查缓存(调用方刚查过且未命中，避免重复计入未命中)
             
         返回:
             {
                 "surface": [...],  # 明网结果
-                "deepweb": [...]   # 深网结果
+                "deepweb": [...],  # 深网结果
+                "sources": {...}   # 各搜索源状态(completed/timeout/failed)
             }
         """
-        cache_key = self._get_cache_key(query, mode)
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+        with span("search.meta_search", query=query[:200], mode=mode) as search_span:
+            cache_key = self._get_cache_key(query, mode)
+            cached = await self.cache.aget(cache_key) if check_cache else None
+            search_span.set(cached=cached is not None)
+            if cached is not None:
+                return cached
 
-        if not self.session:
+            # 缓存未命中时，并发的相同查询只触发一次上游请求
+            return await self._single_flight(
+                cache_key,
+                lambda: self._search_and_cache(query, mode, cache_key)
+            )
+
+    def deadline_for(self, mode: str) -> float:
+        """获取指定搜索模式的请求级截止时间(秒)"""
+        return self.deadlines.get(mode, self.deadlines["mixed"])
+
+    async def _search_and_cache(self, query: str, mode: str, cache_key: str) -> Dict[str, Any]:
+        """在截止时间内并发请求所有搜索源并写入缓存"""
+        if not self.pool or self.pool.closed:
             await self.initialize()
 
-        # 并行获取所有结果
-        tasks = []
+        results_by_type = {"surface": {}, "deepweb": {}}
+        source_status = {}
+        async for (result_type, source), results, status in self._fan_out(
+            self._search_sources(query, mode), self.deadline_for(mode)
+        ):
+            results_by_type[result_type][source] = results
+            source_status[source] = status
+
+        return await self._cache_results(cache_key, mode, results_by_type, source_status)
+
+    async def _cache_results(self, cache_key: str, mode: str, results_by_type: Dict[str, Dict[str, List[Dict]]],
+                       source_status: Dict[str, Dict]) -> Dict[str, Any]:
+        """合并结果并写入缓存(部分搜索源超时或失败时只短暂缓存)"""
+        combined = self._combine_results(results_by_type)
+        combined["sources"] = source_status
+
+        ttl = self.cache.ttl_for(mode)
+        if any(status["status"] != "completed" for status in source_status.values()):
+            ttl = min(ttl, PARTIAL_RESULT_TTL) if ttl is not None else PARTIAL_RESULT_TTL
+        await self.cache.aset(cache_key, combined, ttl=ttl)
+        return combined
+
+    def _combine_results(self, results_by_type: Dict[str, Dict[str, List[Dict]]]) -> Dict[str, List[Dict]]:
+        """分别融合明网与深网各搜索源的结果"""
+        return {
+            result_type: self._fuse(results_by_type.get(result_type, {}), result_type)
+            for result_type in ("surface", "deepweb")
+        }
+
+    def _fuse(self, results_by_source: Dict[str, List[Dict]], result_type: str) -> List[Dict]:
+        """按URL去重并按排名融合，取前max_results个"""
+        with span("search.fuse", type=result_type, sources=len(results_by_source)):
+            return fuse_results(
+                results_by_source,
+                self.max_results[result_type],
+                method=self.fusion_config.get("method", "rrf"),
+                rrf_k=self.fusion_config.get("rrf_k", 60),
+                weights=self.fusion_config.get("weights")
+            )
+
+    def _search_sources(self, query: str, mode: str) -> Dict[Tuple[str, str], Callable[[], Awaitable[List[Dict]]]]:
+        """
+        列出本次搜索需要访问的各个搜索源
+
+        返回:
+            {(结果类型, 来源名称): 返回标准化结果的协程工厂(已经过熔断器、令牌桶和并发限制，失败时抛出异常)}
+        """
+        sources = {}
         if mode in ("surface", "mixed"):
-            tasks.extend([
-                self._fetch_surface_web(engine, query) 
-                for engine in self.search_apis.keys()
-            ])
-        
-        deepweb_task = []
-        if mode in ("deep", "mixed"):
-            deepweb_task = self._fetch_deep_web(query)
-        
-        surface_results = []
-        if tasks:
-            for results in await asyncio.gather(*tasks):
-                surface_results.extend(results)
-        
-        deepweb_results = await deepweb_task if deepweb_task else []
-        
-        # 合并结果
-        combined = {
-            "surface": sorted(surface_results, key=lambda x: x["score"], reverse=True)[:10],
-            "deepweb": deepweb_results[:5]
+            for engine in self.search_apis.keys():
+                sources[("surface", engine)] = (
+                    lambda engine=engine: self._guarded_call(engine, lambda: self._hedged_call(
+                        engine, lambda timeout: self._query_surface_web(engine, query, timeout)
+                    ))
+                )
+        if mode in ("deep", "mixed") and self.deepweb_searcher:
+            deep_key = self._get_cache_key(query, "deep")
+            # 深网请求代价高，并发的相同查询共享同一次请求:
+            # 只有发起请求的调用方经过熔断器、令牌桶和并发限制，其余调用方直接等待结果
+            for engine in TOR_ENGINES:
+                sources[("deepweb", f"tor_{engine}")] = (
+                    lambda engine=engine: self._single_flight(
+                        f"deepweb:tor_{engine}:{deep_key}",
+                        lambda: self._guarded_call(f"tor_{engine}", lambda: self._hedged_call(
+                            f"tor_{engine}",
+                            lambda timeout: self.deepweb_searcher._search_tor_engine(query, engine, timeout)
+                        ))
+                    )
+                )
+            if self.deepweb_searcher.i2p_proxy:
+                sources[("deepweb", "i2p")] = lambda: self._single_flight(
+                    f"deepweb:i2p:{deep_key}",
+                    lambda: self._guarded_call("i2p", lambda: self._hedged_call(
+                        "i2p", lambda timeout: self.deepweb_searcher._search_i2p_engine(query, timeout)
+                    ))
+                )
+        return sources
+
+    async def _fan_out(
+        self,
+        sources: Dict[Tuple[str, str], Callable[[], Awaitable[List[Dict]]]],
+        deadline: float
+    ) -> AsyncIterator[Tuple[Tuple[str, str], List[Dict], Dict]]:
+        """
+        在同一截止时间内并发请求所有搜索源，按完成顺序产出结果
+
+        产出:
+            (搜索源键, 结果列表, 状态) 其中状态为 {
+                "type": "surface/deepweb",
+                "status": "completed/timeout/failed/circuit_open/rate_limited",
+                "elapsed": 耗时(秒),
+                "count": 结果数,
+                "error": 错误信息(仅失败时)
+            }
+        截止时间到达后，未完成的搜索源被取消并以timeout状态产出空结果。
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        async def _run(key: Tuple[str, str], factory: Callable[[], Awaitable[List[Dict]]]):
+            with span("search.source", engine=key[1], type=key[0]) as source_span:
+                try:
+                    results = await factory()
+                    status = {"status": "completed", "count": len(results)}
+                except CircuitOpenError as e:
+                    results = []
+                    status = {"status": "circuit_open", "count": 0, "error": str(e)}
+                except RateLimitedError as e:
+                    results = []
+                    status = {"status": "rate_limited", "count": 0, "error": str(e)}
+                except Exception as e:
+                    print(f"{key[1]}搜索出错: {str(e)}")
+                    results = []
+                    status = {"status": "failed", "count": 0, "error": str(e)}
+                source_span.set(status=status["status"], count=status["count"])
+            elapsed = loop.time() - started
+            SOURCE_LATENCY.observe(elapsed, key[1], status["status"])
+            status.update(type=key[0], elapsed=round(elapsed, 3))
+            return key, results, status
+
+        tasks = {
+            asyncio.ensure_future(_run(key, factory)): key
+            for key, factory in sources.items()
         }
-        
-        # 缓存结果
-        self.cache[cache_key] = combined
-        return combined
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = deadline - (loop.time() - started)
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+
+            # 超时的失败由_guarded_call记录: 只计已发出请求的调用，合并的请求只计一次
+            expired, pending = pending, set()
+            for task in expired:
+                task.cancel(DEADLINE_EXCEEDED)
+            for task in expired:
+                key = tasks[task]
+                elapsed = loop.time() - started
+                SOURCE_LATENCY.observe(elapsed, key[1], "timeout")
+                yield key, [], {
+                    "type": key[0],
+                    "status": "timeout",
+                    "elapsed": round(elapsed, 3),
+                    "count": 0
+                }
+        finally:
+            # 截止时间到达或调用方提前退出时取消剩余请求
+            for task in pending:
+                task.cancel()
+
+    async def meta_search_stream(self, query: str, mode: str = "mixed") -> AsyncIterator[Dict]:
+        """
+        流式元搜索: 每个搜索源返回后立即产出其结果
+
+        产出事件:
+            {"event": "results", "type": "surface/deepweb", "source": 来源, "results": [...], "status": {...}}
+            {"event": "done", "results": {"surface": [...], "deepweb": [...], "sources": {...}}, "cached": bool}
+        """
+        cache_key = self._get_cache_key(query, mode)
+        cached = await self.cache.aget(cache_key)
+        if cached is not None:
+            for result_type in ("surface", "deepweb"):
+                if cached.get(result_type):
+                    yield {"event": "results", "type": result_type, "source": "cache",
+                           "results": cached[result_type]}
+            yield {"event": "done", "results": cached, "cached": True}
+            return
+
+        if not self.pool or self.pool.closed:
+            await self.initialize()
+
+        results_by_type = {"surface": {}, "deepweb": {}}
+        source_status = {}
+        async for (result_type, source), results, status in self._fan_out(
+            self._search_sources(query, mode), self.deadline_for(mode)
+        ):
+            results_by_type[result_type][source] = results
+            source_status[source] = status
+            yield {"event": "results", "type": result_type, "source": source,
+                   "results": results, "status": status}
+
+        combined = await self._cache_results(cache_key, mode, results_by_type, source_status)
+        yield {"event": "done", "results": combined, "cached": False}
+
+    async def meta_search_many(self, queries: List[Union[str, Dict]], mode: str = "mixed",
+                               concurrency: Optional[int] = None) -> AsyncIterator[Dict]:
+        """
+        批量元搜索: 去重后先返回缓存命中，其余查询并发执行，按完成顺序产出
+
+        参数:
+            queries: 查询字符串或 {"query": ..., "mode": ...} 列表
+            mode: 未单独指定模式的查询使用的搜索模式
+            concurrency: 本次批量请求同时进行的查询数(默认concurrency_config["batch"])；
+                         进程内所有批量请求合计另受concurrency_config["batch"]限制，
+                         各搜索源的请求另受per_engine限制
+
+        产出:
+            {"query": 查询, "mode": 模式, "indices": [在输入中的位置],
+             "cached": bool, "results": {...}} 或失败时 {..., "error": 错误信息}
+        """
+        unique: Dict[str, Dict] = {}
+        for index, item in enumerate(queries):
+            if isinstance(item, str):
+                item = {"query": item}
+            elif not isinstance(item, dict):
+                yield {"query": None, "mode": mode, "indices": [index],
+                       "cached": False, "error": "invalid query or mode"}
+                continue
+            query = item.get("query")
+            query = query.strip() if isinstance(query, str) else ""
+            item_mode = item.get("mode") or mode
+            if not query or item_mode not in SEARCH_MODES:
+                yield {"query": query, "mode": item_mode, "indices": [index],
+                       "cached": False, "error": "invalid query or mode"}
+                continue
+            key = self._get_cache_key(query, item_mode)
+            if key in unique:
+                unique[key]["indices"].append(index)
+            else:
+                unique[key] = {"query": query, "mode": item_mode, "indices": [index]}
+
+        pending = []
+        for key, entry in unique.items():
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                yield {**entry, "cached": True, "results": cached}
+            else:
+                pending.append(entry)
+        if not pending:
+            return
+
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency["batch"])
+        shared = self._shared_semaphore("_batch", self.concurrency["batch"])
+
+        async def _run(entry: Dict) -> Dict:
+            async with semaphore, shared:
+                try:
+                    # 上面已查过缓存且未命中
+                    results = await self.meta_search(entry["query"], entry["mode"], check_cache=False)
+                    return {**entry, "cached": False, "results": results}
+                except Exception as e:
+                    return {**entry, "cached": False, "error": str(e)}
+
+        tasks = [asyncio.ensure_future(_run(entry)) for entry in pending]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 调用方提前退出(如客户端断开)时取消剩余查询
+            for task in tasks:
+                task.cancel()
+
+    def compact_results(self, results: Dict) -> Dict:
+        """
+        紧凑结果: 每条只保留标题、链接、摘要和来源，由前端渲染
+
+        返回:
+            {"surface": [...], "deepweb": [...], "warning": 深网提示(有深网结果时)}
+        """
+        compact = {
+            result_type: [
+                {field: result[field] for field in COMPACT_FIELDS if result.get(field)}
+                for result in results.get(result_type) or []
+            ]
+            for result_type in ("surface", "deepweb")
+        }
+        if compact["deepweb"]:
+            compact["warning"] = self.deepweb_config.get("warning", DEEPWEB_WARNING)
+        return compact
+
+    def compact_event(self, event: Dict) -> Dict:
+        """
+        紧凑的流式搜索事件: results事件的结果列表和done事件的结果同compact_results，
+        深网的results事件带warning字段
+        """
+        if event["event"] == "results":
+            compact = self.compact_results({event["type"]: event["results"]})
+            event = {**event, "results": compact[event["type"]]}
+            if "warning" in compact:
+                event["warning"] = compact["warning"]
+        elif event["event"] == "done":
+            event = {**event, "results": self.compact_results(event["results"])}
+        return event
 
     def format_results(self, results: Dict) -> str:
-        """格式化搜索结果"""
+        """把搜索结果渲染为HTML(仅在请求html格式或执行任务时使用)"""
         formatted = ["<div class='search-results'>"]
-        
-        # 明网结果
-        if results["surface"]:
+        if results.get("surface"):
             formatted.append("<h3>🌐 明网搜索结果</h3>")
-            for i, result in enumerate(results["surface"], 1):
-                formatted.append(self._format_result_item(i, result))
-        
-        # 深网结果
-        if results["deepweb"]:
+            formatted.extend(_render_items(results["surface"], False))
+        if results.get("deepweb"):
             formatted.append("<h3 class='mt-3'>🕶️ 深网搜索结果</h3>")
-            warning = self.deepweb_config.get("warning", 
-                "注意: 深网链接需要Tor/I2P浏览器访问")
-            formatted.append(f"<div class='alert alert-warning'>{warning}</div>")
-            for i, result in enumerate(results["deepweb"], 1):
-                formatted.append(self._format_result_item(i, result, True))
-        
+            warning = self.deepweb_config.get("warning", DEEPWEB_WARNING)
+            formatted.append(f"<div class='alert alert-warning'>{escape(warning)}</div>")
+            formatted.extend(_render_items(results["deepweb"], True))
         formatted.append("</div>")
-        return "\n".join(formatted)
-
-    def _format_result_item(self, index: int, result: Dict, is_deepweb: bool = False) -> str:
-        """格式化单个结果项"""
-        return f"""
-        <div class='search-result p-2 mb-2 {'deepweb-result' if is_deepweb else 'bg-white'}'>
-            <div class='result-header d-flex justify-content-between mb-1'>
-                <span class='result-index fw-bold'>{index}.</span>
-                <span class='result-source badge {'bg-dark' if is_deepweb else 'bg-info'}>
-                    {result['source']}
-                </span>
-            </div>
-            <a href='{result['link']}' target='_blank' 
-               class='result-title d-block fw-bold mb-1 {'onion-link' if is_deepweb else ''}'>
-                {result['title']}
-            </a>
-            <div class='result-snippet small text-muted'>
-                {result.get('snippet', '无描述')}
-            </div>
-        </div>"""
\ No newline at end of file
+        return "\n".join(formatted)
\ No newline at end of file
@@ -0,0 +1,334 @@
+import os
+import json
+import time
+import random
+import asyncio
+import functools
+import threading
+import contextvars
+from typing import Any, Dict, List, Optional, Tuple
+
+# 导出格式: chrome(Chrome trace-event，可在chrome://tracing或Perfetto中打开)/otlp(OTLP JSON)
+TRACE_FORMATS = ("chrome", "otlp")
+
+# 当前所在的span，asyncio任务创建时复制上下文，子任务自动继承父span
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _track() -> Tuple[int, int]:
+    """span所在的执行轨道(线程, asyncio任务)，导出为Chrome trace的tid"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return threading.get_ident(), id(task) if task is not None else 0
+
+
+class Trace:
+    """一次请求的全部span"""
+    __slots__ = ("trace_id", "sampled", "spans")
+
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans: List[Span] = []
+
+
+class Span:
+    """计时区间，记录名称、父子关系、属性和错误"""
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns",
+                 "attributes", "error", "track")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.error = None
+        self.track = _track()
+        if trace.sampled:
+            trace.spans.append(self)
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    def set(self, **attributes):
+        """补充属性(如结果数、缓存是否命中)"""
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            if error is not None:
+                self.error = f"{type(error).__name__}: {str(error)}"[:200]
+
+
+class _NoopSpan:
+    """未采样或不在追踪中时使用的空span(也是空的上下文管理器)"""
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def end(self, error: Optional[BaseException] = None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _ActiveSpan:
+    """with语句期间把span设为当前span，退出时结束span并恢复父span"""
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Span):
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end(exc)
+        _current_span.reset(self.token)
+        return False
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """解析W3C traceparent请求头，返回(trace_id, 父span_id, 是否采样)"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16), int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32:
+        return None
+    return parts[1], parts[2], bool(int(parts[3], 16) & 1)
+
+
+class Tracer:
+    """
+    轻量追踪器
+
+    每个请求一个根span，其下的span通过contextvars在同一任务及其创建的子任务、
+    asyncio.to_thread线程中自动嵌套。未采样的请求只生成trace ID，不记录span。
+    采样的请求结束后写入 export_dir/<trace_id>.json。
+    """
+    def __init__(self, sample_rate: float = 0.0, export_dir: str = "data/traces",
+                 export_format: str = "chrome", service_name: str = "autonomous-agent",
+                 max_spans: int = 10000):
+        self.configure(sample_rate, export_dir, export_format, service_name, max_spans)
+        self.exported = 0
+        self.dropped_spans = 0
+
+    def configure(self, sample_rate: float = 0.0, export_dir: str = "data/traces",
+                  export_format: str = "chrome", service_name: str = "autonomous-agent",
+                  max_spans: int = 10000):
+        """
+        参数:
+            sample_rate: 采样比例(0~1)，请求带traceparent时沿用上游的采样决定
+            export_dir: 追踪文件目录
+            export_format: chrome/otlp
+            service_name: 导出的服务名
+            max_spans: 单个追踪最多记录的span数，超过的span不再记录
+        """
+        if export_format not in TRACE_FORMATS:
+            raise ValueError(f"unknown trace format: {export_format}")
+        self.sample_rate = sample_rate
+        self.export_dir = export_dir
+        self.export_format = export_format
+        self.service_name = service_name
+        self.max_spans = max_spans
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None,
+                    **attributes) -> Tuple[Span, contextvars.Token]:
+        """开始一个追踪并把根span设为当前span，返回(根span, 用于恢复上下文的token)"""
+        parent = parse_traceparent(traceparent)
+        if parent:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        root = Span(Trace(trace_id, sampled), name, parent_id, attributes)
+        return root, _current_span.set(root)
+
+    def finish_trace(self, root: Span, token: Optional[contextvars.Token] = None,
+                     error: Optional[BaseException] = None):
+        """结束根span并导出(流式响应在另一个上下文中结束时token传None)"""
+        root.end(error)
+        if token is not None:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                pass
+        if root.trace.sampled:
+            try:
+                self.export(root.trace)
+            except OSError as e:
+                print(f"追踪导出出错: {str(e)}")
+
+    def start_span(self, name: str, **attributes):
+        """
+        在当前span下开始子span但不设为当前span，由调用方调用end()
+
+        用于异步生成器: 生成器可能在其他上下文中被关闭，不能跨yield持有contextvar。
+        """
+        parent = _current_span.get()
+        if parent is None or not parent.trace.sampled:
+            return NOOP_SPAN
+        if len(parent.trace.spans) >= self.max_spans:
+            self.dropped_spans += 1
+            return NOOP_SPAN
+        return Span(parent.trace, name, parent.span_id, attributes)
+
+    def span(self, name: str, **attributes):
+        """
+        在当前span下创建子span，用作with语句(不在追踪中或未采样时不记录)
+
+            with span("search.fuse", sources=3) as s:
+                s.set(count=10)
+        """
+        span = self.start_span(name, **attributes)
+        if span is NOOP_SPAN:
+            return NOOP_SPAN
+        return _ActiveSpan(span)
+
+    def traced(self, name: Optional[str] = None):
+        """函数装饰器(同步或异步): 整个调用作为一个span"""
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def wrapper(*args, **kwargs):
+                    with self.span(span_name):
+                        return await func(*args, **kwargs)
+            else:
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    with self.span(span_name):
+                        return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def export(self, trace: Trace) -> str:
+        """把追踪写入文件(先写临时文件再改名)，返回文件路径"""
+        os.makedirs(self.export_dir, exist_ok=True)
+        payload = self.to_chrome(trace) if self.export_format == "chrome" else self.to_otlp(trace)
+        path = os.path.join(self.export_dir, f"{trace.trace_id}.json")
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, default=str)
+        os.replace(temp, path)
+        self.exported += 1
+        return path
+
+    def to_chrome(self, trace: Trace) -> Dict:
+        """Chrome trace-event格式: 每个span一个完整事件(ph=X)，不同任务/线程显示为不同的轨道"""
+        tracks: Dict[Tuple[int, int], int] = {}
+        events = []
+        now = time.time_ns()
+        for span in list(trace.spans):
+            tid = tracks.setdefault(span.track, len(tracks) + 1)
+            args = {**span.attributes, "span_id": span.span_id}
+            if span.error:
+                args["error"] = span.error
+            events.append({
+                "name": span.name,
+                "cat": "agent",
+                "ph": "X",
+                "ts": span.start_ns / 1000,
+                "dur": ((span.end_ns or now) - span.start_ns) / 1000,
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": args
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": trace.trace_id, "service": self.service_name}
+        }
+
+    @staticmethod
+    def _otlp_value(value: Any) -> Dict:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def to_otlp(self, trace: Trace) -> Dict:
+        """OTLP/JSON格式(ExportTraceServiceRequest)，可直接POST到OTLP HTTP接收端的/v1/traces"""
+        now = time.time_ns()
+        spans = []
+        for span in list(trace.spans):
+            item = {
+                "traceId": trace.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or now),
+                "attributes": [
+                    {"key": key, "value": self._otlp_value(value)} for key, value in span.attributes.items()
+                ],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+            }
+            if span.parent_id:
+                item["parentSpanId"] = span.parent_id
+            spans.append(item)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": self.service_name}},
+                {"key": "process.pid", "value": {"intValue": str(os.getpid())}}
+            ]},
+            "scopeSpans": [{"scope": {"name": "agent.tracing"}, "spans": spans}]
+        }]}
+
+    def stats(self) -> Dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "format": self.export_format,
+            "export_dir": self.export_dir,
+            "exported": self.exported,
+            "dropped_spans": self.dropped_spans
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def activate(span: Span) -> contextvars.Token:
+    """在当前上下文中恢复span(如流式响应体在请求处理结束后继续产出时)"""
+    return _current_span.set(span)
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+# 进程内默认追踪器(由app.py按环境变量配置)
+TRACER = Tracer()
+span = TRACER.span
+start_span = TRACER.start_span
+traced = TRACER.traced